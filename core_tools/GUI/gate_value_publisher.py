@@ -0,0 +1,117 @@
+import logging
+
+from PyQt5 import QtCore
+
+from .qt_util import qt_log_exception
+
+logger = logging.getLogger(__name__)
+
+
+class gate_value_publisher(QtCore.QObject):
+    '''
+    Publishes the voltages of the real and virtual gates to the GUIs.
+
+    Changes reported by the gates object are coalesced into one snapshot
+    per GUI frame. The snapshot is computed from the cached gate voltages
+    and is delivered to all subscribers with the `values_changed` signal.
+    The hardware is only read by the slow fallback polling, which picks up
+    changes made directly on the dacs.
+
+    There is one publisher per gates object. Use `gate_value_publisher.get(gates)`.
+    '''
+    values_changed = QtCore.pyqtSignal(dict)
+    # internal signal to pass notifications from any thread to the GUI thread.
+    _changed = QtCore.pyqtSignal()
+
+    frame_interval = 20  # [ms]
+    fallback_interval = 5.0  # [s]
+
+    _publishers = {}
+
+    def __init__(self, gates):
+        super().__init__()
+        self.gates = gates
+        self._n_subscribers = 0
+        self._snapshot = gates.get_cached_voltages()
+
+        self._frame_timer = QtCore.QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(self.frame_interval)
+        self._frame_timer.timeout.connect(self._publish)
+
+        self._fallback_timer = QtCore.QTimer(self)
+        self._fallback_timer.setInterval(int(self.fallback_interval * 1000))
+        self._fallback_timer.timeout.connect(self.refresh)
+
+        self._changed.connect(self._schedule, QtCore.Qt.QueuedConnection)
+
+    @staticmethod
+    def get(gates):
+        '''
+        Returns the publisher for the gates object.
+        '''
+        try:
+            return gate_value_publisher._publishers[id(gates)]
+        except KeyError:
+            publisher = gate_value_publisher(gates)
+            gate_value_publisher._publishers[id(gates)] = publisher
+            return publisher
+
+    @property
+    def snapshot(self):
+        '''
+        Last published voltages of all real and virtual gates.
+        '''
+        return dict(self._snapshot)
+
+    def subscribe(self, slot):
+        '''
+        Connects slot to `values_changed`.
+        The fallback polling runs while there are subscribers.
+        '''
+        self.values_changed.connect(slot)
+        self._n_subscribers += 1
+        if self._n_subscribers == 1:
+            self.gates.add_value_listener(self._on_gates_changed)
+            self._fallback_timer.start()
+            # publish changes made while nobody was listening
+            self._schedule()
+
+    def unsubscribe(self, slot):
+        try:
+            self.values_changed.disconnect(slot)
+        except TypeError:
+            return
+        self._n_subscribers -= 1
+        if self._n_subscribers == 0:
+            self.gates.remove_value_listener(self._on_gates_changed)
+            self._fallback_timer.stop()
+            self._frame_timer.stop()
+
+    @qt_log_exception
+    def refresh(self):
+        '''
+        Reads the gate voltages from the hardware.
+        Changed values are published in the next frame.
+        '''
+        try:
+            self.gates.refresh()
+        except Exception:
+            logger.error('Failed to refresh gate voltages', exc_info=True)
+
+    def _on_gates_changed(self, gate_names):
+        # Can be called from any thread. The snapshot is created in the GUI thread.
+        self._changed.emit()
+
+    @qt_log_exception
+    def _schedule(self):
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    @qt_log_exception
+    def _publish(self):
+        snapshot = self.gates.get_cached_voltages()
+        if snapshot == self._snapshot:
+            return
+        self._snapshot = snapshot
+        self.values_changed.emit(dict(snapshot))
@@ -23,6 +23,7 @@ from core_tools.GUI.keysight_videomaps.GUI.videomode_gui import Ui_MainWindow
 from core_tools.GUI.keysight_videomaps.plotter.plotting_functions import _1D_live_plot, _2D_live_plot
 from core_tools.GUI.qt_util import qt_log_exception
 from core_tools.utility.powerpoint import addPPTslide
+from core_tools.utility.status_bus import status_bus
 from core_tools.GUI.keysight_videomaps.GUI.gui_components import (
     Settings, CheckboxList, OffsetsList
     )
@@ -194,10 +195,10 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
         self.setupUI2()
         self._init_defaults(cust_defaults, settings_name)
 
-        # update GUI state (for single step)
+        # update GUI state (for single step). Only runs while a scan is running.
         self._update_timer = QtCore.QTimer(self)
+        self._update_timer.setInterval(200)
         self._update_timer.timeout.connect(self._update_active_state)
-        self._update_timer.start(200)
 
         # only change if still default
         if pg.getConfigOption('foreground') == 'd' and pg.getConfigOption('background') == 'k':
@@ -420,6 +421,18 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
     def is_running(self):
         return self._run_state if self._run_state != "Idle" else False
 
+    def _set_run_state(self, state):
+        '''
+        Sets the run state and publishes it on the status bus.
+        '''
+        self._run_state = state
+        if state == "Idle":
+            self._update_timer.stop()
+            status_bus.publish('video_mode', 'stopped')
+        else:
+            self._update_timer.start()
+            status_bus.publish('video_mode', 'started', mode=state)
+
     def turn_off(self):
         self.stop()
 
@@ -675,10 +688,11 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
             self._1D_play.setEnabled(False)
             self._prepare_1D_scan()
             self._plot1D.start()
-            self._run_state = "1D"
+            self._set_run_state("1D")
             self._set_icon(self._1D_play, r"playing.png")
         except Exception as e:
             logger.error(repr(e), exc_info=True)
+            status_bus.publish('video_mode', 'error', message=repr(e))
             self._stop_1D()
         finally:
             self._1D_play.setEnabled(True)
@@ -687,7 +701,7 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
     def _stop_1D(self):
         if self._plot1D:
             logger.info('Stopping 1D')
-            self._run_state = "Idle"
+            self._set_run_state("Idle")
             self._set_icon(self._1D_play, "play.png")
             self._set_icon(self._1D_step, "image.png")
             self._plot1D.stop()
@@ -740,10 +754,11 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
             self._2D_play.setEnabled(False)
             self._prepare_2D_scan()
             self._plot2D.start()
-            self._run_state = "2D"
+            self._set_run_state("2D")
             self._set_icon(self._2D_play, r"playing.png")
         except Exception as e:
             logger.error(repr(e), exc_info=True)
+            status_bus.publish('video_mode', 'error', message=repr(e))
             self._stop_2D()
         finally:
             self._2D_play.setEnabled(True)
@@ -755,7 +770,7 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
             self._plot2D.stop()
             self._set_icon(self._2D_play, "play.png")
             self._set_icon(self._2D_step, "image.png")
-            self._run_state = "Idle"
+            self._set_run_state("Idle")
 
     def stop(self):
         state = self.is_running
@@ -773,9 +788,10 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
             # Note: plot goes to not active state when ready
             # If play is pressed before ready, then it becomes playing...
             self._set_icon(self._1D_step, "capturing.png")
-            self._run_state = "1D"
+            self._set_run_state("1D")
         except Exception as e:
             logger.error(repr(e), exc_info=True)
+            status_bus.publish('video_mode', 'error', message=repr(e))
             self._stop_1D()
 
     @qt_log_exception
@@ -787,9 +803,10 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
             # Note: plot goes to not active state when ready
             # If play is pressed before ready, then it becomes playing...
             self._set_icon(self._2D_step, "capturing.png")
-            self._run_state = "2D"
+            self._set_run_state("2D")
         except Exception as e:
             logger.error(repr(e), exc_info=True)
+            status_bus.publish('video_mode', 'error', message=repr(e))
             self._stop_1D()
 
     def _step(self):
@@ -925,6 +942,8 @@ class liveplotting(QtWidgets.QMainWindow, Ui_MainWindow):
         so the memory on the AWG is properly released.
         """
         self._update_timer.stop()
+        if self.is_running:
+            status_bus.publish('video_mode', 'stopped')
         if self._plot1D is not None:
             self._plot1D.stop()
             self._plot1D.remove()
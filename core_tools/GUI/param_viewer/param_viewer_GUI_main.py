@@ -3,6 +3,7 @@ from PyQt5 import QtCore, QtWidgets
 import qcodes as qc
 from dataclasses import dataclass
 from ..qt_util import qt_log_exception
+from ..gate_value_publisher import gate_value_publisher
 
 import logging
 
@@ -85,6 +86,11 @@ class param_viewer(QtWidgets.QMainWindow, Ui_MainWindow):
         self.step_size.currentIndexChanged.connect(lambda: self.update_step(float(self.step_size.currentText())))
         self._finish_gates_GUI()
 
+        # gate voltages are published on change. Only the RF settings are read periodically.
+        self.publisher = gate_value_publisher.get(self.gates_object)
+        self.publisher.subscribe(self._update_gate_values)
+        self._update_gate_values(self.publisher.snapshot)
+
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(lambda: self._update_parameters())
         self.timer.start(500)
@@ -96,6 +102,7 @@ class param_viewer(QtWidgets.QMainWindow, Ui_MainWindow):
     @qt_log_exception
     def closeEvent(self, event):
         self.timer.stop()
+        self.publisher.unsubscribe(self._update_gate_values)
 
     @qt_log_exception
     def update_step(self, value: float):
@@ -277,62 +284,65 @@ class param_viewer(QtWidgets.QMainWindow, Ui_MainWindow):
     @qt_log_exception
     def _update_parameters(self):
         '''
-        updates the values of all the gates in the parameter viewer periodically
+        updates the values of the RF settings in the parameter viewer periodically.
+        The gates are updated from the last published values, which does not access the hardware.
+        This updates gates that were skipped, because they had the focus.
         '''
-        idx = self.tab_menu.currentIndex()
-        all_gate_voltages = {}
-        if idx == 0:
-            params = self.real_gates
-        elif idx == 1:
-            params = self.virtual_gates
-            # if supported retrieve all voltages in 1 call. That's a lot faster.
-            if hasattr(self.gates_object, "get_all_gate_voltages"):
-                all_gate_voltages = self.gates_object.get_all_gate_voltages()
-        elif idx == 2:
-            params = self.rf_settings
-        else:
+        if self.tab_menu.currentIndex() != 2:
+            self._update_gate_values(self.publisher.snapshot)
             return
 
-        for param in params:
+        for param in self.rf_settings:
             try:
-                name = param.name
-                if name in all_gate_voltages:
-                    new_value = all_gate_voltages[name]/param.division
-                else:
-                    new_value = param.param_parameter()/param.division
-
-                old_value = self._last_gui_values.get(name, None)
-
-                if old_value == new_value:
-                    continue
-
-                # do not update when a user clicks on it.
-                gui_input = param.gui_input_param
-                if not gui_input.hasFocus():
-                    if isinstance(gui_input, QtWidgets.QDoubleSpinBox):
-                        if idx == 1 and (new_value < gui_input.minimum() or new_value > gui_input.maximum()):
-                            gui_input.setEnabled(False)
-                            gui_input.setStyleSheet("color : red;")
-                            new_text = gui_input.textFromValue(new_value)
-                            current_text = gui_input.text()
-                            if current_text != new_text:
-                                gui_input.setValue(new_value)
-                        else:
-                            if not gui_input.isEnabled():
-                                gui_input.setEnabled(True)
-                                gui_input.setStyleSheet("")
-
-                            current_text = gui_input.text()
-                            new_text = gui_input.textFromValue(new_value)
-                            if current_text != new_text:
-                                logger.info(f'Update GUI {param.param_parameter.name} {current_text} -> {new_text}')
-                                gui_input.setValue(new_value)
-                                # Note: additional check on 0.0, because "-0.00 " and "0.00" are numerically equal.
-                                if gui_input.text() != new_text and gui_input.valueFromText(new_text) != 0.0:
-                                    print(f'WARNING: {param.param_parameter.name} corrected from '
-                                          f'{new_text} to {gui_input.text()}')
-                    elif isinstance(gui_input, QtWidgets.QCheckBox):
-                        gui_input.setChecked(bool(new_value))
-                    self._last_gui_values[name] = new_value
+                self._update_gui_value(param, param.param_parameter()/param.division, False)
             except Exception:
                 logger.error(f'Error updating {param}', exc_info=True)
+
+    @qt_log_exception
+    def _update_gate_values(self, voltages):
+        '''
+        updates the values of the gates with the voltages published by the gates object.
+        '''
+        for params, virtual in [(self.real_gates, False), (self.virtual_gates, True)]:
+            for param in params:
+                try:
+                    if param.name in voltages:
+                        self._update_gui_value(param, voltages[param.name]/param.division, virtual)
+                except Exception:
+                    logger.error(f'Error updating {param}', exc_info=True)
+
+    def _update_gui_value(self, param, new_value, virtual):
+        name = param.name
+        old_value = self._last_gui_values.get(name, None)
+
+        if old_value == new_value:
+            return
+
+        # do not update when a user clicks on it.
+        gui_input = param.gui_input_param
+        if not gui_input.hasFocus():
+            if isinstance(gui_input, QtWidgets.QDoubleSpinBox):
+                if virtual and (new_value < gui_input.minimum() or new_value > gui_input.maximum()):
+                    gui_input.setEnabled(False)
+                    gui_input.setStyleSheet("color : red;")
+                    new_text = gui_input.textFromValue(new_value)
+                    current_text = gui_input.text()
+                    if current_text != new_text:
+                        gui_input.setValue(new_value)
+                else:
+                    if not gui_input.isEnabled():
+                        gui_input.setEnabled(True)
+                        gui_input.setStyleSheet("")
+
+                    current_text = gui_input.text()
+                    new_text = gui_input.textFromValue(new_value)
+                    if current_text != new_text:
+                        logger.info(f'Update GUI {param.param_parameter.name} {current_text} -> {new_text}')
+                        gui_input.setValue(new_value)
+                        # Note: additional check on 0.0, because "-0.00 " and "0.00" are numerically equal.
+                        if gui_input.text() != new_text and gui_input.valueFromText(new_text) != 0.0:
+                            print(f'WARNING: {param.param_parameter.name} corrected from '
+                                  f'{new_text} to {gui_input.text()}')
+            elif isinstance(gui_input, QtWidgets.QCheckBox):
+                gui_input.setChecked(bool(new_value))
+            self._last_gui_values[name] = new_value
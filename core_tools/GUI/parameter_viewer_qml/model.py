@@ -14,9 +14,8 @@ class gate_model(QtCore.QAbstractListModel):
         self.gates = gates
         self._allow_mouse_wheel_updates = allow_mouse_wheel_updates
 
-        self.current_vals = list()
-        for gate in self.gates:
-            self.current_vals += [self._data.get(gate)]
+        voltages = self._data.get_cached_voltages()
+        self.current_vals = [voltages[gate] for gate in self.gates]
 
     def rowCount(self, parent=None):
         return len(self.gates)
@@ -26,7 +25,7 @@ class gate_model(QtCore.QAbstractListModel):
         if role == self.gate:
             return self.gates[row]
         if role == self.voltage:
-            number =  self._data.get(self.gates[row])
+            number = self.current_vals[row]
             return f'{number:.2f}'
 
     def roleNames(self):
@@ -47,11 +46,14 @@ class gate_model(QtCore.QAbstractListModel):
 
             return True
 
-    def update_model(self):
+    def update_model(self, voltages):
+        '''
+        Updates the model with the voltages published by the gates object.
+        '''
         to_update = False
 
         for i,gate_name in enumerate(self.gates):
-            gv = self._data.get(gate_name)
+            gv = voltages[gate_name]
 
             if self.current_vals[i] != gv:
                 to_update = True
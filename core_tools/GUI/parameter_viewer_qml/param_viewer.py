@@ -1,4 +1,5 @@
 from core_tools.GUI.parameter_viewer_qml.model import gate_model
+from core_tools.GUI.gate_value_publisher import gate_value_publisher
 from PyQt5 import QtCore, QtWidgets, QtQml, QtGui
 
 import core_tools.GUI.parameter_viewer_qml as qml_in
@@ -34,6 +35,8 @@ class param_viewer:
             else:
                 raise ValueError('No gates Instrument found in the station, pleasse add manually.')
 
+        self.publisher = gate_value_publisher.get(gates)
+
         self.real_gate_model = gate_model(gates, list(gates.hardware.dac_gate_map.keys()), allow_mouse_wheel_updates = allow_mouse_wheel_updates)
         self.engine.rootContext().setContextProperty("real_gate_model", self.real_gate_model)
 
@@ -49,17 +52,18 @@ class param_viewer:
         self.engine.load(QtCore.QUrl.fromLocalFile(filename))
         self.win = self.engine.rootObjects()[0]
 
-        self.timer_real = QtCore.QTimer()
-        self.timer_real.timeout.connect(self.real_gate_model.update_model)
-        self.timer_real.start(500)
-        self.timer_virt = QtCore.QTimer()
-        self.timer_virt.timeout.connect(self.virtual_gate_model.update_model)
-        self.timer_virt.start(500)
+        self.publisher.subscribe(self.real_gate_model.update_model)
+        self.publisher.subscribe(self.virtual_gate_model.update_model)
+        self.win.closing.connect(self._on_closing)
 
         if self.instance_ready == False:
             self.app.exec_()
             print('exec')
 
+    def _on_closing(self, close_event):
+        self.publisher.unsubscribe(self.real_gate_model.update_model)
+        self.publisher.unsubscribe(self.virtual_gate_model.update_model)
+
 if __name__ == "__main__":
     import numpy as np
 
@@ -7,7 +7,8 @@ from abc import ABC, abstractmethod
 from PyQt5 import QtCore, QtWidgets
 from core_tools.GUI.script_runner.script_runner_gui import Ui_MainWindow
 from core_tools.GUI.qt_util import qt_log_exception
-from core_tools.GUI.keysight_videomaps.liveplotting import liveplotting
+from core_tools.GUI.status_subscriber import status_subscriber
+from core_tools.utility.status_bus import status_bus
 
 try:
     from spyder_kernels.customize.spydercustomize import runcell
@@ -50,16 +51,14 @@ class ScriptRunner(QtWidgets.QMainWindow, Ui_MainWindow):
         self.video_mode_label.setMargin(2)
         self.statusbar.setContentsMargins(8, 0, 4, 4)
         self.statusbar.addWidget(self.video_mode_label)
-        self.video_mode_paused = False
-        self._update_video_mode_status()
+        # video mode publishes its state changes.
+        self.video_mode_status = status_subscriber(['video_mode'], self)
+        self.video_mode_status.status_changed.connect(self._update_video_mode_status)
+        self._update_video_mode_status(self.video_mode_status.get_status('video_mode'))
 
         self.latest_result = None
         self.commands = []
 
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(lambda: self._update_video_mode_status())
-        self.timer.start(500)
-
         self.show()
         if not instance_ready:
             self.app.exec()
@@ -102,18 +101,16 @@ class ScriptRunner(QtWidgets.QMainWindow, Ui_MainWindow):
 
     @qt_log_exception
     def closeEvent(self, event):
-        self.timer.stop()
-        self.timer = None
+        self.video_mode_status.close()
 
     @qt_log_exception
     def _run_command(self, command, arg_inputs):
         try:
-            self._update_video_mode_status()
+            self._update_video_mode_status(self.video_mode_status.get_status('video_mode'))
             running = self.video_mode_running
             if running:
-                self.video_mode_paused = True
                 self._video_mode_start_stop(running)
-                self._show_video_mode_status('PAUSED', '#FF8')
+                status_bus.publish('video_mode', 'paused', mode=running)
                 self.app.processEvents()
 
             kwargs = {
@@ -127,7 +124,6 @@ class ScriptRunner(QtWidgets.QMainWindow, Ui_MainWindow):
         finally:
             self.latest_result = command_result
             if running:
-                self.video_mode_paused = False
                 self._video_mode_start_stop(running)
 
     def _add_command(self, command):
@@ -184,22 +180,23 @@ class ScriptRunner(QtWidgets.QMainWindow, Ui_MainWindow):
         for i, command in enumerate(commands):
             self._add_command(i, command)
 
-    def _update_video_mode_status(self):
-        if self.video_mode_paused:
-            return
-        if liveplotting.last_instance is None:
+    @qt_log_exception
+    def _update_video_mode_status(self, event):
+        running = False
+        if event is None:
             self._show_video_mode_status('<unknown>', '')
-            self.video_mode_running = False
-            return
-        running = liveplotting.last_instance.is_running
-        if not running:
-            self._show_video_mode_status('stopped', '')
-        elif running == '1D':
-            self._show_video_mode_status('1D running', '#4D6')
-        elif running == '2D':
-            self._show_video_mode_status('2D running', '#4D6')
+        elif event.state == 'started':
+            running = event.info.get('mode')
+            if running in ['1D', '2D']:
+                self._show_video_mode_status(f'{running} running', '#4D6')
+            else:
+                self._show_video_mode_status('???', '#AA4')
+        elif event.state == 'paused':
+            self._show_video_mode_status('PAUSED', '#FF8')
+        elif event.state == 'error':
+            self._show_video_mode_status('error', '#F88')
         else:
-            self._show_video_mode_status('???', '#AA4')
+            self._show_video_mode_status('stopped', '')
         self.video_mode_running = running
 
     def _show_video_mode_status(self, text, color):
@@ -207,6 +204,9 @@ class ScriptRunner(QtWidgets.QMainWindow, Ui_MainWindow):
         self.video_mode_label.setStyleSheet(f'QLabel {{ background-color : {color} }}')
 
     def _video_mode_start_stop(self, mode):
+        # import here to avoid loading the video mode when it is not used.
+        from core_tools.GUI.keysight_videomaps.liveplotting import liveplotting
+
         if mode == '1D':
             liveplotting.last_instance._1D_start_stop()
         if mode == '2D':
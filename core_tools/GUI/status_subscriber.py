@@ -0,0 +1,48 @@
+import logging
+
+from PyQt5 import QtCore
+
+from core_tools.utility.status_bus import status_bus
+from .qt_util import qt_log_exception
+
+logger = logging.getLogger(__name__)
+
+
+class status_subscriber(QtCore.QObject):
+    '''
+    Delivers the events of the status bus in the GUI thread.
+
+    The producers only post a queued signal when the subscriber has no
+    pending events. All events are delivered with `status_changed` in the
+    next iteration of the event loop. There is no polling: nothing runs
+    while the state does not change.
+
+    Args:
+        sources (list[str]): sources to subscribe to. All sources if None.
+        parent (QObject): parent of the subscriber.
+
+    Note:
+        Call close() when the widget is closed.
+    '''
+    status_changed = QtCore.pyqtSignal(object)
+    # internal signal to wake up the GUI thread from any thread.
+    _wakeup = QtCore.pyqtSignal()
+
+    def __init__(self, sources=None, parent=None):
+        super().__init__(parent)
+        self._wakeup.connect(self._deliver, QtCore.Qt.QueuedConnection)
+        self._subscription = status_bus.subscribe(self._wakeup.emit, sources)
+
+    def get_status(self, source):
+        '''
+        Returns the last event of source or None.
+        '''
+        return status_bus.get_status(source)
+
+    def close(self):
+        status_bus.unsubscribe(self._subscription)
+
+    @qt_log_exception
+    def _deliver(self):
+        for event in self._subscription.poll():
+            self.status_changed.emit(event)
@@ -1,8 +1,10 @@
 import logging
+import time
 
 from pulse_lib.schedule.hardware_schedule import HardwareSchedule
 
 from .hvi2_schedule_extensions import add_extensions
+from .schedule_trace import schedule_trace
 
 from hvi2_script.system import HviSystem
 from hvi2_script.sequencer import HviSequencer
@@ -14,7 +16,7 @@ logger = logging.getLogger(__name__)
 class Hvi2Schedule(HardwareSchedule):
     verbose = False
 
-    def __init__(self, hardware, script):
+    def __init__(self, hardware, script, configuration_hash=None):
         self.hardware = hardware
         self.script = script
         self.extensions = add_extensions
@@ -25,6 +27,10 @@ class Hvi2Schedule(HardwareSchedule):
         self._might_be_loaded = False
         self.schedule_parms = {}
         self.hvi_id = uuid.uuid4()
+        self.configuration_hash = configuration_hash
+
+    def _trace(self, event):
+        return schedule_trace.phase(event, self.script.name, self.configuration_hash)
 
     def set_schedule_parameters(self, **kwargs):
         for key,value in kwargs.items():
@@ -34,13 +40,14 @@ class Hvi2Schedule(HardwareSchedule):
         for awg in self.hardware.awgs:
             for ch in range(1, 5):
                 awg.awg_stop(ch)
-                awg.set_channel_wave_shape(SD1.SD_Waveshapes.AOU_AWG, ch)
-                awg.awg_queue_config(ch, SD1.SD_QueueMode.CYCLIC)
+                self.hardware.configure_awg_channel(
+                        awg, ch, SD1.SD_Waveshapes.AOU_AWG, SD1.SD_QueueMode.CYCLIC)
         for dig in self.hardware.digitizers:
             dig.daq_stop_multiple(0b1111)
             dig.daq_flush_multiple(0b1111)
 
     def reconfigure_modules(self):
+        self.hardware.invalidate_module_state()
         for awg in self.hardware.awgs:
             for ch in range(1, 5):
                 awg.awg_stop(ch)
@@ -54,37 +61,38 @@ class Hvi2Schedule(HardwareSchedule):
                     awg._settings_cache['offset'][ch] = None
                     awg.set_channel_offset(offset, ch)
 
-                awg.set_channel_wave_shape(SD1.SD_Waveshapes.AOU_AWG, ch)
-                awg.awg_queue_config(ch, SD1.SD_QueueMode.CYCLIC)
+                self.hardware.configure_awg_channel(
+                        awg, ch, SD1.SD_Waveshapes.AOU_AWG, SD1.SD_QueueMode.CYCLIC)
         for dig in self.hardware.digitizers:
             dig.daq_stop_multiple(0b1111)
             dig.daq_flush_multiple(0b1111)
 
     def compile(self):
-        logger.info(f"Build HVI2 schedule with script '{self.script.name}'")
-        hvi_system = HviSystem()
-        for awg in self.hardware.awgs:
-            sd_aou = awg.awg
-            hvi_system.add_awg(sd_aou, awg.name)
-        for dig in self.hardware.digitizers:
-            sd_ain = dig.SD_AIN
-            hvi_system.add_digitizer(sd_ain, dig.name)
-        self.hvi_system = hvi_system
+        with self._trace('compile'):
+            logger.info(f"Build HVI2 schedule with script '{self.script.name}'")
+            hvi_system = HviSystem()
+            for awg in self.hardware.awgs:
+                sd_aou = awg.awg
+                hvi_system.add_awg(sd_aou, awg.name)
+            for dig in self.hardware.digitizers:
+                sd_ain = dig.SD_AIN
+                hvi_system.add_digitizer(sd_ain, dig.name)
+            self.hvi_system = hvi_system
+
+            if self.extensions is not None:
+                self.extensions(hvi_system)
+
+            sequencer = HviSequencer(hvi_system)
+            self.sequencer = sequencer
+            self.script.sequence(sequencer, self.hardware)
+            if self.verbose:
+                logger.debug(f"Script '{self.script.name}':\n" + self.sequencer.describe())
 
-        if self.extensions is not None:
-            self.extensions(hvi_system)
-
-        sequencer = HviSequencer(hvi_system)
-        self.sequencer = sequencer
-        self.script.sequence(sequencer, self.hardware)
-        if self.verbose:
-            logger.debug(f"Script '{self.script.name}':\n" + self.sequencer.describe())
-
-        try:
-            self.hvi_exec = self.sequencer.compile()
-        except:
-            logger.error(f"Exception in compilation of '{self.script.name}'", exc_info=True)
-            raise
+            try:
+                self.hvi_exec = self.sequencer.compile()
+            except:
+                logger.error(f"Exception in compilation of '{self.script.name}'", exc_info=True)
+                raise
 
     def is_loaded(self):
         return self._is_loaded
@@ -94,8 +102,11 @@ class Hvi2Schedule(HardwareSchedule):
             logger.debug('HVI2 schedule already loaded')
             return
 
-        self.hardware.release_schedule()
-        self.configure_modules()
+        t_start = time.perf_counter()
+        # the modules are configured for this schedule right after the release.
+        self.hardware.release_schedule(invalidate=False)
+        with self._trace('configure_modules'):
+            self.configure_modules()
 
         if self.hvi_exec is None:
             self.compile()
@@ -103,7 +114,8 @@ class Hvi2Schedule(HardwareSchedule):
         logger.info(f"Load HVI2 schedule with script '{self.script.name}' (id:{self.hvi_id})")
         self.hardware.set_schedule(self)
         self._might_be_loaded = True
-        self.hvi_exec.load()
+        with self._trace('load_hvi'):
+            self.hvi_exec.load()
         if self.hvi_exec.is_running():
             logger.warning('HVI running after load; attempting to stop HVI and modules')
             self.hvi_exec.stop()
@@ -111,6 +123,11 @@ class Hvi2Schedule(HardwareSchedule):
             if self.hvi_exec.is_running():
                 logger.eror('Still Running after stop')
         self._is_loaded = True
+        self.hardware.last_switch_duration = time.perf_counter() - t_start
+        schedule_trace.event('load', self.script.name, self.configuration_hash,
+                             duration=self.hardware.last_switch_duration)
+        logger.info(f"Loaded HVI2 schedule '{self.script.name}' in "
+                    f"{self.hardware.last_switch_duration*1000:.1f} ms")
 
     def unload(self):
         if not self.hvi_exec:
@@ -120,9 +137,11 @@ class Hvi2Schedule(HardwareSchedule):
             self._is_loaded = False
         if self._might_be_loaded:
             logger.info(f"Unload HVI2 schedule with script'{self.script.name}' (id:{self.hvi_id})")
-            self.hvi_exec.unload()
+            with self._trace('unload'):
+                self.hvi_exec.unload()
             self._might_be_loaded = False
-            self.hardware.release_schedule()
+            if self.hardware.active_schedule is self:
+                self.hardware.release_schedule()
 
     def is_running(self):
         return self.hvi_exec.is_running()
@@ -131,10 +150,12 @@ class Hvi2Schedule(HardwareSchedule):
         hvi_params = {**self.schedule_parms, **sequence_variables}
         if self.verbose:
             logger.debug(f'start: {hvi_params}')
-        self.script.start(self.hvi_exec, waveform_duration, n_repetitions, hvi_params)
+        with self._trace('start'):
+            self.script.start(self.hvi_exec, waveform_duration, n_repetitions, hvi_params)
 
     def stop(self):
-        self.script.stop(self.hvi_exec)
+        with self._trace('stop'):
+            self.script.stop(self.hvi_exec)
 
     def close(self):
         self.unload()
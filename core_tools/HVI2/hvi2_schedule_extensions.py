@@ -31,6 +31,21 @@ def get_awg_image_filename(module):
     return os.path.join(get_fpga_image_path(module), 'awg_enhanced.k7z')
 
 
+def get_fpga_image_fingerprint(hardware):
+    '''
+    Returns the FPGA image info of all modules in hardware.
+    Schedules compiled for other FPGA images must be recompiled.
+    '''
+    images = []
+    for awg in hardware.awgs:
+        info = get_fpga_info(awg.awg) if has_fpga_info(awg.awg) else None
+        images.append((awg.name, info))
+    for dig in hardware.digitizers:
+        info = get_fpga_info(dig.SD_AIN) if has_fpga_info(dig.SD_AIN) else None
+        images.append((dig.name, info))
+    return tuple(images)
+
+
 def add_extensions(hvi_system):
     for awg_engine in hvi_system.get_engines(module_type='awg'):
         logger.info(f'Adding {awg_engine.name} extensions')
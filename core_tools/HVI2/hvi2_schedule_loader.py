@@ -1,4 +1,9 @@
+import hashlib
+import json
 import logging
+import time
+import weakref
+from collections import OrderedDict
 from collections.abc import Iterable
 
 from pulse_lib.base_pulse import pulselib
@@ -11,13 +16,41 @@ from .hvi2_single_shot import Hvi2SingleShot
 from .hvi2_video_mode import Hvi2VideoMode
 from .hvi2_continuous_mode import Hvi2ContinuousMode
 from .hvi2_schedule import Hvi2Schedule
+from .hvi2_schedule_extensions import get_fpga_image_fingerprint
+from .schedule_trace import schedule_trace
 
 logger = logging.getLogger(__name__)
 
 
+def _canonical(obj):
+    if isinstance(obj, dict):
+        return {str(key): _canonical(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(value) for value in obj]
+    return obj
+
+
+def configuration_hash(configuration):
+    '''
+    Returns a stable hash of the schedule configuration.
+    The hash does not depend on the order of the keys in the configuration.
+    '''
+    text = json.dumps(_canonical(configuration), sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
 # TODO: make scheduler into QCoDeS instrument. This solves closing and reloading issues.
 class Hvi2ScheduleLoader(HardwareSchedule):
-    schedule_cache = {}
+    # compiled schedules in least recently used order, keyed by configuration hash.
+    schedule_cache = OrderedDict()
+    # maximum number of compiled schedules kept in memory.
+    max_cached_schedules = 8
+    # number of loaders holding a schedule, keyed by schedule.
+    _schedule_users = {}
+    # all loaders. Used to clear their schedules in close_all().
+    _loaders = weakref.WeakSet()
+    # FPGA images of the modules the cached schedules were compiled for.
+    _fpga_images = None
     script_classes = {
         Hvi2VideoMode,
         Hvi2SingleShot,
@@ -41,10 +74,12 @@ class Hvi2ScheduleLoader(HardwareSchedule):
         self._script_name = script_name
         self._hardware = self._update_hardware(pulse_lib, digitizers)
         self._configuration = None
+        self._configuration_hash = None
         self._schedule = None
         self._acquisition_delay_ns = acquisition_delay_ns
         self._switch_los = switch_los
         self._enabled_los = enabled_los
+        Hvi2ScheduleLoader._loaders.add(self)
 
     @property
     def script_name(self):
@@ -72,12 +107,53 @@ class Hvi2ScheduleLoader(HardwareSchedule):
 
     @staticmethod
     def close_all():
-        n_schedules = len(Hvi2ScheduleLoader.schedule_cache)
-        if n_schedules > 0:
-            logger.info(f'Closing and deleting {n_schedules} schedules')
-        for entry in Hvi2ScheduleLoader.schedule_cache.values():
-            entry.close()
-        Hvi2ScheduleLoader.schedule_cache = {}
+        '''
+        Closes all schedules, also the schedules held by loaders.
+        The loaders release their schedule and get a new one on the next load.
+        '''
+        schedules = set(Hvi2ScheduleLoader.schedule_cache.values())
+        schedules.update(Hvi2ScheduleLoader._schedule_users)
+        if len(schedules) > 0:
+            logger.info(f'Closing and deleting {len(schedules)} schedules')
+        for loader in Hvi2ScheduleLoader._loaders:
+            loader._schedule = None
+        Hvi2ScheduleLoader._schedule_users = {}
+        Hvi2ScheduleLoader.schedule_cache = OrderedDict()
+        for schedule in schedules:
+            schedule.close()
+
+    @staticmethod
+    def _invalidate_schedules():
+        '''
+        Removes all schedules from the cache.
+        Schedules held by a loader are closed when the last loader releases them.
+        '''
+        cache = Hvi2ScheduleLoader.schedule_cache
+        Hvi2ScheduleLoader.schedule_cache = OrderedDict()
+        for schedule in cache.values():
+            if schedule not in Hvi2ScheduleLoader._schedule_users:
+                schedule.close()
+
+    @staticmethod
+    def _evict_schedules():
+        '''
+        Closes the least recently used schedules when the cache exceeds max_cached_schedules.
+        Schedules that are loaded or held by a loader are never evicted.
+        '''
+        cache = Hvi2ScheduleLoader.schedule_cache
+        for key in list(cache.keys()):
+            if len(cache) <= Hvi2ScheduleLoader.max_cached_schedules:
+                break
+            schedule = cache[key]
+            if schedule.is_loaded() or schedule in Hvi2ScheduleLoader._schedule_users:
+                continue
+            logger.info(f'Evict schedule {key} from cache')
+            del cache[key]
+            schedule.close()
+
+    @staticmethod
+    def _is_cached(schedule):
+        return Hvi2ScheduleLoader.schedule_cache.get(schedule.configuration_hash) is schedule
 
     def set_schedule_parameters(self, **kwargs):
         self._schedule_parameters = kwargs
@@ -93,6 +169,7 @@ class Hvi2ScheduleLoader(HardwareSchedule):
                 return n
 
     def set_configuration(self, hvi_params, n_waveforms):
+        t_start = time.perf_counter()
         conf = {}
         conf['script_name'] = self._script_name
         conf['n_triggers'] = self._get_n_measurements(hvi_params)
@@ -158,14 +235,20 @@ class Hvi2ScheduleLoader(HardwareSchedule):
         if self._configuration != conf:
             if self._schedule:
                 self._schedule.unload()
-            self._schedule = None
+            self._release_schedule()
             self._configuration = conf
+            self._configuration_hash = configuration_hash(conf)
+
+        schedule_trace.event('set_configuration', self._script_name, self._configuration_hash,
+                             duration=time.perf_counter() - t_start)
 
     def load(self):
         if not self._configuration:
             logger.warning('Cannot load schedule without configuration')
             return
-        if not self._schedule:
+        if not self._schedule or not Hvi2ScheduleLoader._is_cached(self._schedule):
+            # schedule not yet retrieved, released by close_all(),
+            # or removed from the cache by a change of the FPGA images.
             self._get_schedule()
         self._schedule.load()
 
@@ -186,9 +269,32 @@ class Hvi2ScheduleLoader(HardwareSchedule):
             self._schedule.stop()
 
     def close(self):
-        if self._schedule:
-            self._schedule.close()
+        self._release_schedule(close=True)
+
+    def _hold_schedule(self, schedule):
+        self._schedule = schedule
+        users = Hvi2ScheduleLoader._schedule_users
+        users[schedule] = users.get(schedule, 0) + 1
+
+    def _release_schedule(self, close=False):
+        '''
+        Releases the schedule of this loader. The schedule is closed when no other
+        loader holds it and it is not cached anymore, or when close is True.
+        A schedule that is closed is also removed from the cache.
+        '''
+        schedule = self._schedule
+        if schedule is None:
+            return
         self._schedule = None
+        users = Hvi2ScheduleLoader._schedule_users
+        n_users = users.pop(schedule) - 1
+        if n_users > 0:
+            users[schedule] = n_users
+            return
+        if close and Hvi2ScheduleLoader._is_cached(schedule):
+            del Hvi2ScheduleLoader.schedule_cache[schedule.configuration_hash]
+        if close or not Hvi2ScheduleLoader._is_cached(schedule):
+            schedule.close()
 
     def _get_script(self):
         for script_class in Hvi2ScheduleLoader.script_classes:
@@ -198,9 +304,24 @@ class Hvi2ScheduleLoader(HardwareSchedule):
         raise ValueError(f"Unknown script '{self._script_name}'")
 
     def _get_schedule(self):
-        script_conf = str(self._configuration)
-        if script_conf not in Hvi2ScheduleLoader.schedule_cache:
-            self._schedule = Hvi2Schedule(self._hardware, self._get_script())
-            Hvi2ScheduleLoader.schedule_cache[script_conf] = self._schedule
-
-        self._schedule = Hvi2ScheduleLoader.schedule_cache[script_conf]
+        fpga_images = get_fpga_image_fingerprint(self._hardware)
+        if fpga_images != Hvi2ScheduleLoader._fpga_images:
+            if Hvi2ScheduleLoader._fpga_images is not None:
+                logger.info('FPGA images changed. Invalidating compiled schedules.')
+                Hvi2ScheduleLoader._invalidate_schedules()
+            Hvi2ScheduleLoader._fpga_images = fpga_images
+
+        cache = Hvi2ScheduleLoader.schedule_cache
+        script_conf = self._configuration_hash
+        if script_conf in cache:
+            schedule_trace.event('cache_hit', self._script_name, script_conf)
+            cache.move_to_end(script_conf)
+        else:
+            schedule_trace.event('cache_miss', self._script_name, script_conf)
+            cache[script_conf] = Hvi2Schedule(self._hardware, self._get_script(), script_conf)
+
+        schedule = cache[script_conf]
+        if schedule is not self._schedule:
+            self._release_schedule()
+            self._hold_schedule(schedule)
+        Hvi2ScheduleLoader._evict_schedules()
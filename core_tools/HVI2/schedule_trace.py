@@ -0,0 +1,103 @@
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleTrace:
+    '''
+    Records the timing of the HVI2 schedule lifecycle as structured events.
+
+    Every event is a dict with the keys:
+        'event' (str): name of the phase or event, e.g. 'compile', 'load', 'cache_hit'.
+        'time' (float): epoch time of the start of the event.
+        'duration' (float): duration in seconds. 0.0 for instantaneous events.
+        'script_name' (str): name of the HVI2 script.
+        'configuration_hash' (str): hash of the schedule configuration.
+    Extra keyword arguments of the event are added to the dict.
+
+    Example:
+        from core_tools.HVI2.schedule_trace import schedule_trace
+
+        schedule_trace.add_listener(print)
+        ...
+        print(schedule_trace.summary())
+    '''
+    def __init__(self, max_events=10_000):
+        self.enabled = True
+        self._events = deque(maxlen=max_events)
+        self._listeners = []
+
+    def add_listener(self, listener):
+        '''
+        Adds a callable that is called with every new event.
+        '''
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def event(self, event, script_name, configuration_hash, duration=0.0, t_start=None, **kwargs):
+        if not self.enabled:
+            return
+        entry = {
+            'event': event,
+            'time': t_start if t_start is not None else time.time(),
+            'duration': duration,
+            'script_name': script_name,
+            'configuration_hash': configuration_hash,
+            **kwargs,
+            }
+        self._events.append(entry)
+        logger.debug(f"HVI2 {event} '{script_name}' ({configuration_hash}): {duration*1000:.1f} ms")
+        for listener in self._listeners:
+            try:
+                listener(entry)
+            except Exception:
+                logger.error('Exception in schedule trace listener', exc_info=True)
+
+    @contextmanager
+    def phase(self, event, script_name, configuration_hash, **kwargs):
+        '''
+        Context manager recording the duration of the enclosed code as event.
+        '''
+        if not self.enabled:
+            yield
+            return
+        t_start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - t0
+            self.event(event, script_name, configuration_hash,
+                       duration=duration, t_start=t_start, **kwargs)
+
+    def get_events(self, event=None):
+        '''
+        Returns a list with the recorded events.
+
+        Args:
+            event (str): if not None only return events with this name.
+        '''
+        if event is None:
+            return list(self._events)
+        return [entry for entry in self._events if entry['event'] == event]
+
+    def summary(self):
+        '''
+        Returns dict with per event name the number of events and the total duration.
+        '''
+        result = {}
+        for entry in self._events:
+            count, total = result.get(entry['event'], (0, 0.0))
+            result[entry['event']] = (count + 1, total + entry['duration'])
+        return result
+
+    def clear(self):
+        self._events.clear()
+
+
+schedule_trace = ScheduleTrace()
@@ -1,3 +1,6 @@
+import weakref
+
+
 
 class SchedulerHardware:
     '''
@@ -7,6 +10,11 @@ class SchedulerHardware:
         self.active_schedule = None
         self.awgs = []
         self.digitizers = []
+        # SD1 module handle and wave shape and queue mode per channel as configured
+        # by the schedules. Entries are removed when the awg instrument is deleted.
+        self._awg_channel_config = weakref.WeakKeyDictionary()
+        # duration [s] of the last schedule load, including the release of the previous schedule.
+        self.last_switch_duration = None
 
     def add_awg(self, awg):
         self.awgs.append(awg)
@@ -22,17 +30,60 @@ class SchedulerHardware:
         for digitizer in digitizers:
             self.add_digitizer(digitizer)
 
+    def configure_awg_channel(self, awg, channel, wave_shape, queue_mode):
+        '''
+        Sets wave shape and queue mode of the AWG channel.
+        The settings are only written when they differ from the last configured settings
+        of this awg instrument and its SD1 module handle.
+        '''
+        handle = awg.awg
+        state = self._awg_channel_config.get(awg)
+        if state is None or state[0] is not handle or not _is_open(handle):
+            # new or closed instrument, or module opened again.
+            state = (handle, {})
+            self._awg_channel_config[awg] = state
+        channels = state[1]
+        if channels.get(channel) == (wave_shape, queue_mode):
+            return
+        awg.set_channel_wave_shape(wave_shape, channel)
+        awg.awg_queue_config(channel, queue_mode)
+        channels[channel] = (wave_shape, queue_mode)
+
+    def invalidate_module_state(self):
+        '''
+        Forgets the configured module settings. The next schedule load
+        writes all settings. Call this after changing the settings outside the schedules.
+        '''
+        self._awg_channel_config = weakref.WeakKeyDictionary()
+
     def set_schedule(self, schedule):
-        self.release_schedule()
+        self.release_schedule(invalidate=False)
         self.active_schedule = schedule
 
-    def release_schedule(self):
+    def release_schedule(self, invalidate=True):
+        '''
+        Unloads the active schedule.
+        Without active schedule the AWGs can be flushed and configured by other code,
+        e.g. by pulse_lib when it plays a sequence without HVI. The configured module
+        settings are forgotten, unless invalidate is False. Use invalidate=False only
+        when the next schedule is loaded immediately.
+        '''
         if self.active_schedule is not None:
             schedule = self.active_schedule
             self.active_schedule = None
             schedule.unload()
+        if invalidate:
+            self.invalidate_module_state()
 
     def close(self):
         self.release_schedule()
 
+
+def _is_open(handle):
+    try:
+        return handle.isOpen()
+    except Exception:
+        return False
+
+
 default_scheduler_hardware = SchedulerHardware()
@@ -1,15 +1,34 @@
-
-from core_tools.startup.all import configure
-from core_tools.startup.launch_databrowser import launch_databrowser
-from core_tools.startup.launch_db_sync import launch_db_sync
-from core_tools.startup.launch_qt_databrowser import launch_qt_databrowser
-from core_tools.startup.sample_info import set_sample_info
-from core_tools.startup.gui import (
-        start_parameter_viewer,
-        start_parameter_viewer_qml,
-        start_virtual_matrix_gui,
-        start_virtual_matrix_gui_qml,
-        start_script_runner,
-        )
+import importlib
 
 __version__ = "1.5.6"
+
+# Public functions are imported on first use to keep `import core_tools` fast.
+# Importing the GUI modules loads PyQt5, pyqtgraph and qcodes.
+_lazy_imports = {
+    'configure': 'core_tools.startup.all',
+    'launch_databrowser': 'core_tools.startup.launch_databrowser',
+    'launch_db_sync': 'core_tools.startup.launch_db_sync',
+    'launch_qt_databrowser': 'core_tools.startup.launch_qt_databrowser',
+    'set_sample_info': 'core_tools.startup.sample_info',
+    'start_parameter_viewer': 'core_tools.startup.gui',
+    'start_parameter_viewer_qml': 'core_tools.startup.gui',
+    'start_virtual_matrix_gui': 'core_tools.startup.gui',
+    'start_virtual_matrix_gui_qml': 'core_tools.startup.gui',
+    'start_script_runner': 'core_tools.startup.gui',
+    }
+
+__all__ = list(_lazy_imports)
+
+
+def __getattr__(name):
+    try:
+        module_name = _lazy_imports[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
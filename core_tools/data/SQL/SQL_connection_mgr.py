@@ -4,6 +4,7 @@ from core_tools.data.SQL.queries.dataset_creation_queries import (
         measurement_overview_queries,
         measurement_parameters_queries)
 from core_tools.data.SQL.queries.dataset_sync_queries import sync_mgr_queries
+from core_tools.data.SQL.queries.snapshot_queries import snapshot_queries
 import psycopg2
 import time
 import logging
@@ -82,7 +83,10 @@ class SQL_database_manager(SQL_database_init):
 
                     measurement_overview_queries.generate_table(conn_local)
                     measurement_overview_queries.update_local_table(conn_local)
+                    measurement_overview_queries.create_search_indexes(conn_local)
+                    measurement_overview_queries.create_change_notification(conn_local)
                     measurement_parameters_queries.generate_table(conn_local)
+                    snapshot_queries.generate_table(conn_local)
                     conn_local.commit()
         return SQL_database_manager.__instance
 
@@ -99,7 +103,10 @@ class SQL_database_manager(SQL_database_init):
 
         measurement_overview_queries.generate_table(conn)
         # measurement_overview_queries.update_local_table(conn)
+        measurement_overview_queries.create_search_indexes(conn)
+        measurement_overview_queries.create_change_notification(conn)
         measurement_parameters_queries.generate_table(conn)
+        snapshot_queries.generate_table(conn)
         conn.commit()
 
 
@@ -119,10 +126,12 @@ class SQL_sync_manager(SQL_database_init):
             sample_info_queries.generate_table(SQL_sync_manager.__instance.conn_local)
             measurement_overview_queries.generate_table(SQL_sync_manager.__instance.conn_local)
             measurement_parameters_queries.generate_table(SQL_sync_manager.__instance.conn_local)
+            snapshot_queries.generate_table(SQL_sync_manager.__instance.conn_local)
 
             sample_info_queries.generate_table(SQL_sync_manager.__instance.conn_remote)
             measurement_overview_queries.generate_table(SQL_sync_manager.__instance.conn_remote)
             measurement_parameters_queries.generate_table(SQL_sync_manager.__instance.conn_remote)
+            snapshot_queries.generate_table(SQL_sync_manager.__instance.conn_remote)
             SQL_sync_manager.__instance.conn_local.commit()
             SQL_sync_manager.__instance.conn_remote.commit()
 
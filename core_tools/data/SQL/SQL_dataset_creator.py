@@ -9,6 +9,7 @@ from core_tools.data.SQL.queries.dataset_creation_queries import (
         )
 from core_tools.data.SQL.queries.dataset_loading_queries import load_ds_queries
 from core_tools.data.SQL.queries.dataset_sync_queries import sync_mgr_queries
+from core_tools.data.SQL.queries.snapshot_queries import snapshot_queries
 
 
 class SQL_dataset_creator(object):
@@ -29,12 +30,16 @@ class SQL_dataset_creator(object):
                     self.conn, ds.exp_name, ds.UNIX_start_time)
             ds.running = True
 
+            # the JSON column is read by older versions of core_tools.
+            write_json = ds.snapshot is not None and snapshot_queries.write_json_column
             measurement_overview_queries.update_measurement(
                     self.conn, ds.exp_uuid,
                     metadata=ds.metadata,
-                    snapshot=ds.snapshot,
+                    snapshot=ds.snapshot if write_json else None,
                     keywords=ds.generate_keywords(),
                     table_synchronized=False)
+            if ds.snapshot is not None:
+                snapshot_queries.store(self.conn, ds.exp_uuid, ds.snapshot)
 
             # store of the getters/setters parameters
             measurement_parameters_queries.insert_measurement_params(self.conn, ds.exp_uuid,
@@ -67,6 +72,18 @@ class SQL_dataset_creator(object):
                                                         data_update_count=update_count)
         self.conn.commit()
 
+    def update_metadata(self, ds):
+        '''
+        store the metadata of the measurement.
+
+        Args:
+            ds (dataset_raw)
+        '''
+        measurement_overview_queries.update_measurement(self.conn, ds.exp_uuid,
+                                                        metadata=ds.metadata,
+                                                        table_synchronized=False)
+        self.conn.commit()
+
     def is_completed(self, exp_uuid):
         '''
         checks if the current measurement is still running
@@ -126,15 +143,17 @@ class SQL_dataset_creator(object):
             sync2local (bool): sync measurement to local database
         '''
         sync = False
+        remote = False
         if load_ds_queries.check_uuid(self.conn, exp_uuid):
             conn = self.conn
         elif load_ds_queries.check_uuid(SQL_database_manager().conn_remote, exp_uuid):
             conn = SQL_database_manager().conn_remote
+            remote = True
             sync = sync2local
         else:
             raise ValueError(f"the uuid {exp_uuid}, does not exist in the local/remote database.")
 
-        ds_raw = load_ds_queries.get_dataset_raw(conn, exp_uuid)
+        ds_raw = load_ds_queries.get_dataset_raw(conn, exp_uuid, remote=remote)
         if sync:
             conn_mgr = SQL_database_manager()
             sample_info_list = sync_mgr_queries.get_sample_info_list(conn_mgr.conn_local)
@@ -1,5 +1,17 @@
+import itertools
+import operator
+
 import numpy as np
 
+# Data is transferred to and from the large objects in blocks of BLOCK_SIZE values
+# to avoid a temporary copy of the complete array.
+BLOCK_SIZE = 1 << 20
+# Estimated cost of a read from a large object expressed in bytes.
+# Used to choose between reading more data or doing more reads.
+READ_OVERHEAD = 1 << 16
+# Buffers of MAX_LOAD_SIZE values or more are not loaded completely.
+MAX_LOAD_SIZE = 1 << 27
+
 
 class buffer_reference:
     '''
@@ -7,12 +19,26 @@ class buffer_reference:
     '''
     def __init__(self, data):
         self.buffer = data
+        self.shape = data.shape
         self.buffer_lambda = buffer_reference.__empty_lambda
 
     @property
     def data(self):
         return self.buffer_lambda(self.buffer)
 
+    @property
+    def lazy(self):
+        '''
+        True if the data has not been loaded.
+        '''
+        return False
+
+    def view(self):
+        '''
+        Returns a lazy view on the data. See buffer_view.
+        '''
+        return buffer_view(self)
+
     @staticmethod
     def __empty_lambda(data):
         return data
@@ -40,6 +66,7 @@ class buffer_writer(buffer_reference):
     def __init__(self, SQL_conn, input_buffer):
         self.conn = SQL_conn
         self.buffer = input_buffer.ravel()
+        self.shape = input_buffer.shape
         self.buffer_lambda = buffer_reference.reshaper(input_buffer.shape)
 
         self.lobject = self.conn.lobject(0,'w')
@@ -59,9 +86,10 @@ class buffer_writer(buffer_reference):
 
     def sync(self):
         try:
-            if self.cursor - self.cursor_db != 0:
-                self.lobject.write((self.buffer[self.cursor_db:self.cursor]).tobytes())
-                self.cursor_db += self.cursor - self.cursor_db
+            while self.cursor - self.cursor_db != 0:
+                end = min(self.cursor, self.cursor_db + BLOCK_SIZE)
+                self.lobject.write((self.buffer[self.cursor_db:end]).tobytes())
+                self.cursor_db = end
         except:
             # NOTE: After a commit the lobject is not valid anymore and must be created again.
             #       The overhead for this is very small.
@@ -74,27 +102,242 @@ class buffer_writer(buffer_reference):
 
 
 class buffer_reader(buffer_reference):
+    '''
+    Reads the data from a large object.
+    The data is loaded on first access of buffer or data. A buffer_view
+    of data that is not loaded only reads the selected part.
+    '''
     def __init__(self, SQL_conn, oid, shape):
         self.conn = SQL_conn
-        self.buffer = np.full(shape, np.nan).ravel()
+        self.shape = tuple(shape)
+        self.size = int(np.prod(shape))
         self.buffer_lambda = buffer_reference.reshaper(shape)
         self.oid = oid
+        # number of bytes read from the database
+        self.bytes_read = 0
+        self._buffer = None
 
         self.lobject = self.conn.lobject(oid,'rb')
         self.cursor = 0
         self.sync()
 
+    @property
+    def lazy(self):
+        return self._buffer is None
+
+    @property
+    def buffer(self):
+        if self._buffer is None:
+            if self.size >= MAX_LOAD_SIZE:
+                raise Exception(f"Data too big to load. Shape {self.shape} >= 1 GB. "
+                                "Use slicing or averaging to load a part of the data.")
+            self._buffer = np.full(self.size, np.nan)
+            self._read(0)
+        return self._buffer
+
     def sync(self):
         '''
         update the buffer (for datasets that are still being written)
         '''
+        if self._buffer is None:
+            # only update the number of values written.
+            self.lobject = self.conn.lobject(self.oid, 'rb')
+            self.cursor = min(self.lobject.seek(0, 2) // 8, self.size)
+        else:
+            self._read(self.cursor)
+
+    def _read(self, cursor):
+        # NOTE: After a commit the lobject is not valid anymore and must be opened again.
         self.lobject = self.conn.lobject(self.oid, 'rb')
-        self.lobject.seek(self.cursor*8)
-        binary_data = self.lobject.read()
-        data = np.frombuffer(binary_data)
+        self.lobject.seek(cursor*8)
+        while cursor < self.size:
+            n = min(BLOCK_SIZE, self.size - cursor)
+            binary_data = self.lobject.read(n*8)
+            self.bytes_read += len(binary_data)
+            data = np.frombuffer(binary_data)
 
-        self.buffer[self.cursor:self.cursor+data.size] = data
-        self.cursor = self.cursor+data.size
+            self._buffer[cursor:cursor+data.size] = data
+            cursor += data.size
+            if data.size < n:
+                break
+        self.cursor = cursor
+
+    def read_range(self, start, n):
+        '''
+        Returns n values starting at start. Values that have not been written are NaN.
+        '''
+        if self._buffer is not None:
+            return self._buffer[start:start+n]
+        result = np.full(n, np.nan)
+        n_written = max(0, min(n, self.cursor - start))
+        if n_written > 0:
+            try:
+                self.lobject.seek(start*8)
+            except Exception:
+                # NOTE: After a commit the lobject is not valid anymore and must be opened again.
+                self.lobject = self.conn.lobject(self.oid, 'rb')
+                self.lobject.seek(start*8)
+            binary_data = self.lobject.read(n_written*8)
+            self.bytes_read += len(binary_data)
+            data = np.frombuffer(binary_data)
+            result[:data.size] = data
+        return result
 
     def close(self):
         self.lobject.close()
+
+
+class buffer_view(buffer_reference):
+    '''
+    Lazy view on the data of a buffer with indexing and averaging.
+
+    The operations are combined into a selection of indices per axis of the
+    buffer followed by averages over axes of the buffer. The result is only
+    computed when the data is accessed.
+    If the source is a buffer_reader that has not been loaded, then only the
+    selected part is read in chunks of at most BLOCK_SIZE values and averages
+    are accumulated per chunk. Otherwise the selection is applied as numpy
+    view on the data in memory.
+
+    Args:
+        source (buffer_reference): buffer with the data.
+        selection (tuple[range]): selected indices per axis of source.
+        axes (list[int]): axes of source that are axes of the view.
+        averages (tuple[int]): averaged axes of source.
+
+    Note:
+        Axes of source that are not in axes and not in averages are indexed with an integer.
+    '''
+    def __init__(self, source, selection=None, axes=None, averages=()):
+        self.source = source
+        self.selection = selection if selection is not None else tuple(range(n) for n in source.shape)
+        self.axes = axes if axes is not None else list(range(len(source.shape)))
+        self.averages = tuple(averages)
+        self.shape = tuple(len(self.selection[axis]) for axis in self.axes)
+
+    def view(self):
+        return self
+
+    def index(self, args):
+        '''
+        Returns a view with data[args]. args can contain integers and slices.
+        '''
+        if not isinstance(args, (tuple, list)):
+            args = (args,)
+        if len(args) > len(self.axes):
+            raise IndexError(f'too many indices for view with {len(self.axes)} dimensions')
+        selection = list(self.selection)
+        axes = []
+        for i, axis in enumerate(self.axes):
+            if i >= len(args):
+                axes.append(axis)
+                continue
+            arg = args[i]
+            if isinstance(arg, slice):
+                selection[axis] = selection[axis][arg]
+                axes.append(axis)
+            else:
+                try:
+                    value = selection[axis][operator.index(arg)]
+                except TypeError:
+                    raise TypeError(f'Only integers and slices are supported. Got {arg}') from None
+                selection[axis] = range(value, value+1)
+        return buffer_view(self.source, tuple(selection), axes, self.averages)
+
+    def average(self, axis):
+        '''
+        Returns a view with data averaged along axis.
+        '''
+        axes = list(self.axes)
+        source_axis = axes.pop(axis)
+        return buffer_view(self.source, self.selection, axes, self.averages + (source_axis,))
+
+    @property
+    def data(self):
+        if 0 in self.shape:
+            # nothing selected. Averages of empty selections cannot be computed.
+            return np.empty(self.shape)
+        if self.source.lazy and len(self.source.shape) > 0 and min(self.source.shape) > 0:
+            return self._read_chunked()
+        return self._compute(self.source.data)
+
+    def _compute(self, data):
+        index = tuple(
+            _range_to_slice(r) if axis in self.axes or axis in self.averages else r.start
+            for axis, r in enumerate(self.selection))
+        data = data[index]
+        remaining = [axis for axis in range(len(self.selection))
+                     if axis in self.axes or axis in self.averages]
+        for axis in self.averages:
+            i = remaining.index(axis)
+            data = np.average(data, axis=i)
+            remaining.pop(i)
+        return data
+
+    def _read_chunked(self):
+        shape = self.source.shape
+        ndim = len(shape)
+        selection = self.selection
+        averaged = set(self.averages)
+        if any(len(r) == 0 for r in selection):
+            return self._compute(np.full(shape, np.nan))
+
+        acc = np.zeros([1 if axis in averaged else len(r) for axis, r in enumerate(selection)])
+        split_axis, rows_per_read, chunk_starts = self._get_read_plan()
+        inner_shape = shape[split_axis+1:]
+        inner_size = int(np.prod(inner_shape))
+        strides = [int(np.prod(shape[axis+1:])) for axis in range(ndim)]
+        rows = np.array(selection[split_axis])
+        inner_index = (slice(None),) + tuple(_range_to_slice(r) for r in selection[split_axis+1:])
+        reduce_axes = tuple(axis - split_axis for axis in range(split_axis, ndim) if axis in averaged)
+        row_end = max(selection[split_axis]) + 1
+
+        outer = [enumerate(selection[axis]) for axis in range(split_axis)]
+        for combination in itertools.product(*outer):
+            offset = sum(value * strides[axis] for axis, (_, value) in enumerate(combination))
+            acc_outer = acc[tuple(0 if axis in averaged else i for axis, (i, _) in enumerate(combination))]
+            for start in chunk_starts:
+                stop = min(start + rows_per_read, row_end)
+                block = self.source.read_range(offset + start*inner_size, (stop-start)*inner_size)
+                block = block.reshape((stop-start,) + inner_shape)
+                positions = np.nonzero((rows >= start) & (rows < stop))[0]
+                block = block[rows[positions] - start][inner_index]
+                if reduce_axes:
+                    block = block.sum(axis=reduce_axes, keepdims=True)
+                if split_axis in averaged:
+                    acc_outer[0:1] += block
+                else:
+                    acc_outer[positions] += block
+
+        if averaged:
+            acc /= np.prod([len(selection[axis]) for axis in averaged])
+        return acc.reshape(self.shape)
+
+    def _get_read_plan(self):
+        '''
+        Returns the axis to split the reads, the number of rows per read and
+        the first rows of the reads. The axis is selected for the lowest
+        estimated cost with at most BLOCK_SIZE values per read.
+        '''
+        shape = self.source.shape
+        best = None
+        n_combinations = 1
+        for axis in range(len(shape)):
+            inner_size = int(np.prod(shape[axis+1:]))
+            if inner_size <= BLOCK_SIZE:
+                rows = self.selection[axis]
+                rows_per_read = max(1, BLOCK_SIZE // inner_size)
+                first_row = min(rows)
+                chunk_starts = sorted({first_row + (row - first_row) // rows_per_read * rows_per_read
+                                       for row in rows})
+                row_end = max(rows) + 1
+                n_rows = sum(min(start + rows_per_read, row_end) - start for start in chunk_starts)
+                cost = n_combinations * (len(chunk_starts) * READ_OVERHEAD + n_rows * inner_size * 8)
+                if best is None or cost < best[0]:
+                    best = (cost, axis, rows_per_read, chunk_starts)
+            n_combinations *= len(self.selection[axis])
+        return best[1:]
+
+
+def _range_to_slice(r):
+    return slice(r.start, r.stop if r.stop >= 0 else None, r.step)
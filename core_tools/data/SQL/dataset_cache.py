@@ -0,0 +1,248 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid as uuid_lib
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+import numpy as np
+
+from core_tools.data.SQL.buffer_writer import buffer_reference
+
+logger = logging.getLogger(__name__)
+
+
+class cached_buffer(buffer_reference):
+    '''
+    Buffer of a completed dataset memory mapped copy-on-write from the dataset cache.
+    '''
+    def __init__(self, data, shape, cursor):
+        self.buffer = data
+        self.shape = tuple(shape)
+        self.buffer_lambda = buffer_reference.reshaper(shape)
+        self.cursor = cursor
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class dataset_cache:
+    '''
+    On-disk cache with the data of completed datasets.
+
+    Every dataset is stored in a directory named after the uuid with a file
+    'params.json' describing the parameters and a file with raw little-endian
+    float64 values per parameter. The files are memory mapped copy-on-write on load.
+    When the total size exceeds max_size the least recently used datasets are removed.
+
+    The cache can be shared by multiple processes. Entries are written to a
+    temporary directory per call and moved in place. Changes of the cache
+    are serialized with a lock file and the index is read from disk.
+
+    The metadata of the dataset, i.e. name, starred, keywords, snapshot, is always
+    read from the database. Only the data buffers are cached.
+    '''
+    location = None
+    max_size = 0
+    # temporary directories older than this are left by a crashed process.
+    tmp_max_age = 3600.0  # [s]
+    _lock = threading.Lock()
+
+    @staticmethod
+    def configure(location, max_size_gb=10.0):
+        '''
+        Enables the cache.
+
+        Args:
+            location (str): directory for the cache. If None the cache is disabled.
+            max_size_gb (float): maximum size of the cache in GB.
+        '''
+        with dataset_cache._lock:
+            if location is not None:
+                location = os.path.expanduser(location)
+                os.makedirs(location, exist_ok=True)
+            dataset_cache.location = location
+            dataset_cache.max_size = int(max_size_gb * 1e9)
+
+    @staticmethod
+    def enabled():
+        return dataset_cache.location is not None
+
+    @staticmethod
+    def _dir(uuid):
+        return os.path.join(dataset_cache.location, str(uuid))
+
+    @staticmethod
+    @contextmanager
+    def _locked():
+        # lock for the threads of this process and for other processes.
+        with dataset_cache._lock:
+            with open(os.path.join(dataset_cache.location, '.lock'), 'a+b') as fp:
+                if os.name == 'nt':
+                    fp.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            # LK_LOCK gives up after 10 s.
+                            pass
+                else:
+                    fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if os.name == 'nt':
+                        fp.seek(0)
+                        msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+                    else:
+                        fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _scan():
+        '''
+        Returns the size of the cached datasets ordered from least to most recently used.
+        Removes old temporary directories.
+        '''
+        entries = []
+        now = time.time()
+        for entry in os.scandir(dataset_cache.location):
+            if not entry.is_dir():
+                continue
+            if entry.name.endswith('.tmp'):
+                if now - entry.stat().st_mtime > dataset_cache.tmp_max_age:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                continue
+            params_file = os.path.join(entry.path, 'params.json')
+            try:
+                size = sum(file.stat().st_size for file in os.scandir(entry.path))
+                entries.append((os.path.getmtime(params_file), entry.name, size))
+            except OSError:
+                # incomplete or removed by another process
+                continue
+        entries.sort()
+        return OrderedDict((name, size) for _, name, size in entries)
+
+    @staticmethod
+    def _remove(name):
+        try:
+            shutil.rmtree(os.path.join(dataset_cache.location, name))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # file can still be mapped by a loaded dataset (Windows)
+            logger.info(f'Could not remove {name} from dataset cache', exc_info=True)
+
+    @staticmethod
+    def _evict():
+        entries = dataset_cache._scan()
+        total_size = sum(entries.values())
+        while total_size > dataset_cache.max_size and len(entries) > 1:
+            name, size = entries.popitem(last=False)
+            dataset_cache._remove(name)
+            total_size -= size
+
+    @staticmethod
+    def _describe(m_params_raw):
+        return [
+            {'oid': m_param.oid, 'shape': [int(n) for n in m_param.shape]}
+            for m_param in m_params_raw
+            ]
+
+    @staticmethod
+    def load(uuid, m_params_raw):
+        '''
+        Sets the data_buffer of m_params_raw with memory mapped cached data.
+        Returns False if the dataset is not in the cache.
+        '''
+        if not dataset_cache.enabled():
+            return False
+        name = str(uuid)
+        path = dataset_cache._dir(uuid)
+        params_file = os.path.join(path, 'params.json')
+        if not os.path.exists(params_file):
+            return False
+        with dataset_cache._locked():
+            try:
+                with open(params_file) as fp:
+                    params = json.load(fp)
+                if params['params'] != dataset_cache._describe(m_params_raw):
+                    logger.info(f'Dataset cache entry {uuid} outdated')
+                    dataset_cache._remove(name)
+                    return False
+                buffers = []
+                for i, (m_param, cursor) in enumerate(zip(m_params_raw, params['cursors'])):
+                    size = int(np.prod(m_param.shape))
+                    fname = os.path.join(path, f'{i}.bin')
+                    if size == 0:
+                        data = np.zeros(0, dtype='<f8')
+                    else:
+                        data = np.memmap(fname, dtype='<f8', mode='c', shape=(size,))
+                    buffers.append(cached_buffer(data, m_param.shape, cursor))
+                # the modification time of params.json is the last use.
+                os.utime(params_file)
+            except FileNotFoundError:
+                # removed by another process
+                return False
+            except Exception:
+                logger.warning(f'Failed to load {uuid} from dataset cache', exc_info=True)
+                dataset_cache._remove(name)
+                return False
+
+        for m_param, buffer in zip(m_params_raw, buffers):
+            m_param.data_buffer = buffer
+        return True
+
+    @staticmethod
+    def store(uuid, m_params_raw):
+        '''
+        Stores the data buffers of m_params_raw in the cache.
+        '''
+        if not dataset_cache.enabled():
+            return
+        name = str(uuid)
+        path = dataset_cache._dir(uuid)
+        # unique name: other threads and processes can store the same dataset.
+        tmp_path = f'{path}.{os.getpid()}.{uuid_lib.uuid4().hex[:8]}.tmp'
+        try:
+            os.makedirs(tmp_path)
+            for i, m_param in enumerate(m_params_raw):
+                fname = os.path.join(tmp_path, f'{i}.bin')
+                m_param.data_buffer.buffer.astype('<f8', copy=False).tofile(fname)
+            params = {
+                'uuid': uuid,
+                'params': dataset_cache._describe(m_params_raw),
+                'cursors': [int(m_param.data_buffer.cursor) for m_param in m_params_raw],
+                }
+            # write params.json last. It marks a complete entry.
+            with open(os.path.join(tmp_path, 'params.json'), 'w') as fp:
+                json.dump(params, fp)
+            with dataset_cache._locked():
+                dataset_cache._remove(name)
+                os.replace(tmp_path, path)
+                dataset_cache._evict()
+        except Exception:
+            logger.warning(f'Failed to store {uuid} in dataset cache', exc_info=True)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @staticmethod
+    def clear():
+        '''
+        Removes all datasets from the cache.
+        '''
+        if not dataset_cache.enabled():
+            return
+        with dataset_cache._locked():
+            for name in dataset_cache._scan():
+                dataset_cache._remove(name)
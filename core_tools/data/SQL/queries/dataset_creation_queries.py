@@ -5,6 +5,26 @@ from core_tools.data.SQL.SQL_utility import generate_uuid
 from core_tools.data.SQL.connect import SQL_conn_info_local, sample_info
 
 import psycopg2, json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _execute_optional(conn, statement, log_level=logging.WARNING):
+    '''
+    Executes statement and commits. Logs a message with log_level when it fails,
+    for example due to insufficient privileges, and leaves the connection usable.
+    '''
+    try:
+        cursor = conn.cursor()
+        cursor.execute(statement)
+        cursor.close()
+        conn.commit()
+        return True
+    except psycopg2.Error as ex:
+        conn.rollback()
+        logger.log(log_level, f"Failed to execute '{statement}': {ex}")
+        return False
 
 
 def is_valid_info(arg):
@@ -48,6 +68,8 @@ class measurement_overview_queries:
     The raw data is saved in table measurement_parameters (Old version: data_table_queries)
     '''
     table_name="global_measurement_overview"
+    change_channel = "measurement_change"
+    change_trigger = "measurement_change_trigger"
 
     @staticmethod
     def generate_table(conn):
@@ -90,6 +112,74 @@ class measurement_overview_queries:
         execute_statement(conn, statement)
         conn.commit()
 
+    @staticmethod
+    def create_search_indexes(conn):
+        '''
+        Creates the indexes used by the data browser queries:
+        keyset pagination on (start_time, id), the dates with measurements,
+        keyword search and (if extension pg_trgm is available) name search.
+        Only the missing indexes are created. Creating the indexes can take
+        some time on a large table.
+        '''
+        table_name = measurement_overview_queries.table_name
+        res = execute_query(conn, "SELECT indexname FROM pg_indexes WHERE tablename = %s;",
+                            placeholders=[table_name])
+        existing = {row[0] for row in res}
+        res = execute_query(conn, "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm';")
+        conn.commit()
+        has_pg_trgm = len(res) > 0
+
+        indexes = {
+            'start_time_id_index': f"CREATE INDEX IF NOT EXISTS start_time_id_index ON {table_name} USING BTREE (start_time, id);",
+            'start_date_index': f"CREATE INDEX IF NOT EXISTS start_date_index ON {table_name} USING BTREE (date(start_time));",
+            'keywords_index': f"CREATE INDEX IF NOT EXISTS keywords_index ON {table_name} USING GIN (keywords);",
+            }
+        for name, statement in indexes.items():
+            if name not in existing:
+                _execute_optional(conn, statement)
+
+        if 'exp_name_trgm_index' not in existing:
+            if not has_pg_trgm:
+                # The extension is optional. It is often not available or requires
+                # privileges that the user does not have. Don't warn at every start-up.
+                has_pg_trgm = _execute_optional(conn, "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+                                                log_level=logging.DEBUG)
+            if has_pg_trgm:
+                _execute_optional(conn, f"CREATE INDEX IF NOT EXISTS exp_name_trgm_index "
+                                  f"ON {table_name} USING GIN (exp_name gin_trgm_ops);")
+
+    @staticmethod
+    def create_change_notification(conn):
+        '''
+        Creates a trigger that sends a notification on channel `change_channel`
+        when a measurement is added, renamed, starred, gets keywords or completes.
+        The payload is a JSON object with 'op', 'id', 'project', 'set_up' and 'sample'.
+        A trigger created by an older version, without completed and stop_time, is replaced.
+        '''
+        table_name = measurement_overview_queries.table_name
+        trigger_name = measurement_overview_queries.change_trigger
+        res = execute_query(conn, "SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgname = %s;",
+                            placeholders=[trigger_name])
+        conn.commit()
+        if len(res) > 0 and 'stop_time' in res[0][0]:
+            return
+
+        statement = f"""
+            CREATE OR REPLACE FUNCTION notify_measurement_change() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{measurement_overview_queries.change_channel}', json_build_object(
+                    'op', TG_OP, 'id', NEW.id,
+                    'project', NEW.project, 'set_up', NEW.set_up, 'sample', NEW.sample)::text);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+            DROP TRIGGER IF EXISTS {trigger_name} ON {table_name};
+            CREATE TRIGGER {trigger_name}
+                AFTER INSERT OR UPDATE OF exp_name, starred, keywords, completed, stop_time ON {table_name}
+                FOR EACH ROW EXECUTE PROCEDURE notify_measurement_change();
+            """
+        _execute_optional(conn, statement)
+
     @staticmethod
     def update_local_table(conn):
         # Only do this on local database.
@@ -1,8 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import datetime
+import json
+import logging
+import threading
+import time
+
+import psycopg2
 
 from core_tools.data.SQL.SQL_common_commands import update_table
 from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
+from core_tools.data.SQL.connect import SQL_conn_info_local, SQL_conn_info_remote
+from core_tools.data.SQL.queries.dataset_creation_queries import measurement_overview_queries
+
+logger = logging.getLogger(__name__)
 
 
 class alter_dataset:
@@ -24,7 +35,103 @@ class alter_dataset:
         conn.commit()
 
 
+class sample_catalogue:
+    '''
+    In memory cache of the (project, set_up, sample) entries in the sample_info_overview
+    tables of the local and the remote database.
+    The tables are queried in parallel. When the cache is older than `ttl` the
+    cached entries are returned while the cache is refreshed in a background thread.
+    The queries use dedicated read-only connections. They do not interfere with
+    the transactions of the GUI and the measurements on the shared connections.
+    '''
+    ttl = 600.0
+    _entries = None
+    _load_time = 0.0
+    _refreshing = False
+    _lock = threading.Lock()
+    _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sample_catalogue')
+
+    @staticmethod
+    def _query(conn_info):
+        conn = psycopg2.connect(dbname=conn_info.dbname, user=conn_info.user,
+            password=conn_info.passwd, host=conn_info.host, port=conn_info.port,
+            gssencmode="disable")
+        try:
+            conn.set_session(readonly=True, autocommit=True)
+            cur = conn.cursor()
+            cur.execute("SELECT project, set_up, sample FROM sample_info_overview;")
+            res = cur.fetchall()
+            cur.close()
+            return res
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _load():
+        futures = [
+            sample_catalogue._executor.submit(sample_catalogue._query, conn_info)
+            for conn_info in (SQL_conn_info_local, SQL_conn_info_remote)
+            ]
+        entries = set()
+        for future in futures:
+            entries.update(future.result())
+        with sample_catalogue._lock:
+            sample_catalogue._entries = entries
+            sample_catalogue._load_time = time.monotonic()
+
+    @staticmethod
+    def _refresh_in_background():
+        try:
+            sample_catalogue._load()
+        except Exception:
+            logger.error('Failed to refresh sample catalogue', exc_info=True)
+        finally:
+            sample_catalogue._refreshing = False
+
+    @staticmethod
+    def refresh(wait=True):
+        '''
+        Reloads the catalogue from the databases.
+
+        Args:
+            wait (bool): if False the catalogue is reloaded in a background thread.
+        '''
+        if wait:
+            sample_catalogue._load()
+        elif not sample_catalogue._refreshing:
+            sample_catalogue._refreshing = True
+            threading.Thread(target=sample_catalogue._refresh_in_background, daemon=True).start()
+
+    @staticmethod
+    def get_entries():
+        '''
+        Returns set with all (project, set_up, sample) entries.
+        '''
+        if sample_catalogue._entries is None:
+            sample_catalogue.refresh()
+        elif time.monotonic() - sample_catalogue._load_time > sample_catalogue.ttl:
+            sample_catalogue.refresh(wait=False)
+        with sample_catalogue._lock:
+            return set(sample_catalogue._entries)
+
+    @staticmethod
+    def add(project, set_up, sample):
+        '''
+        Adds an entry, e.g. after a change notification.
+        Returns True if the entry was not yet in the catalogue.
+        '''
+        with sample_catalogue._lock:
+            if sample_catalogue._entries is None:
+                return False
+            entry = (project, set_up, sample)
+            if entry in sample_catalogue._entries:
+                return False
+            sample_catalogue._entries.add(entry)
+            return True
+
+
 class query_for_samples():
+    _columns = ('project', 'set_up', 'sample')
 
     @staticmethod
     def get_projects(set_up=None, sample=None):
@@ -43,33 +150,18 @@ class query_for_samples():
 
     @staticmethod
     def __get_x_given_yz(to_get, condition_x, condition_y):
-
-        statement = "SELECT DISTINCT {} from sample_info_overview ".format(to_get)
-
-        if condition_x[1] is not None and condition_y[1] is not None:
-            statement += "WHERE {} = '{}' and {} = '{}';".format(*condition_x, *condition_y)
-        elif condition_x[1] is not None:
-            statement += "WHERE {} = '{}' ;".format(*condition_x)
-        elif condition_y[1] is not None:
-            statement += "WHERE {} = '{}' ;".format(*condition_y)
-        else:
-            statement += ";"
-
-        con = SQL_database_manager().conn_local
-        cur = con.cursor()
-        cur.execute(statement)
-        res = cur.fetchall()
-        result = set(sum(res, ()))
-        cur.close()
-        con.commit()
-
-        con = SQL_database_manager().conn_remote
-        cur = con.cursor()
-        cur.execute(statement)
-        res = cur.fetchall()
-        result |= set(sum(res, ()))
-        cur.close()
-        con.commit()
+        columns = query_for_samples._columns
+        conditions = [
+            (columns.index(name), value)
+            for name, value in (condition_x, condition_y)
+            if value is not None
+            ]
+        i_get = columns.index(to_get)
+
+        result = set()
+        for entry in sample_catalogue.get_entries():
+            if all(entry[i] == value for i, value in conditions):
+                result.add(entry[i_get])
         return sorted(list(result))
 
 
@@ -87,52 +179,90 @@ class measurement_results:
 
 
 class query_for_measurement_results:
+    _columns = "id, uuid, exp_name, start_time, project, set_up, sample, starred, keywords"
+
     @staticmethod
-    def get_results_for_date(date, sample, set_up, project, remote=False,
-                             name=None, keywords=None, starred=False):
-        if date is None:
-            return []
-        statement = '''
-            SELECT id, uuid, exp_name, start_time, project, set_up, sample, starred, keywords
-            FROM global_measurement_overview
-            '''
-        statement += "WHERE start_time >= '{}' and start_time < '{} '".format(date, date+datetime.timedelta(1))
+    def _add_filters(conditions, params, sample=None, set_up=None, project=None,
+                     name=None, keywords=None, starred=False):
         if sample is not None:
-            statement += " and sample =  '{}' ".format(sample)
+            conditions.append("sample = %s")
+            params.append(sample)
         if set_up is not None:
-            statement += " and set_up = '{}' ".format(set_up)
+            conditions.append("set_up = %s")
+            params.append(set_up)
         if project is not None:
-            statement += " and project = '{}' ".format(project)
+            conditions.append("project = %s")
+            params.append(project)
         if name:
-            statement += f" and exp_name like '%{name}%' "
+            conditions.append("exp_name like %s")
+            params.append(f'%{name}%')
         if keywords:
-            statement += f" and keywords ?& array{keywords} "
+            conditions.append("keywords ?& %s")
+            params.append(list(keywords))
         if starred:
-            statement += f" and starred = {starred} "
-        statement += " order by uuid;"
-        res = query_for_measurement_results._execute(statement, remote)
+            conditions.append("starred = %s")
+            params.append(bool(starred))
+
+    @staticmethod
+    def _where(conditions):
+        if len(conditions) == 0:
+            return ""
+        return " WHERE " + " AND ".join(conditions)
+
+    @staticmethod
+    def _add_paging(statement, conditions, params, limit, after):
+        '''
+        Adds keyset pagination on (start_time, id) to the statement.
+        Without limit the results are ordered by uuid.
+        '''
+        if limit is None:
+            return statement + query_for_measurement_results._where(conditions) + " ORDER BY uuid;"
+        if after is not None:
+            conditions.append("(start_time, id) > (%s, %s)")
+            params.extend(after)
+        statement += query_for_measurement_results._where(conditions)
+        statement += " ORDER BY start_time, id LIMIT %s;"
+        params.append(int(limit))
+        return statement
+
+    @staticmethod
+    def page_key(result):
+        '''
+        Returns the key to retrieve the page after the measurement_results item.
+        '''
+        return (result.start_time, result.my_id)
+
+    @staticmethod
+    def get_results_for_date(date, sample, set_up, project, remote=False,
+                             name=None, keywords=None, starred=False,
+                             limit=None, after=None):
+        '''
+        Returns the measurements started on date.
+        If limit is not None at most limit results are returned, ordered by start time.
+        The next page is retrieved with `after=page_key(results[-1])`.
+        '''
+        if date is None:
+            return []
+        statement = f"SELECT {query_for_measurement_results._columns} FROM global_measurement_overview"
+        conditions = ["start_time >= %s", "start_time < %s"]
+        params = [date, date+datetime.timedelta(1)]
+        query_for_measurement_results._add_filters(
+                conditions, params, sample, set_up, project, name, keywords, starred)
+        statement = query_for_measurement_results._add_paging(statement, conditions, params, limit, after)
+        res = query_for_measurement_results._execute(statement, remote, params)
         return query_for_measurement_results._to_measurement_results(res)
 
     @staticmethod
     def get_all_dates_with_meaurements(project, set_up, sample, remote=False,
                                        name=None, keywords=None, starred=False):
-        statement = "SELECT DISTINCT date(start_time) FROM global_measurement_overview "
-        statement += "where 1=1 "
-        if sample is not None:
-            statement += f" and sample =  '{sample}' "
-        if set_up is not None:
-            statement += f" and set_up = '{set_up}' "
-        if project is not None:
-            statement += f" and project = '{project}' "
-        if name:
-            statement += f" and exp_name like '%{name}%' "
-        if keywords:
-            statement += f" and keywords ?& array{keywords} "
-        if starred:
-            statement += f" and starred = {starred} "
-        statement += ';'
+        statement = "SELECT DISTINCT date(start_time) FROM global_measurement_overview"
+        conditions = []
+        params = []
+        query_for_measurement_results._add_filters(
+                conditions, params, sample, set_up, project, name, keywords, starred)
+        statement += query_for_measurement_results._where(conditions) + ";"
 
-        res = query_for_measurement_results._execute(statement, remote)
+        res = query_for_measurement_results._execute(statement, remote, params)
 
         res = list(sum(res, ()))
         res.sort(reverse=True)
@@ -153,36 +283,38 @@ class query_for_measurement_results:
             starred=False,
             keywords=None,
             remote=False,
+            limit=None,
+            after=None,
             ):
-        statement = "SELECT id, uuid, exp_name, start_time, project, set_up, sample, starred, keywords "\
-                    "FROM global_measurement_overview "
-        statement += "WHERE 1=1 "
+        '''
+        Returns the measurements matching all specified arguments.
+        If limit is not None at most limit results are returned, ordered by start time.
+        The next page is retrieved with `after=page_key(results[-1])`.
+        '''
+        statement = f"SELECT {query_for_measurement_results._columns} FROM global_measurement_overview"
+        conditions = []
+        params = []
 
         if exp_id is not None:
-            statement += f" and id = '{exp_id}' "
+            conditions.append("id = %s")
+            params.append(exp_id)
         if uuid is not None:
-            statement += f" and uuid = '{uuid}' "
+            conditions.append("uuid = %s")
+            params.append(uuid)
         if date is not None:
-            statement += f" and date(start_time) = '{date}' "
+            conditions.append("date(start_time) = %s")
+            params.append(date)
         if start_time is not None:
-            statement += f" and start_time >= '{start_time}' "
+            conditions.append("start_time >= %s")
+            params.append(start_time)
         if end_time is not None:
-            statement += f" and start_time < '{end_time}' "
-        if sample is not None:
-            statement += f" and sample =  '{sample}' "
-        if set_up is not None:
-            statement += f" and set_up = '{set_up}' "
-        if project is not None:
-            statement += f" and project = '{project}' "
-        if name:
-            statement += f" and exp_name like '%{name}%' "
-        if keywords:
-            statement += f" and keywords ?& array{keywords} "
-        if starred:
-            statement += f" and starred = {starred} "
-        statement += " order by uuid;"
+            conditions.append("start_time < %s")
+            params.append(end_time)
+        query_for_measurement_results._add_filters(
+                conditions, params, sample, set_up, project, name, keywords, starred)
+        statement = query_for_measurement_results._add_paging(statement, conditions, params, limit, after)
 
-        res = query_for_measurement_results._execute(statement, remote)
+        res = query_for_measurement_results._execute(statement, remote, params)
 
         return query_for_measurement_results._to_measurement_results(res)
 
@@ -190,20 +322,16 @@ class query_for_measurement_results:
     def detect_new_meaurements(max_measurement_id=None, remote=False,
                                project=None, set_up=None, sample=None):
         statement = "SELECT max(id) from global_measurement_overview"
-        where = []
+        conditions = []
+        params = []
         if max_measurement_id is not None:
-            where.append(f"id >= {max_measurement_id}")
-        if sample is not None:
-            where.append(f"sample =  '{sample}'")
-        if set_up is not None:
-            where.append(f"set_up = '{set_up}'")
-        if project is not None:
-            where.append(f"project = '{project}'")
-        if len(where) > 0:
-            statement += " WHERE " + ' AND '.join(where)
-        statement += " ;"
+            conditions.append("id >= %s")
+            params.append(max_measurement_id)
+        query_for_measurement_results._add_filters(
+                conditions, params, sample, set_up, project)
+        statement += query_for_measurement_results._where(conditions) + ";"
 
-        res = query_for_measurement_results._execute(statement, remote)
+        res = query_for_measurement_results._execute(statement, remote, params)
 
         update = False
         max_id = res[0][0]
@@ -218,32 +346,20 @@ class query_for_measurement_results:
                         name=None, keywords=None, starred=False):
         if min_id is None:
             return []
-        statement = '''
-            SELECT id, uuid, exp_name, start_time, project, set_up, sample, starred, keywords
-            FROM global_measurement_overview
-            '''
-        statement += f"WHERE id > {min_id} "
-        if sample is not None:
-            statement += f" and sample =  '{sample}' "
-        if set_up is not None:
-            statement += f" and set_up = '{set_up}' "
-        if project is not None:
-            statement += f" and project = '{project}' "
-        if name:
-            statement += f" and exp_name like '%{name}%' "
-        if keywords:
-            statement += f" and keywords ?& array{keywords} "
-        if starred:
-            statement += f" and starred = {starred} "
-        statement += " ;"
-        res = query_for_measurement_results._execute(statement, remote)
+        statement = f"SELECT {query_for_measurement_results._columns} FROM global_measurement_overview"
+        conditions = ["id > %s"]
+        params = [min_id]
+        query_for_measurement_results._add_filters(
+                conditions, params, sample, set_up, project, name, keywords, starred)
+        statement += query_for_measurement_results._where(conditions) + ";"
+        res = query_for_measurement_results._execute(statement, remote, params)
         return query_for_measurement_results._to_measurement_results(res)
 
     @staticmethod
-    def _execute(statement, remote):
+    def _execute(statement, remote, params=None):
         connection = SQL_database_manager().conn_remote if remote else SQL_database_manager().conn_local
         cur = connection.cursor()
-        cur.execute(statement)
+        cur.execute(statement, params)
         res = cur.fetchall()
         cur.close()
         connection.commit()
@@ -255,3 +371,40 @@ class query_for_measurement_results:
         for entry in res:
             data.append(measurement_results(*entry))
         return data
+
+
+class measurement_change_listener:
+    '''
+    Listens on a dedicated connection for notifications of new and updated measurements.
+    The notifications are sent by the trigger created with
+    measurement_overview_queries.create_change_notification.
+
+    Use fileno() to wait for notifications with select or a QSocketNotifier.
+    '''
+    def __init__(self, remote=False):
+        conn_info = SQL_conn_info_remote if remote else SQL_conn_info_local
+        self.conn = psycopg2.connect(dbname=conn_info.dbname, user=conn_info.user,
+            password=conn_info.passwd, host=conn_info.host, port=conn_info.port,
+            gssencmode="disable")
+        self.conn.autocommit = True
+        cur = self.conn.cursor()
+        cur.execute("SELECT 1 FROM pg_trigger WHERE tgname = %s;",
+                    (measurement_overview_queries.change_trigger,))
+        self.trigger_installed = cur.fetchone() is not None
+        cur.execute(f"LISTEN {measurement_overview_queries.change_channel};")
+        cur.close()
+
+    def fileno(self):
+        return self.conn.fileno()
+
+    def get_notifications(self):
+        '''
+        Returns list with the payload (dict) of the received notifications.
+        '''
+        self.conn.poll()
+        notifications = [json.loads(notify.payload) for notify in self.conn.notifies]
+        self.conn.notifies.clear()
+        return notifications
+
+    def close(self):
+        self.conn.close()
@@ -1,10 +1,14 @@
+from functools import partial
 import json
 import numpy as np
 
 from core_tools.data.SQL.SQL_common_commands import execute_query, select_elements_in_table
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
 from core_tools.data.ds.data_set_raw import data_set_raw, m_param_raw
 
-from core_tools.data.SQL.buffer_writer import buffer_reader
+from core_tools.data.SQL.buffer_writer import buffer_reader, MAX_LOAD_SIZE
+from core_tools.data.SQL.dataset_cache import dataset_cache
+from core_tools.data.SQL.queries.snapshot_queries import snapshot_queries
 
 
 class load_ds_queries:
@@ -43,15 +47,31 @@ class load_ds_queries:
         return return_data[0][0]
 
     @staticmethod
-    def get_dataset_raw(conn, exp_uuid):
+    def get_dataset_raw(conn, exp_uuid, remote=False, lazy_snapshot=True):
+        '''
+        Returns the data_set_raw of the measurement.
+
+        Args:
+            conn: connection to load the dataset with.
+            exp_uuid (int): uuid of the measurement.
+            remote (bool): True if conn is a connection to the remote database.
+                The snapshot is loaded on first access with the connection of
+                SQL_database_manager to this database.
+            lazy_snapshot (bool): if False the snapshot is loaded immediately with conn.
+        '''
         data = select_elements_in_table(conn, load_ds_queries.table_name, var_names=('*',),
             where = ("uuid", exp_uuid))[0]
 
         if data['stop_time'] is None:
             data['stop_time'] = data['start_time']
 
+        # the snapshot is decoded on first access.
         if data['snapshot'] is not None:
-            data['snapshot'] = json.loads(data['snapshot'].tobytes())
+            snapshot_loader = partial(json.loads, data['snapshot'].tobytes())
+        elif lazy_snapshot:
+            snapshot_loader = partial(load_ds_queries._load_snapshot, data['uuid'], remote)
+        else:
+            snapshot_loader = partial(snapshot_queries.load, conn, data['uuid'])
 
         if data['metadata'] is not None:
             data['metadata'] = json.loads(data['metadata'].tobytes())
@@ -59,18 +79,53 @@ class load_ds_queries:
         ds = data_set_raw(exp_id=data['id'], exp_uuid=data['uuid'], exp_name=data['exp_name'],
             set_up = data['set_up'], project = data['project'], sample = data['sample'],
             UNIX_start_time=data['start_time'].timestamp(), UNIX_stop_time=data['stop_time'].timestamp(),
-            SQL_datatable=data['exp_data_location'],snapshot=data['snapshot'], metadata=data['metadata'],
+            SQL_datatable=data['exp_data_location'], snapshot_loader=snapshot_loader, metadata=data['metadata'],
             keywords=data['keywords'], completed=data['completed'], starred=data['starred'], )
 
         # NOTE: column sync_location is abused for migration to new format
         new_format = data['sync_location'] == 'New measurement_parameters'
         exp_uuid = data['uuid']
         ds.measurement_parameters_raw = load_ds_queries.__get_dataset_raw_dataclasses(
-                conn, ds.SQL_datatable, new_format, exp_uuid)
+                conn, ds.SQL_datatable, new_format, exp_uuid, data['completed'])
+        if not lazy_snapshot:
+            ds.get_snapshot()
         return ds
 
     @staticmethod
-    def __get_dataset_raw_dataclasses(conn, table_name, new_format, exp_uuid):
+    def _load_snapshot(exp_uuid, remote):
+        # The connection is resolved on access. The connection used to load the dataset
+        # may have been closed since, e.g. after an error in a query.
+        db_mgr = SQL_database_manager()
+        conn = db_mgr.conn_remote if remote else db_mgr.conn_local
+        return snapshot_queries.load(conn, exp_uuid)
+
+    @staticmethod
+    def get_export_list(conn, project=None, set_up=None, sample=None,
+                        start_time=None, end_time=None, uuids=None):
+        '''
+        Returns list with (uuid, data_update_count) of the completed measurements
+        matching all specified arguments, ordered by uuid.
+        '''
+        statement = f"SELECT uuid, data_update_count FROM {load_ds_queries.table_name} WHERE completed"
+        params = []
+        for column, value in [('project', project), ('set_up', set_up), ('sample', sample)]:
+            if value is not None:
+                statement += f" AND {column} = %s"
+                params.append(value)
+        if start_time is not None:
+            statement += " AND start_time >= %s"
+            params.append(start_time)
+        if end_time is not None:
+            statement += " AND start_time < %s"
+            params.append(end_time)
+        if uuids is not None:
+            statement += " AND uuid = ANY(%s)"
+            params.append(list(uuids))
+        statement += " ORDER BY uuid;"
+        return execute_query(conn, statement, placeholders=params)
+
+    @staticmethod
+    def __get_dataset_raw_dataclasses(conn, table_name, new_format, exp_uuid, completed):
         var_names =    ("param_id", "nth_set", "nth_dim", "param_id_m_param",
                     "setpoint", "setpoint_local", "name_gobal", "name", "label",
                     "unit", "depencies", "shape", "total_size", "oid")
@@ -88,11 +143,19 @@ class load_ds_queries:
         data_raw = []
         for row in return_data:
             raw_data_row = m_param_raw(*row)
-            if np.prod(raw_data_row.shape) >= 2**27:
-                raise Exception(f"Dataset too big. Var '{raw_data_row.name}'{tuple(raw_data_row.shape)} >= 1 GB.")
-            raw_data_row.data_buffer = buffer_reader(conn, raw_data_row.oid, raw_data_row.shape)
             data_raw.append(raw_data_row)
 
+        # data of completed datasets does not change and can be cached.
+        if completed and dataset_cache.load(exp_uuid, data_raw):
+            return data_raw
+
+        for raw_data_row in data_raw:
+            raw_data_row.data_buffer = buffer_reader(conn, raw_data_row.oid, raw_data_row.shape)
+
+        # data of parameters >= 1 GB is only loaded partially using slices and averages.
+        if completed and all(np.prod(row.shape) < MAX_LOAD_SIZE for row in data_raw):
+            dataset_cache.store(exp_uuid, data_raw)
+
         return data_raw
 
     @staticmethod
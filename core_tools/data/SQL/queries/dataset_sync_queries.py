@@ -3,6 +3,7 @@ import logging
 from core_tools.data.SQL.SQL_common_commands import execute_statement, execute_query
 from core_tools.data.SQL.SQL_common_commands import select_elements_in_table, insert_row_in_table, update_table
 from core_tools.data.SQL.queries.dataset_creation_queries import data_table_queries, sample_info_queries
+from core_tools.data.SQL.queries.snapshot_queries import snapshot_queries
 
 import psycopg2, json
 import numpy as np
@@ -121,6 +122,11 @@ class sync_mgr_queries:
                 content_to_update.keys(), content_to_update.values(),
                 condition=("uuid",uuid))
 
+        # only the snapshot chunks missing in the destination are transferred.
+        n_chunks = snapshot_queries.sync(conn_src, conn_dest, uuid)
+        if n_chunks:
+            logger.info(f'copied {n_chunks} snapshot chunks {uuid}')
+
         if source_content['data_synchronized']:
             update_table(sync_agent.conn_local, 'global_measurement_overview',
                     ('table_synchronized', ), (True, ),
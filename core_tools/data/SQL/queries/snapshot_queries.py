@@ -0,0 +1,297 @@
+import hashlib
+import json
+import logging
+import zlib
+
+import psycopg2
+
+from core_tools.data.SQL.SQL_common_commands import execute_statement, execute_query
+
+logger = logging.getLogger(__name__)
+
+# Sub-trees with a JSON size of at least MIN_CHUNK_SIZE bytes are stored as separate chunk.
+MIN_CHUNK_SIZE = 1024
+# Key of the object that replaces a sub-tree stored in a separate chunk.
+REF_KEY = '__snapshot_chunk__'
+
+
+def _split(node, chunks):
+    '''
+    Replaces large sub-trees of node by references to chunks.
+
+    Args:
+        node: (part of) snapshot.
+        chunks (dict[str, str]): chunks by hash. New chunks are added.
+
+    Returns:
+        node with large sub-trees replaced by {REF_KEY: hash}.
+    '''
+    if isinstance(node, dict):
+        node = {key: _split(value, chunks) for key, value in node.items()}
+    elif isinstance(node, list):
+        node = [_split(value, chunks) for value in node]
+    else:
+        return node
+    data = json.dumps(node)
+    if len(data) < MIN_CHUNK_SIZE:
+        return node
+    chunk_hash = hashlib.sha256(data.encode('utf-8')).hexdigest()
+    chunks[chunk_hash] = data
+    return {REF_KEY: chunk_hash}
+
+
+def _join(node, chunks):
+    '''
+    Replaces the references in node by the content of the chunks.
+    '''
+    if isinstance(node, dict):
+        if len(node) == 1 and REF_KEY in node:
+            return _join(json.loads(chunks[node[REF_KEY]]), chunks)
+        return {key: _join(value, chunks) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_join(value, chunks) for value in node]
+    return node
+
+
+def _get_refs(node, refs):
+    if isinstance(node, dict):
+        if len(node) == 1 and REF_KEY in node:
+            refs.append(node[REF_KEY])
+            return
+        for value in node.values():
+            _get_refs(value, refs)
+    elif isinstance(node, list):
+        for value in node:
+            _get_refs(value, refs)
+
+
+def split_snapshot(snapshot):
+    '''
+    Splits the snapshot in content-addressed chunks.
+    Every chunk is the JSON of a sub-tree in which the large sub-trees are
+    replaced by references to other chunks. Unchanged sub-trees of
+    consecutive snapshots result in the same chunks.
+
+    Returns:
+        (hash of the root chunk, dict with chunks by hash)
+    '''
+    chunks = {}
+    root = _split(snapshot, chunks)
+    if not (isinstance(root, dict) and len(root) == 1 and REF_KEY in root):
+        # small snapshot. Store root as chunk anyway.
+        data = json.dumps(root)
+        chunk_hash = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        chunks[chunk_hash] = data
+        return chunk_hash, chunks
+    return root[REF_KEY], chunks
+
+
+def join_snapshot(root_hash, chunks):
+    '''
+    Reassembles the snapshot from the chunks.
+    '''
+    return _join({REF_KEY: root_hash}, chunks)
+
+
+class snapshot_queries:
+    '''
+    Content-addressed storage of the snapshots.
+
+    The snapshot of a measurement is split in chunks (see split_snapshot).
+    The chunks are stored zlib compressed in table snapshot_chunks with their
+    SHA-256 hash as key. Chunks are shared between measurements.
+    Table measurement_snapshot has the hash of the root chunk per measurement.
+
+    Older measurements have the snapshot as JSON in column snapshot of
+    global_measurement_overview. Older versions of core_tools only read this
+    column. As long as write_json_column is True, new measurements store the
+    snapshot in both formats. The JSON column is used when it is filled.
+
+    Retention: a chunk is kept as long as a measurement refers to it.
+    The references of deleted measurements and the chunks that are not
+    referenced anymore are removed by remove_unreferenced_chunks. Run it
+    after deleting measurements from global_measurement_overview.
+    '''
+    chunk_table = 'snapshot_chunks'
+    ref_table = 'measurement_snapshot'
+    # Set to False when all clients read the chunks. Old measurements keep the JSON.
+    write_json_column = True
+
+    @staticmethod
+    def generate_table(conn):
+        statement = f"CREATE TABLE if not EXISTS {snapshot_queries.chunk_table} ("
+        statement += "hash text PRIMARY KEY, "
+        statement += "data BYTEA NOT NULL);"
+        statement += f"CREATE TABLE if not EXISTS {snapshot_queries.ref_table} ("
+        statement += "uuid BIGINT PRIMARY KEY, "
+        statement += "snapshot_hash text NOT NULL);"
+        execute_statement(conn, statement)
+        conn.commit()
+
+    @staticmethod
+    def table_exists(conn):
+        res = execute_query(conn, "SELECT to_regclass(%s);", placeholders=[snapshot_queries.ref_table])
+        return res[0][0] is not None
+
+    @staticmethod
+    def store(conn, exp_uuid, snapshot):
+        '''
+        Stores the snapshot of the measurement. Only the chunks that are
+        not yet in the database are written. Does not commit.
+
+        Args:
+            exp_uuid (int): uuid of the measurement.
+            snapshot (dict): JSON compatible snapshot.
+        '''
+        root_hash, chunks = split_snapshot(snapshot)
+        # The lock conflicts with remove_unreferenced_chunks, which could otherwise remove
+        # existing chunks between the check and the insert of the reference.
+        snapshot_queries._lock_refs(conn)
+        snapshot_queries._insert_chunks(conn, chunks)
+        execute_statement(conn,
+            f"INSERT INTO {snapshot_queries.ref_table} (uuid, snapshot_hash) VALUES (%s, %s) "
+            "ON CONFLICT (uuid) DO UPDATE SET snapshot_hash = EXCLUDED.snapshot_hash;",
+            placeholders=[exp_uuid, root_hash])
+
+    @staticmethod
+    def get_hash(conn, exp_uuid):
+        res = execute_query(conn,
+            f"SELECT snapshot_hash FROM {snapshot_queries.ref_table} WHERE uuid = %s;",
+            placeholders=[exp_uuid])
+        if len(res) == 0:
+            return None
+        return res[0][0]
+
+    @staticmethod
+    def load(conn, exp_uuid):
+        '''
+        Returns the snapshot of the measurement or None if it is not stored in the chunk tables.
+        '''
+        if not snapshot_queries.table_exists(conn):
+            return None
+        root_hash = snapshot_queries.get_hash(conn, exp_uuid)
+        if root_hash is None:
+            return None
+
+        chunks = {}
+        to_load = [root_hash]
+        while to_load:
+            loaded = snapshot_queries._get_chunks(conn, to_load)
+            chunks.update(loaded)
+            to_load = []
+            for data in loaded.values():
+                _get_refs(json.loads(data), to_load)
+            to_load = [chunk_hash for chunk_hash in set(to_load) if chunk_hash not in chunks]
+        return join_snapshot(root_hash, chunks)
+
+    @staticmethod
+    def sync(conn_src, conn_dest, exp_uuid):
+        '''
+        Copies the snapshot reference of the measurement and the chunks
+        missing in the destination database. Does not commit.
+
+        Returns:
+            number of chunks copied.
+        '''
+        if not snapshot_queries.table_exists(conn_src):
+            return 0
+        root_hash = snapshot_queries.get_hash(conn_src, exp_uuid)
+        if root_hash is None or snapshot_queries.get_hash(conn_dest, exp_uuid) == root_hash:
+            return 0
+
+        snapshot_queries._lock_refs(conn_dest)
+        # A chunk is only inserted together with all chunks it refers to.
+        # So, if a chunk exists in the destination, all its descendants exist.
+        missing = {}
+        to_check = [root_hash]
+        while to_check:
+            existing = snapshot_queries._get_existing(conn_dest, to_check)
+            to_copy = [chunk_hash for chunk_hash in to_check
+                       if chunk_hash not in existing and chunk_hash not in missing]
+            loaded = snapshot_queries._get_chunks(conn_src, to_copy)
+            missing.update(loaded)
+            to_check = []
+            for data in loaded.values():
+                _get_refs(json.loads(data), to_check)
+
+        snapshot_queries._insert_chunks(conn_dest, missing, check_existing=False)
+        execute_statement(conn_dest,
+            f"INSERT INTO {snapshot_queries.ref_table} (uuid, snapshot_hash) VALUES (%s, %s) "
+            "ON CONFLICT (uuid) DO UPDATE SET snapshot_hash = EXCLUDED.snapshot_hash;",
+            placeholders=[exp_uuid, root_hash])
+        return len(missing)
+
+    @staticmethod
+    def remove_unreferenced_chunks(conn, overview_table='global_measurement_overview'):
+        '''
+        Removes the snapshot references of measurements that are not in
+        overview_table and the chunks that are not referenced anymore. Commits.
+
+        Returns:
+            number of removed chunks.
+        '''
+        # blocks the storage of snapshots until commit.
+        execute_statement(conn, f"LOCK TABLE {snapshot_queries.ref_table} IN SHARE ROW EXCLUSIVE MODE;")
+        execute_statement(conn,
+            f"DELETE FROM {snapshot_queries.ref_table} AS r WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {overview_table} AS m WHERE m.uuid = r.uuid);")
+        res = execute_query(conn, f"SELECT DISTINCT snapshot_hash FROM {snapshot_queries.ref_table};")
+        reachable = set()
+        to_check = [row[0] for row in res]
+        while to_check:
+            reachable.update(to_check)
+            to_load = to_check
+            to_check = []
+            # load the chunks in batches to limit the memory use.
+            for i in range(0, len(to_load), 1000):
+                for data in snapshot_queries._get_chunks(conn, to_load[i:i+1000]).values():
+                    _get_refs(json.loads(data), to_check)
+            to_check = [chunk_hash for chunk_hash in set(to_check) if chunk_hash not in reachable]
+        res = execute_query(conn,
+            f"DELETE FROM {snapshot_queries.chunk_table} WHERE NOT (hash = ANY(%s)) RETURNING hash;",
+            placeholders=[list(reachable)])
+        conn.commit()
+        logger.info(f'Removed {len(res)} unreferenced snapshot chunks')
+        return len(res)
+
+    @staticmethod
+    def _lock_refs(conn):
+        execute_statement(conn, f"LOCK TABLE {snapshot_queries.ref_table} IN ROW EXCLUSIVE MODE;")
+
+    @staticmethod
+    def _get_existing(conn, hashes):
+        if len(hashes) == 0:
+            return set()
+        res = execute_query(conn,
+            f"SELECT hash FROM {snapshot_queries.chunk_table} WHERE hash = ANY(%s);",
+            placeholders=[list(hashes)])
+        return {row[0] for row in res}
+
+    @staticmethod
+    def _get_chunks(conn, hashes):
+        if len(hashes) == 0:
+            return {}
+        res = execute_query(conn,
+            f"SELECT hash, data FROM {snapshot_queries.chunk_table} WHERE hash = ANY(%s);",
+            placeholders=[list(hashes)])
+        chunks = {chunk_hash: zlib.decompress(data).decode('utf-8') for chunk_hash, data in res}
+        if len(chunks) != len(set(hashes)):
+            missing = set(hashes) - set(chunks)
+            raise Exception(f'Snapshot chunks not found: {missing}')
+        return chunks
+
+    @staticmethod
+    def _insert_chunks(conn, chunks, check_existing=True):
+        if check_existing:
+            existing = snapshot_queries._get_existing(conn, list(chunks))
+        else:
+            existing = set()
+        hashes = [chunk_hash for chunk_hash in chunks if chunk_hash not in existing]
+        if len(hashes) == 0:
+            return
+        data = [psycopg2.Binary(zlib.compress(chunks[chunk_hash].encode('utf-8')))
+                for chunk_hash in hashes]
+        execute_statement(conn,
+            f"INSERT INTO {snapshot_queries.chunk_table} (hash, data) "
+            "SELECT * FROM unnest(%s::text[], %s::bytea[]) ON CONFLICT DO NOTHING;",
+            placeholders=[hashes, data])
@@ -0,0 +1,210 @@
+'''
+Export of many datasets at once, e.g. for archiving.
+
+Example:
+    from core_tools.data.ds.bulk_export import export_datasets
+
+    summary = export_datasets('D:/archive/2025-01', project='6dot', sample='SQ21',
+                              start_time='2025-01-01', end_time='2025-02-01',
+                              compression='lzf')
+    print(summary)
+'''
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import time
+
+import psycopg2
+
+from core_tools.data.ds.data_set_core import data_set
+from core_tools.data.ds.ds2xarray import ds2xarray
+from core_tools.data.ds import ds_hdf5
+from core_tools.data.ds.export_csv import save_xr_csv
+from core_tools.data.SQL.connect import SQL_conn_info_local, SQL_conn_info_remote
+from core_tools.data.SQL.dataset_cache import dataset_cache
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
+from core_tools.data.SQL.queries.dataset_loading_queries import load_ds_queries
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'export_index.json'
+
+
+@dataclass
+class export_summary:
+    n_exported: int = 0
+    n_skipped: int = 0
+    failed: list = field(default_factory=list)
+    n_bytes: int = 0
+    duration: float = 0.0
+
+    @property
+    def throughput(self):
+        '''
+        Written data in MB/s.
+        '''
+        if self.duration == 0.0:
+            return 0.0
+        return self.n_bytes / self.duration * 1e-6
+
+    def __str__(self):
+        return (f'exported {self.n_exported}, skipped {self.n_skipped}, failed {len(self.failed)} datasets; '
+                f'{self.n_bytes*1e-6:.1f} MB in {self.duration:.1f} s ({self.throughput:.1f} MB/s)')
+
+
+def _get_fname(path, uuid, format):
+    if format == 'hdf5':
+        return os.path.join(path, ds_hdf5._get_fname(uuid))
+    return os.path.join(path, f'ds_{uuid}.csv')
+
+
+def _load_index(path):
+    fname = os.path.join(path, INDEX_FILE)
+    if not os.path.exists(fname):
+        return {}
+    try:
+        with open(fname) as fp:
+            return json.load(fp)
+    except Exception:
+        logger.warning(f'Cannot read {fname}. All datasets will be exported.', exc_info=True)
+        return {}
+
+
+def _save_index(path, index):
+    fname = os.path.join(path, INDEX_FILE)
+    tmp_file = fname + '.tmp'
+    with open(tmp_file, 'w') as fp:
+        json.dump(index, fp)
+    os.replace(tmp_file, fname)
+
+
+def _get_connect_args(remote):
+    conn_info = SQL_conn_info_remote if remote else SQL_conn_info_local
+    return dict(dbname=conn_info.dbname, user=conn_info.user,
+                password=conn_info.passwd, host=conn_info.host, port=conn_info.port,
+                gssencmode="disable")
+
+
+def _init_worker():
+    # Executed in worker process.
+    # The exported datasets are not used again. Do not fill the dataset cache with them.
+    dataset_cache.configure(None)
+
+
+def _export(connect_args, uuid, fname, format, compression, level, metadata):
+    # Executed in worker process.
+    # The worker has its own connection. The large objects with the data
+    # can only be read in a transaction, so no autocommit.
+    conn = psycopg2.connect(**connect_args)
+    try:
+        conn.set_session(readonly=True)
+        ds = data_set(load_ds_queries.get_dataset_raw(conn, uuid, lazy_snapshot=False))
+        if format == 'hdf5':
+            # Stream the data from the large objects to file.
+            # The workers already use all CPUs: compress in this thread.
+            ds_hdf5.save_hdf5(ds, fname, compression, level, n_threads=1)
+        else:
+            save_xr_csv(ds2xarray(ds), fname, metadata)
+    finally:
+        conn.close()
+    return os.path.getsize(fname)
+
+
+def export_datasets(path, format='hdf5',
+                    project=None, set_up=None, sample=None,
+                    start_time=None, end_time=None, uuids=None,
+                    remote=False, force=False,
+                    compression='gzip', level=None, metadata=False,
+                    n_workers=None):
+    '''
+    Exports all completed measurements matching the specified arguments to path.
+
+    The datasets are exported by a pool of processes. Every process loads the
+    dataset by uuid with its own read-only connection to the database and
+    writes it to file. HDF5 files are written in blocks, reading the data per
+    block from the database.
+    The uuid and data_update_count of the exported datasets are stored in
+    a file 'export_index.json' in path. Datasets that have not been changed
+    since the previous export are skipped.
+
+    Args:
+        path (str): directory to write the files to.
+        format (str): 'hdf5' or 'csv'.
+        project, set_up, sample (str): select measurements of project, set_up, sample.
+        start_time, end_time (str | datetime): select measurements started in [start_time, end_time).
+        uuids (list[int]): select measurements with these uuids.
+        remote (bool): export from remote database instead of local database.
+        force (bool): export datasets even when they are up to date.
+        compression (str | None): HDF5 compression, see `ds_hdf5.save_xr_hdf5`.
+        level (int | None): HDF5 compression level.
+        metadata (bool): write a metadata file (.json) with every CSV file.
+        n_workers (int): number of processes exporting datasets. Default is number of CPUs.
+
+    Returns:
+        export_summary with the number of exported, skipped, failed datasets and throughput.
+    '''
+    if format not in ['hdf5', 'csv']:
+        raise ValueError(f"Unknown format '{format}'")
+    if format == 'hdf5':
+        # check arguments before starting the workers.
+        ds_hdf5._get_compression_encoding(compression, level)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    t_start = time.perf_counter()
+    summary = export_summary()
+    os.makedirs(path, exist_ok=True)
+
+    db_mgr = SQL_database_manager()
+    conn = db_mgr.conn_remote if remote else db_mgr.conn_local
+    export_list = load_ds_queries.get_export_list(
+            conn, project=project, set_up=set_up, sample=sample,
+            start_time=start_time, end_time=end_time, uuids=uuids)
+
+    index = _load_index(path)
+    todo = []
+    for uuid, update_count in export_list:
+        key = str(uuid)
+        if (not force and index.get(key) == update_count
+                and os.path.exists(_get_fname(path, uuid, format))):
+            summary.n_skipped += 1
+        else:
+            todo.append((uuid, update_count))
+    logger.info(f'Exporting {len(todo)} datasets, skipping {summary.n_skipped} up to date datasets')
+
+    connect_args = _get_connect_args(remote)
+    workers = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker)
+    exporting = deque()
+
+    def finish_export():
+        uuid, update_count, future = exporting.popleft()
+        try:
+            summary.n_bytes += future.result()
+            summary.n_exported += 1
+            index[str(uuid)] = update_count
+        except Exception:
+            logger.error(f'Failed to export dataset {uuid}', exc_info=True)
+            summary.failed.append(uuid)
+
+    try:
+        for uuid, update_count in todo:
+            # limit number of pending exports
+            while len(exporting) >= 2 * n_workers:
+                finish_export()
+            fname = _get_fname(path, uuid, format)
+            exporting.append((uuid, update_count,
+                              workers.submit(_export, connect_args, uuid, fname, format,
+                                             compression, level, metadata)))
+
+        while exporting:
+            finish_export()
+    finally:
+        workers.shutdown(cancel_futures=True)
+        _save_index(path, index)
+
+    summary.duration = time.perf_counter() - t_start
+    logger.info(f'Bulk export: {summary}')
+    return summary
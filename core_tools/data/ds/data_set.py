@@ -3,8 +3,6 @@ from core_tools.data.ds.data_set_core import data_set
 from core_tools.data.ds.data_set_raw import data_set_raw
 from core_tools.data.SQL.SQL_dataset_creator import SQL_dataset_creator
 import json
-import qcodes as qc
-from qcodes.utils.helpers import NumpyJSONEncoder
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +45,9 @@ def create_new_data_set(experiment_name, measurement_snapshot, *m_params):
         measurement_snapshot (dict[str,Any]) : snapshot of measurement parameters
         *m_params (m_param_dataset) : datasets of the measurement parameters
     '''
+    import qcodes as qc
+    from qcodes.utils.helpers import NumpyJSONEncoder
+
     logger.info(f"creating new dataset {experiment_name}")
     SQL_mgr = SQL_dataset_creator()
     if SQL_mgr.conn is None:
@@ -9,14 +9,22 @@ logger = logging.getLogger(__name__)
 class m_param_organizer():
     def __init__(self, m_param_raw):
         self.m_param_raw = m_param_raw
+        # index on param_id and (param_id, nth_set)
+        self.__params = {}
+        self.__param_sets = {}
+        self.__m_param_ids = {}
+        for m_param in m_param_raw:
+            self.__params.setdefault(m_param.param_id, []).append(m_param)
+            self.__param_sets.setdefault((m_param.param_id, m_param.nth_set), m_param)
+            # check if this param is a measurement param. Add only 1 of a set.
+            if m_param.param_id == m_param.param_id_m_param:
+                self.__m_param_ids[m_param.param_id] = None
 
     def get(self, key, nth_set):
-        items = self[key]
-        for i in items:
-            if i.nth_set == nth_set:
-                return i
-
-        raise ValueError(f'm_param with id {key} and set {nth_set} not found in this data collection.')
+        try:
+            return self.__param_sets[(key, nth_set)]
+        except KeyError:
+            raise ValueError(f'm_param with id {key} and set {nth_set} not found in this data collection.')
 
     def __getitem__(self, key):
         '''
@@ -25,26 +33,24 @@ class m_param_organizer():
         Returns
             list<m_param_raw> : raw parameters originating from this id.
         '''
-        param_s = []
-        for m_param in self.m_param_raw:
-            if m_param.param_id == key:
-                param_s.append(m_param)
-
-        if len(param_s) != 0:
-            return param_s
-        raise ValueError(f'm_param with id {key} not found in this data collection.')
+        try:
+            return self.__params[key]
+        except KeyError:
+            raise ValueError(f'm_param with id {key} not found in this data collection.')
 
     def get_m_param_id(self):
         '''
         get the measurement id's
         '''
-        id_s = []
-        for m_param in self.m_param_raw:
-            # check if this param is a measurement param. Add only 1 of a set.
-            if m_param.param_id == m_param.param_id_m_param and m_param.param_id not in id_s:
-                id_s.append(m_param.param_id_m_param)
+        return list(self.__m_param_ids)
 
-        return id_s
+    def copy_params(self, m_params):
+        '''
+        Returns a new organizer with copies of m_params.
+        All other parameters are shared with this organizer.
+        '''
+        copies = {id(m_param): copy.copy(m_param) for m_param in m_params}
+        return m_param_organizer([copies.get(id(m_param), m_param) for m_param in self.m_param_raw])
 
     def __copy__(self):
         new_m_param = []
@@ -71,72 +77,137 @@ class dataset_data_description():
         Args:
             m_param_raw (m_param_raw) : pointer to the raw parameter to add
             m_params_raw_collection (m_param_organizer) : object containing a representation of all the data in the dataset
+
+        Note:
+            The descriptions of the dependencies (x, y, x1, ...) are created on first access.
         '''
         self.name = name # @@@ will be overwritten by data_set_core.data_set.__init_properties
         self.param_name = m_param_raw.name
         self.__raw_data = m_param_raw
         self.__raw_data_org =  m_params_raw_collection
-        self.__repr_attr_overview = []
-        self.__populate_data()
+        self.__repr_attr_overview = None
+        self.__children = {}
+        self.__ndim = None
+
+    def __get_ndim(self):
+        # ndim determines the attribute names. Evaluate it only once.
+        if self.__ndim is None:
+            self.__ndim = self.ndim
+        return self.__ndim
+
+    def __self_name(self):
+        ndim = self.__get_ndim()
+        offset = 23 if ndim <= 2 else 8
+        if len(self.__raw_data.dependency) != 0:
+            return string.ascii_lowercase[offset+ndim]
+        return string.ascii_lowercase[offset+ndim-1]
+
+    def __get_child(self, i, j):
+        '''
+        Returns the description of the j-th parameter of dependency i.
+        '''
+        child = self.__children.get((i, j))
+        if child is not None:
+            return child
+
+        raw_data = self.__raw_data_org[self.__raw_data.dependency[i]]
+        n = len(raw_data)
+        child = dataset_data_description('', raw_data[j], self.__raw_data_org)
+
+        # @@@ Fix x, y, z
+        if self.__get_ndim() <= 2:
+            letter = string.ascii_lowercase[23+i]
+            names = [letter + str(j+1)] + ([letter] if j == 0 else [])
+            child.name = letter if j == 0 and n == 1 else letter + str(j+1)
+        else:
+            letter = string.ascii_lowercase[8+i]
+            names = [letter + str(j+1)] + ([letter] if n == 1 else [])
+            child.name = letter if n == 1 else letter + str(j+1)
+
+        self_name = self.__self_name()
+        for name in names:
+            if name != self_name:
+                self.__dict__[name] = child
+        self.__children[(i, j)] = child
+        return child
+
+    def __resolve(self, name):
+        '''
+        Returns the description with the attribute name or None if it does not exist.
+        '''
+        if name == self.__self_name():
+            self.__dict__[name] = self
+            return self
+
+        letter, number = name[0], name[1:]
+        if letter not in string.ascii_lowercase:
+            return None
+        if self.__get_ndim() <= 2:
+            i = string.ascii_lowercase.find(letter) - 23
+        else:
+            i = string.ascii_lowercase.find(letter) - 8
+        dependency = self.__raw_data.dependency
+        if i < 0 or i >= len(dependency):
+            return None
+        n = len(self.__raw_data_org[dependency[i]])
 
+        if number == '':
+            if self.__get_ndim() > 2 and n != 1:
+                return None
+            return self.__get_child(i, 0)
+        if not number.isdigit() or str(int(number)) != number:
+            return None
+        j = int(number) - 1
+        if j < 0 or j >= n:
+            return None
+        return self.__get_child(i, j)
+
+    def __getattr__(self, name):
+        # Only called when the attribute does not exist (yet).
+        if name.startswith('_') or name == '':
+            raise AttributeError(name)
+        result = self.__resolve(name)
+        if result is None:
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+        return result
+
+    def __dir__(self):
+        self.__populate_data()
+        return super().__dir__()
 
     def __populate_data(self):
+        if self.__repr_attr_overview is not None:
+            return
+        self.__repr_attr_overview = []
         for i in range(len(self.__raw_data.dependency)):
             repr_attr_overview = []
             raw_data = self.__raw_data_org[self.__raw_data.dependency[i]]
-
-            for j in range(len(raw_data)): #this is not pretty, but it works..
-                dataDescription = dataset_data_description('', raw_data[j], self.__raw_data_org)
-
-                # @@@ Fix x, y, z
-                if self.ndim <= 2:
-                    name = string.ascii_lowercase[23+i] + str(j+1)
-                    self.__setattr__(name, dataDescription)
-                    if j == 0:
-                        self.__setattr__(string.ascii_lowercase[23+i], dataDescription)
-                        if len(raw_data) == 1:
-                            name = string.ascii_lowercase[23+i]
-
-                    repr_attr_overview += [(name, dataDescription)]
-
-                if self.ndim > 2:
-                    self.__setattr__(string.ascii_lowercase[8+i] + str(j+1), dataDescription)
-                    if len(raw_data) == 1:
-                        self.__setattr__(string.ascii_lowercase[8+i], dataDescription)
-                        repr_attr_overview += [(string.ascii_lowercase[8+i], dataDescription)]
-                    else:
-                        repr_attr_overview += [(string.ascii_lowercase[8+i] + str(j+1), dataDescription)]
-
-                dataDescription.name = repr_attr_overview[-1][0] # @@@ overwrites name
-
+            for j in range(len(raw_data)):
+                child = self.__get_child(i, j)
+                repr_attr_overview += [(child.name, child)]
             self.__repr_attr_overview += [repr_attr_overview]
-
-        if self.ndim <= 2:
-            name = string.ascii_lowercase[23+self.ndim-1]
-            if len(self.__raw_data.dependency) != 0:
-                name = string.ascii_lowercase[23+self.ndim]
-        else:
-            name  = string.ascii_lowercase[8+self.ndim-1]
-            if len(self.__raw_data.dependency) != 0:
-                name = string.ascii_lowercase[8+self.ndim]
-
-        self.__setattr__(name, self)
+        self.__resolve(self.__self_name())
 
     def __call__(self):
         if self.__raw_data.setpoint is True or self.__raw_data.setpoint_local is True:
-            if self.__raw_data.data_buffer.data.ndim > 1: #over dimensioned
+            if len(self.__raw_data.data_buffer.shape) > 1: #over dimensioned
                 # NOTE: Assumes the setpoint does not depend on the other dimensions!
                 #       This will fail when the parameter is swept in alternating direction.
-                idx = [0] * self.__raw_data.data_buffer.data.ndim
+                idx = [0] * len(self.__raw_data.data_buffer.shape)
                 idx[self.__raw_data.nth_dim] = slice(None)
 
-                return self.__raw_data.data_buffer.data[tuple(idx)]
+                return self.__raw_data.data_buffer.view().index(tuple(idx)).data
 
         return self.__raw_data.data_buffer.data
 
     @property
     def shape(self):
-        return self().shape
+        # determined without loading the data.
+        shape = tuple(self.__raw_data.data_buffer.shape)
+        if self.__raw_data.setpoint is True or self.__raw_data.setpoint_local is True:
+            if len(shape) > 1:
+                return (shape[self.__raw_data.nth_dim],)
+        return shape
 
     @property
     def ndim(self):
@@ -145,6 +216,20 @@ class dataset_data_description():
     def full(self):
         return self.__raw_data.data_buffer.data
 
+    def read(self, index):
+        '''
+        Returns self()[index]. Only the selected part is read from the
+        database when the data has not been loaded.
+
+        Args:
+            index (tuple[int or slice]): index of the data.
+        '''
+        raw_data = self.__raw_data
+        if ((raw_data.setpoint is True or raw_data.setpoint_local is True)
+                and len(raw_data.data_buffer.shape) > 1):
+            return self()[index]
+        return raw_data.data_buffer.view().index(index).data
+
     def written(self):
         try:
             return self.__raw_data.data_buffer.cursor
@@ -152,6 +237,7 @@ class dataset_data_description():
             return None
 
     def get_raw_content(self):
+        self.__populate_data()
         return self.__repr_attr_overview
 
     def average(self, dim):
@@ -166,10 +252,10 @@ class dataset_data_description():
         if dim > self.ndim:
             raise ValueError("you are trying to average over a dimension that does not exists")
 
-        raw_data_org_copy = copy.copy(self.__raw_data_org)
+        raw_data_org_copy = self.__raw_data_org.copy_params([self.__raw_data])
         raw_data_cpy = raw_data_org_copy.get(self.__raw_data.param_id, self.__raw_data.nth_set)
         raw_data_cpy.dependency.pop(dim)
-        raw_data_cpy.data_buffer.buffer_lambda =  raw_data_cpy.data_buffer.averaging_lambda(dim)
+        raw_data_cpy.data_buffer = raw_data_cpy.data_buffer.average(dim)
 
         return dataset_data_description(self.name, raw_data_cpy, raw_data_org_copy)
 
@@ -188,11 +274,17 @@ class dataset_data_description():
 
         idx = [slice(None)]*self.ndim
         idx[dim] = i
-        raw_data_org_copy = copy.copy(self.__raw_data_org)
+        single_index = i.start is not None and i.stop-i.start == 1
+
+        # copy the parameters that get another view on the data
+        to_copy = [self.__raw_data]
+        if not single_index and i.stop is not None:
+            to_copy += self.__raw_data_org[self.__raw_data.dependency[dim]]
+        raw_data_org_copy = self.__raw_data_org.copy_params(to_copy)
 
         raw_data_cpy = raw_data_org_copy.get(self.__raw_data.param_id, self.__raw_data.nth_set)
 
-        if i.start is not None and i.stop-i.start == 1:
+        if single_index:
             idx[dim] = i.start
             raw_data_cpy.dependency.pop(dim)
         elif i.stop is not None:
@@ -200,9 +292,9 @@ class dataset_data_description():
             items= raw_data_org_copy[id_to_slice]
             for item in items:
                 # TODO this is not generic yet (I think, this has to be checked).
-                item.data_buffer.buffer_lambda =  item.data_buffer.slice_lambda([idx[dim]])
+                item.data_buffer = item.data_buffer.index([idx[dim]])
 
-        raw_data_cpy.data_buffer.buffer_lambda =  raw_data_cpy.data_buffer.slice_lambda(idx)
+        raw_data_cpy.data_buffer = raw_data_cpy.data_buffer.index(idx)
         return dataset_data_description(self.name, raw_data_cpy, raw_data_org_copy)
 
 
@@ -226,7 +318,7 @@ class dataset_data_description():
 
     def __repr__(self):
         output_print = f"| {self.name:<15} | {self.label:<15} | {self.unit:<8} | {str(self.shape):<25}|\n"
-        for i in self.__repr_attr_overview:
+        for i in self.get_raw_content():
             for j in i:
                 # data description
                 dd = j[1]
@@ -33,7 +33,6 @@ class data_set:
     sample_name = data_set_desciptor('sample')
 
     metadata = data_set_desciptor('metadata')
-    snapshot = data_set_desciptor('snapshot')
     keywords = data_set_desciptor('keywords')
     starred = data_set_desciptor('starred')
 
@@ -48,6 +47,12 @@ class data_set:
         self.__repr_attr_overview = []
         self.__init_properties(m_param_organizer(ds_raw.measurement_parameters_raw))
         self.last_commit = time.time()
+        # (start, end) of the last write to the database in time.perf_counter() seconds.
+        self.last_flush = None
+
+    @property
+    def snapshot(self):
+        return self.__data_set_raw.get_snapshot()
 
     def __len__(self):
         return len(self.__repr_attr_overview)
@@ -154,10 +159,27 @@ class data_set:
         if run_duration > 10.0: flush_interval *= 2
         if run_duration > 30.0: flush_interval *= 2
         if current_time - self.last_commit > flush_interval or force==True:
+            t_start = time.perf_counter()
             self.__data_set_raw.sync_buffers()
             SQL_ds_creator = SQL_dataset_creator()
             SQL_ds_creator.update_write_cursors(self.__data_set_raw)
             self.last_commit = time.time()
+            self.last_flush = (t_start, time.perf_counter())
+
+    def add_metadata(self, key, value):
+        '''
+        Adds an entry to the metadata of the dataset and stores it in the database.
+
+        Args:
+            key (str) : name of the entry
+            value : JSON serializable value
+        '''
+        ds_raw = self.__data_set_raw
+        if ds_raw.metadata is None:
+            ds_raw.metadata = {}
+        ds_raw.metadata[key] = value
+        SQL_ds_creator = SQL_dataset_creator()
+        SQL_ds_creator.update_metadata(ds_raw)
 
     def __repr__(self):
         output_print = "DataSet :: {}\n\nid = {}\nuuid = {}\n\n".format(self.name, self.exp_id, self.exp_uuid)
@@ -1,6 +1,6 @@
 from core_tools.data.SQL.connect import sample_info
-from core_tools.data.SQL.buffer_writer import buffer_reference
 from dataclasses import dataclass, field
+from typing import Callable
 import copy
 
 
@@ -29,6 +29,15 @@ class data_set_raw:
     starred : bool = False
     data_update_count : int = 0
 
+    # loads the snapshot on first access. Used when snapshot is None.
+    snapshot_loader : Callable[[], dict] = field(default=None, repr=False, compare=False)
+
+    def get_snapshot(self):
+        if self.snapshot is None and self.snapshot_loader is not None:
+            self.snapshot = self.snapshot_loader()
+            self.snapshot_loader = None
+        return self.snapshot
+
     def generate_keywords(self):
         set_param = []
         get_param = []
@@ -82,7 +91,7 @@ class m_param_raw:
     data_buffer : any = None
 
     def __copy__(self):
-        data_buffer = buffer_reference(self.data_buffer.data)
+        data_buffer = self.data_buffer.view()
         return m_param_raw(copy.copy(self.param_id), copy.copy(self.nth_set), copy.copy(self.nth_dim), copy.copy(self.param_id_m_param), copy.copy(self.setpoint),
             copy.copy(self.setpoint_local), copy.copy(self.name_gobal), copy.copy(self.name), copy.copy(self.label),
             copy.copy(self.unit), copy.copy(self.dependency), copy.copy(self.shape), copy.copy(self.size), copy.copy(self.oid), data_buffer)
\ No newline at end of file
@@ -5,8 +5,6 @@ import string
 import numpy as np
 import xarray as xr
 
-from qcodes.utils.helpers import NumpyJSONEncoder
-
 from core_tools import __version__
 
 def _add_coord(ds, param, added_dims):
@@ -23,8 +21,8 @@ def _add_coord(ds, param, added_dims):
         name = param.name
     while name in ds.coords or name in added_dims:
         if (name not in added_dims
-            and np.array_equal(data , ds.coords[name].data, equal_nan=True)
-            and attrs == ds.coords[name].attrs):
+            and attrs == ds.coords[name].attrs
+            and _equal_data(data, ds.coords[name].data)):
             # coord already added and identical
             return name
         dup += 1
@@ -34,26 +32,70 @@ def _add_coord(ds, param, added_dims):
     ds.coords[name].attrs = attrs
     return name
 
-def _add_data_var(ds, var, dims, param_index):
+def _equal_data(data, other):
+    if data.shape != other.shape:
+        return False
+    if (data.__array_interface__['data'][0] == other.__array_interface__['data'][0]
+            and data.strides == other.strides
+            and data.dtype == other.dtype):
+        # view on the same buffer
+        return True
+    return np.array_equal(data, other, equal_nan=True)
+
+def _get_data_var_name(var, existing):
+    '''
+    Returns the name of the data variable and the name of the parameter.
+    A sequence number is added when the name is already in existing.
+    '''
     var_name = var.param_name
     if not var_name:
         # Just in case the param name is not set.
         var_name = var.name
     name = var_name
     dup = 1
-    while name in ds:
+    while name in existing:
         # Duplicate variable name. Add sequence number
         dup += 1
         name = f'{var_name}-{dup}'
-    ds[name] = (dims, var())
-    ds[name].attrs = {
+    return name, var_name
+
+def _get_data_var_attrs(var, var_name, param_index):
+    return {
             'units':var.unit,
             'long_name':var.label,
             '_param_index':param_index,
             'param_name':var_name,
             }
 
+def _add_data_var(ds, var, dims, param_index):
+    name, var_name = _get_data_var_name(var, ds)
+    ds[name] = (dims, var())
+    ds[name].attrs = _get_data_var_attrs(var, var_name, param_index)
+
 def ds2xarray(ct_ds, snapshot='gzip'):
+    '''
+    Converts a core-tools dataset to an xarray Dataset.
+    The data variables and coordinates are views on the buffers of the dataset. No data is copied.
+
+    Args:
+        ct_ds (data_set): dataset to convert.
+        snapshot (str | None): format of the snapshot attribute:
+            'gzip': gzip compressed json in attribute 'snapshot-gzip',
+            'json': json string in attribute 'snapshot',
+            'dict': dict in attribute 'snapshot',
+            None: no snapshot.
+    '''
+    ds = _create_dataset(ct_ds, snapshot)
+    for param, dims, param_index in _add_coords(ct_ds, ds):
+        _add_data_var(ds, param, dims, param_index)
+    return ds
+
+def _create_dataset(ct_ds, snapshot):
+    '''
+    Returns an xarray Dataset with the attributes of the core-tools dataset.
+    '''
+    from qcodes.utils.helpers import NumpyJSONEncoder
+
     metadata_json = json.dumps(ct_ds.metadata, cls=NumpyJSONEncoder)
 
     if len(ct_ds) == 0:
@@ -76,15 +118,20 @@ def ds2xarray(ct_ds, snapshot='gzip'):
         }
     if snapshot == 'gzip':
         snapshot_json = json.dumps(ct_ds.snapshot, cls=NumpyJSONEncoder)
-        attrs['snapshot-gzip'] = np.array(bytearray(gzip.compress(bytearray(snapshot_json, 'utf-8'))))
+        attrs['snapshot-gzip'] = np.frombuffer(gzip.compress(snapshot_json.encode('utf-8')), dtype=np.uint8)
     elif snapshot == 'dict':
         attrs['snapshot'] = ct_ds.snapshot
     elif snapshot == 'json':
         snapshot_json = json.dumps(ct_ds.snapshot, cls=NumpyJSONEncoder)
         attrs['snapshot'] = snapshot_json
 
-    ds = xr.Dataset(attrs=attrs)
+    return xr.Dataset(attrs=attrs)
 
+def _add_coords(ct_ds, ds):
+    '''
+    Adds the coordinates of the parameters of ct_ds to ds.
+    Yields the parameter, the names of its dimensions and its param_index.
+    '''
     for i_param,m_param_set in enumerate(ct_ds):
         for i_set,m_param in enumerate(m_param_set):
             param_index = (i_param, i_set)
@@ -107,7 +154,5 @@ def ds2xarray(ct_ds, snapshot='gzip'):
                     dim_name = _add_coord(ds, coord, dims)
                     dims.append(dim_name)
 
-            _add_data_var(ds, param, dims, param_index)
-
-    return ds
+            yield param, dims, param_index
 
@@ -1,7 +1,77 @@
 from .xarray2ds import xarray2ds
-from .ds2xarray import ds2xarray
+from .ds2xarray import ds2xarray, _create_dataset, _add_coords, _get_data_var_name, _get_data_var_attrs
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import xarray as xr
+import h5netcdf
+import itertools
 import os
+import zlib
+
+try:
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
+# target size of HDF5 chunks in bytes.
+CHUNK_SIZE = 1 << 20
+# target size of the blocks read from the dataset when saving a core-tools dataset.
+READ_BLOCK_SIZE = 16 << 20
+
+
+def _get_compression_encoding(compression, level):
+    '''
+    Returns the encoding arguments for compression and level.
+    See save_xr_hdf5 for the supported values.
+    '''
+    if compression not in ['gzip', 'lzf', 'zstd', 'lz4', None]:
+        raise ValueError(f"Unknown compression '{compression}'")
+    if compression in ['zstd', 'lz4'] and hdf5plugin is None:
+        raise ImportError(f"Package hdf5plugin is required for compression '{compression}'")
+    if compression == 'gzip':
+        level = level if level is not None else 9
+        return {"compression": "gzip", "compression_opts": level}
+    if compression == 'lzf':
+        return {"compression": "lzf"}
+    if compression == 'zstd':
+        level = level if level is not None else 3
+        return dict(hdf5plugin.Zstd(clevel=level))
+    if compression == 'lz4':
+        return dict(hdf5plugin.LZ4())
+    return {}
+
+
+def _get_chunks(shape, itemsize):
+    '''
+    Returns chunk shape of approximately CHUNK_SIZE bytes.
+    The chunks contain complete rows of the trailing dimensions if possible.
+    '''
+    if len(shape) == 0 or 0 in shape:
+        return None
+    chunks = list(shape)
+    size = itemsize * int(np.prod(shape))
+    for i, n in enumerate(shape):
+        if size <= CHUNK_SIZE:
+            break
+        n_chunk = max(1, (n * CHUNK_SIZE) // size)
+        size = size // n * n_chunk
+        chunks[i] = n_chunk
+    return tuple(chunks)
+
+
+def _get_encoding(xds, compression, level):
+    compression = _get_compression_encoding(compression, level)
+    if not compression:
+        return {}
+    encoding = {}
+    for name in list(xds.data_vars)+list(xds.coords):
+        var = xds[name]
+        chunks = _get_chunks(var.shape, var.dtype.itemsize)
+        if chunks is not None:
+            encoding[name] = {**compression, "chunksizes": chunks}
+        else:
+            encoding[name] = compression
+    return encoding
 
 def _get_fname(uuid):
     return f'ds_{uuid}.hdf5'
@@ -13,9 +83,24 @@ def load_xr_hdf5(fname):
     xds = xr.load_dataset(fname, engine="h5netcdf")
     return xds
 
-def save_xr_hdf5(xds, fname):
-    comp = {"compression": "gzip", "compression_opts": 9}
-    encoding = {var: comp for var in list(xds.data_vars)+list(xds.coords)}
+def save_xr_hdf5(xds, fname, compression='gzip', level=None):
+    '''
+    Saves the xarray dataset in a HDF5 file with chunks of about 1 MB.
+
+    Args:
+        xds (xarray.Dataset): dataset to save.
+        fname (str): name of the file.
+        compression (str | None): 'gzip', 'lzf', 'zstd', 'lz4' or None.
+            'zstd' and 'lz4' require package hdf5plugin. hdf5plugin must also be
+            imported to read files written with these filters.
+        level (int | None): compression level for 'gzip' (1 ... 9, default 9) and
+            'zstd' (1 ... 22, default 3).
+
+    Note:
+        'gzip' with level 1, 'lzf' and 'lz4' are much faster than 'gzip' with level 9
+        at the cost of somewhat larger files.
+    '''
+    encoding = _get_encoding(xds, compression, level)
     tmp_file = fname + '.tmp'
     xds.to_netcdf(tmp_file, engine='h5netcdf', encoding=encoding)
     # Note: os.rename without remove should also work according to posix spec,
@@ -24,20 +109,116 @@ def save_xr_hdf5(xds, fname):
         os.remove(fname)
     os.rename(tmp_file, fname)
 
-def save_hdf5(ds, fname):
-    xds = ds2xarray(ds)
-    save_xr_hdf5(xds, fname)
+def save_hdf5(ds, fname, compression='gzip', level=None, n_threads=None):
+    '''
+    Saves the core-tools dataset in a HDF5 file with chunks of about 1 MB.
+
+    The file is the same as save_xr_hdf5(ds2xarray(ds), ...) writes, but the
+    data variables are written in blocks of about 16 MB. Data that has not been
+    loaded is read per block from the database, so the dataset is never
+    completely in memory.
+    'gzip' compression is done in n_threads threads. The other compressions
+    are done by the HDF5 library in the calling thread.
+
+    Args:
+        ds (data_set): dataset to save.
+        fname (str): name of the file.
+        compression (str | None): see save_xr_hdf5.
+        level (int | None): see save_xr_hdf5.
+        n_threads (int | None): number of threads for 'gzip' compression.
+            Default is the number of CPUs.
+    '''
+    compression_args = _get_compression_encoding(compression, level)
+    if n_threads is None:
+        n_threads = os.cpu_count() or 1
+
+    xds = _create_dataset(ds, 'gzip')
+    data_vars = []
+    names = set()
+    for param, dims, param_index in _add_coords(ds, xds):
+        name, var_name = _get_data_var_name(param, names.union(xds.variables))
+        names.add(name)
+        data_vars.append((name, param, dims, _get_data_var_attrs(param, var_name, param_index)))
+
+    tmp_file = fname + '.tmp'
+    # write attributes and coordinates with xarray. Coordinates are small.
+    xds.to_netcdf(tmp_file, engine='h5netcdf', encoding=_get_encoding(xds, compression, level))
+    executor = ThreadPoolExecutor(n_threads) if compression == 'gzip' and n_threads > 1 else None
+    try:
+        with h5netcdf.File(tmp_file, 'a') as f:
+            for name, param, dims, attrs in data_vars:
+                _write_var(f, name, param, dims, attrs, compression_args, executor)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if os.path.exists(fname):
+        os.remove(fname)
+    os.rename(tmp_file, fname)
+
+def _write_var(f, name, param, dims, attrs, compression_args, executor):
+    shape = param.shape
+    chunks = _get_chunks(shape, 8) if compression_args else None
+    if chunks is None:
+        # HDF5 does not compress scalars. Same as xarray.
+        var = f.create_variable(name, dims, dtype='<f8', fillvalue=np.nan)
+    else:
+        var = f.create_variable(name, dims, dtype='<f8', fillvalue=np.nan, chunks=chunks, **compression_args)
+    for key, value in attrs.items():
+        var.attrs[key] = value
+    if len(shape) == 0:
+        var[...] = param()
+        return
+    if 0 in shape:
+        return
+
+    # read blocks of complete chunk rows along the first axis.
+    row_size = int(np.prod(shape[1:]))
+    rows_per_block = max(1, READ_BLOCK_SIZE // (8 * row_size))
+    if chunks is not None:
+        rows_per_block = max(1, rows_per_block // chunks[0]) * chunks[0]
+    for start in range(0, shape[0], rows_per_block):
+        stop = min(start + rows_per_block, shape[0])
+        block = param.read((slice(start, stop),))
+        if executor is None:
+            var[start:stop] = block
+        else:
+            _write_chunks_gzip(var._h5ds, block, start, chunks, compression_args, executor)
+
+def _write_chunks_gzip(h5ds, block, start, chunks, compression_args, executor):
+    '''
+    Compresses the chunks of block in the threads of executor and writes them.
+    block starts at row `start`, which is a multiple of chunks[0].
+    '''
+    level = compression_args['compression_opts']
+
+    def compress(index):
+        chunk = block[tuple(slice(i, i+n) for i, n in zip(index, chunks))]
+        if chunk.shape != chunks:
+            # HDF5 stores complete chunks. Pad edge chunks with the fill value.
+            padded = np.full(chunks, np.nan)
+            padded[tuple(slice(0, n) for n in chunk.shape)] = chunk
+            chunk = padded
+        # zlib releases the GIL.
+        return zlib.compress(np.ascontiguousarray(chunk, dtype='<f8').tobytes(), level)
+
+    indices = list(itertools.product(*[range(0, n, c) for n, c in zip(block.shape, chunks)]))
+    for index, data in zip(indices, executor.map(compress, indices)):
+        offset = (start + index[0],) + index[1:]
+        h5ds.id.write_direct_chunk(offset, data)
 
 def load_hdf5(fname):
     xs = load_xr_hdf5(fname)
     ds = xarray2ds(xs)
     return ds
 
-def save_hdf5_uuid(ds, path):
+def save_hdf5_uuid(ds, path, compression='gzip', level=None, n_threads=None):
     os.makedirs(path, exist_ok=True)
     name = _get_fname(ds.exp_uuid)
     fname = os.path.join(path, name)
-    save_hdf5(ds, fname)
+    save_hdf5(ds, fname, compression, level, n_threads)
 
 def load_hdf5_uuid(uuid, path):
     name = _get_fname(uuid)
@@ -49,11 +230,11 @@ def load_xr_by_uuid(uuid, path):
     fname = os.path.join(path, name)
     return load_xr_hdf5(fname)
 
-def save_hdf5_id(ds, path):
+def save_hdf5_id(ds, path, compression='gzip', level=None, n_threads=None):
     os.makedirs(path, exist_ok=True)
     name = _get_fname(ds.exp_id)
     fname = os.path.join(path, name)
-    save_hdf5(ds, fname)
+    save_hdf5(ds, fname, compression, level, n_threads)
 
 def load_hdf5_id(id, path):
     name = _get_fname(id)
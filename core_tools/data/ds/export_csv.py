@@ -1,7 +1,12 @@
 import os
 import json
+import numpy as np
+import pandas as pd
 from core_tools.data.ds.ds2xarray import ds2xarray
 
+# number of rows formatted and written at once.
+ROWS_PER_BLOCK = 100_000
+
 
 def _save_metadata(xds, fname):
     coordinates = []
@@ -38,7 +43,8 @@ def _save_metadata(xds, fname):
 def save_csv(ds, path,
              vars: None | list[str] | str | int = None,
              metadata: bool = False,
-             name: str | None = None):
+             name: str | None = None,
+             per_variable: bool = False):
     '''
     Saves dataset as CSV file.
     The default filename is f'ds{ds.exp_uuid}.csv'.
@@ -53,11 +59,15 @@ def save_csv(ds, path,
         metadata:
             If true create a metadata file (.json) with a description of the
             data, i.e. attributes, name and units of variables and coordinates.
+        per_variable:
+            If true every variable is saved in a separate file with only
+            the dimensions of the variable. The name of the variable is
+            appended to the filename.
 
     Note:
         All variables will be expanded on all dimensions to get 1 table to export.
         If the variables do not all have the same dimensions, then it
-        might be better to export
+        might be better to export with `per_variable=True`.
     '''
     xds = ds2xarray(ds)
     if vars is not None:
@@ -73,14 +83,59 @@ def save_csv(ds, path,
     if name is None:
         name = f'ds_{ds.exp_uuid}.csv'
     fname = os.path.join(path, name)
-    df = xds.to_dataframe()
-    df.to_csv(fname)
+    save_xr_csv(xds, fname, metadata, per_variable)
+
+
+def save_xr_csv(xds, fname, metadata: bool = False, per_variable: bool = False):
+    '''
+    Saves xarray dataset as CSV file.
+
+    Args:
+        xds: xarray dataset to save
+        fname: name of the file
+        metadata:
+            If true create a metadata file (.json) with a description of the
+            data, i.e. attributes, name and units of variables and coordinates.
+        per_variable:
+            If true every variable is saved in a separate file with only
+            the dimensions of the variable.
+    '''
+    base, ext = os.path.splitext(fname)
+    if per_variable:
+        for var_name in xds.data_vars:
+            _write_csv(xds[[var_name]], f'{base}_{var_name}{ext}')
+    else:
+        _write_csv(xds, fname)
 
     if metadata:
-        try:
-            end = name.rindex('.')
-            name = name[:end] + '.json'
-        except Exception:
-            name += '.json'
-        fname = os.path.join(path, name)
-        _save_metadata(xds, fname)
+        _save_metadata(xds, base + '.json')
+
+
+def _write_csv(xds, fname):
+    '''
+    Writes the dataset in the same layout as `xds.to_dataframe().to_csv(fname)`,
+    but formats and writes blocks of rows to keep memory usage constant.
+    '''
+    dims = list(xds.dims)
+    shape = tuple(xds.sizes[dim] for dim in dims)
+    columns = [key for key in xds.variables if key not in xds.dims]
+    coords = [xds[dim].values for dim in dims]
+    # data ordered along the dims of the table, but without the broadcasted dimensions.
+    values = {}
+    for key in columns:
+        var = xds.variables[key]
+        var_dims = [dim for dim in dims if dim in var.dims]
+        values[key] = (var.transpose(*var_dims).values, [dims.index(dim) for dim in var_dims])
+
+    n_rows = int(np.prod(shape))
+    with open(fname, 'w', newline='') as fp:
+        pd.DataFrame(columns=dims+columns).to_csv(fp, index=False)
+        for start in range(0, n_rows, ROWS_PER_BLOCK):
+            stop = min(start + ROWS_PER_BLOCK, n_rows)
+            index = np.unravel_index(np.arange(start, stop), shape)
+            block = {}
+            for dim, coord, i in zip(dims, coords, index):
+                block[dim] = coord[i]
+            for key, (data, var_dims) in values.items():
+                block[key] = data[tuple(index[i] for i in var_dims)]
+            pd.DataFrame(block, columns=dims+columns).to_csv(fp, index=False, header=False)
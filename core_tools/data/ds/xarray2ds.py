@@ -50,8 +50,10 @@ def xarray2ds(xr_ds):
     attrs = xr_ds.attrs
     if 'snapshot-gzip' in attrs:
         snapshot = json.loads(gzip.decompress(attrs['snapshot-gzip']))
-    else:
+    elif 'snapshot' in attrs:
         snapshot = json.loads(attrs['snapshot'])
+    else:
+        snapshot = None
     try:
         metadata = json.loads(attrs['metadata'])
     except KeyError:
@@ -29,6 +29,13 @@ class _2D_plot:
         self.y_unit_scaler = return_unit_scaler(self.ds.y.unit)
         self.value_unit_scaler = return_unit_scaler(self.ds.unit)
         self.logmode = {'x':False, 'y':False, 'z':False}
+        # axis values, log mode and finite indices of completely written axes.
+        self._axes = {}
+        # persistent image data and number of completely copied rows.
+        self._image = None
+        self._rows_done = 0
+        # number of values written at last update.
+        self._written = None
 
         # only change if still default
         if pg.getConfigOption('foreground') == 'd' and pg.getConfigOption('background') == 'k':
@@ -65,33 +72,30 @@ class _2D_plot:
 
     def update(self):
         try:
+            written = self.ds.written()
+            if written is not None and written == self._written:
+                # No new data. Nothing to update.
+                return
             # logger.info(f'updating {self.ds.name} {self.ds.y.name} vs {self.ds.x.name} ')
-            x = self.ds.x()*self.x_unit_scaler
-            y = self.ds.y()*self.y_unit_scaler
+            x, x_is_log, x_args = self._get_axis('x', self.ds.x, self.x_unit_scaler)
+            y, y_is_log, y_args = self._get_axis('y', self.ds.y, self.y_unit_scaler)
 
-            if self.detect_log_mode(x):
+            if x_is_log:
                 self.logmode['y'] = True
-                x = np.log10(x)
-            if self.detect_log_mode(y):
+            if y_is_log:
                 self.logmode['x'] = True
-                y = np.log10(y)
 
-            x_args = np.argwhere(np.isfinite(x)).T[0]
             if len(x_args) == 0:
                 # No data yet. Nothing to update.
                 return
             x_limit = [np.min(x_args), np.max(x_args)]
             x_limit_num = (x[x_limit[0]], x[x_limit[1]])
-            y_args = np.argwhere(np.isfinite(y)).T[0]
             y_limit = [np.min(y_args), np.max(y_args)]
             y_limit_num = (y[y_limit[0]], y[y_limit[1]])
 
-            data = self.ds()
-            data_cp = np.full(data.shape, np.nan)
             x_slice = slice(x_limit[0], x_limit[1]+1)
             y_slice = slice(y_limit[0], y_limit[1]+1)
-            data_cp[x_slice, y_slice] = data[x_slice, y_slice]
-            data = data_cp
+            data = self._update_image(x_slice, y_slice, written)
 
             x_off_set = np.min(x[x_args])
             y_off_set = np.min(y[y_args])
@@ -129,9 +133,60 @@ class _2D_plot:
             tr.scale(y_scale, x_scale)
             self.img.setTransform(tr)
             self.plot.setLogMode(x=self.logmode['x'], y=self.logmode['y'])
+            self._written = written
         except Exception:
             logger.error("Error in plot update", exc_info=True)
 
+    def _get_axis(self, key, param, unit_scaler):
+        '''
+        Returns the scaled axis values, log mode and indices of finite values.
+        The result is cached when all values of the axis have been written.
+        '''
+        axis = self._axes.get(key)
+        if axis is not None:
+            return axis
+
+        values = param()*unit_scaler
+        is_log = self.detect_log_mode(values)
+        if is_log:
+            values = np.log10(values)
+        args = np.argwhere(np.isfinite(values)).T[0]
+        axis = (values, is_log, args)
+        if len(args) == len(values):
+            self._axes[key] = axis
+        return axis
+
+    def _update_image(self, x_slice, y_slice, written):
+        '''
+        Reads the data within x_slice and y_slice into the persistent image data.
+        Only the rows changed since the last update are read when the
+        number of written values is known.
+        '''
+        shape = self.ds.shape
+        if self._image is None or self._image.shape != shape:
+            self._image = np.full(shape, np.nan)
+            self._rows_done = 0
+
+        n_rows, n_cols = shape
+        incremental = written is not None and written <= n_rows*n_cols and n_cols > 0
+        if incremental:
+            row_start = self._rows_done
+            row_end = min(-(-written // n_cols), n_rows, x_slice.stop)
+        else:
+            self._image[:] = np.nan
+            row_start, row_end = 0, x_slice.stop
+
+        copy_start = max(row_start, x_slice.start)
+        if copy_start < row_end:
+            self._image[copy_start:row_end] = np.nan
+            self._image[copy_start:row_end, y_slice] = self.ds.read((slice(copy_start, row_end), y_slice))
+
+        if incremental:
+            # the last row might be incomplete. It will be copied again.
+            self._rows_done = max(row_start, min(written // n_cols, row_end))
+
+        return self._image
+
     def detect_log_mode(self, data):
         ind = np.argwhere(np.isfinite(data)).T[0]
         if len(ind) < 3:
@@ -174,7 +229,7 @@ class _2D_plot:
                 d = np.abs(ds.y()*self.y_unit_scaler-y)
                 d[np.isnan(d)] = np.inf
                 iy = d.argmin()
-                value = ds()[ix,iy]
+                value = ds.read((ix, iy))
                 value_formatted = si_format(value*self.value_unit_scaler, 3) if not np.isnan(value) else 'NaN '
 
                 self.label.setText("x={}, y={}: {}".format(
@@ -4,7 +4,8 @@ from PyQt5.QtWidgets import QMessageBox
 
 from core_tools.data.SQL.connect import SQL_conn_info_local, SQL_conn_info_remote
 from core_tools.data.SQL.queries.dataset_gui_queries import (
-        alter_dataset, query_for_samples, query_for_measurement_results)
+        alter_dataset, query_for_samples, query_for_measurement_results,
+        measurement_change_listener, sample_catalogue)
 
 from core_tools.data.ds.data_set import load_by_uuid
 try:
@@ -118,6 +119,13 @@ class DataFilter:
 
 
 class signale_handler(QtQuick.QQuickView):
+    # interval [ms] for polling for new measurements.
+    poll_interval = 500
+    # interval [ms] for polling when change notifications are received from the database.
+    fallback_poll_interval = 10_000
+    # number of measurements retrieved per query.
+    page_size = 500
+
     def __init__(self, data_filter, date_model, data_overview_model,
                  live_plotting_enabled=True):
         super().__init__()
@@ -131,7 +139,10 @@ class signale_handler(QtQuick.QQuickView):
         self.selected_date = None
         self.ignore_date_selection_changes = False
         self.loaded_results = []
+        self._loaded_query = None
         self.plots = []
+        self.change_listener = None
+        self.change_notifier = None
 
     def init_gui_variables(self, win):
         self.win = win
@@ -154,9 +165,63 @@ class signale_handler(QtQuick.QQuickView):
 
         self.updating = False
         self.timer = QtCore.QTimer()
-        self.timer.setInterval(500)
+        if self._start_change_listener():
+            self.timer.setInterval(self.fallback_poll_interval)
+        else:
+            self.timer.setInterval(self.poll_interval)
         self.timer.timeout.connect(self.check_for_updates)
         self.timer.start()
+        self.win.closing.connect(self._window_closing)
+
+    def _start_change_listener(self):
+        try:
+            listener = measurement_change_listener()
+        except Exception:
+            logger.warning('Cannot listen for measurement changes. Polling for updates.', exc_info=True)
+            return False
+        if not listener.trigger_installed:
+            logger.info('Measurement change trigger not installed in database. Polling for updates.')
+            listener.close()
+            return False
+        self.change_listener = listener
+        self.change_notifier = QtCore.QSocketNotifier(listener.fileno(), QtCore.QSocketNotifier.Read)
+        self.change_notifier.activated.connect(self._measurement_changed)
+        return True
+
+    def _stop_change_listener(self):
+        if self.change_listener is None:
+            return
+        self.change_notifier.setEnabled(False)
+        self.change_notifier = None
+        self.change_listener.close()
+        self.change_listener = None
+
+    def _window_closing(self, event):
+        self.timer.stop()
+        self._stop_change_listener()
+
+    def _measurement_changed(self):
+        try:
+            notifications = self.change_listener.get_notifications()
+        except Exception:
+            logger.error('Failed to receive measurement changes. Polling for updates.', exc_info=True)
+            self._stop_change_listener()
+            self.timer.setInterval(self.poll_interval)
+            return
+        inserted = [notification for notification in notifications if notification['op'] == 'INSERT']
+        new_samples = False
+        for notification in inserted:
+            new_samples |= sample_catalogue.add(
+                    notification['project'], notification['set_up'], notification['sample'])
+        if new_samples:
+            self.pro_set_sample_info_state_change_loc(
+                    self._data_filter.project_index,
+                    self._data_filter.set_up_index,
+                    self._data_filter.sample_index)
+        if len(inserted) > 0:
+            self.check_for_updates()
+        elif len(notifications) > 0:
+            self.load_data_table(self.selected_date)
 
     @QtCore.pyqtSlot('QString')
     def message(self, message):
@@ -188,7 +253,7 @@ class signale_handler(QtQuick.QQuickView):
                 sample=self._data_filter.sample)
         self.update_date_model()
 
-    def update_date_model(self):
+    def update_date_model(self, new_results_only=False):
         dates = query_for_measurement_results.get_all_dates_with_meaurements(
                 self._data_filter.project,
                 self._data_filter.set_up,
@@ -213,7 +278,7 @@ class signale_handler(QtQuick.QQuickView):
         obj.setProperty("currentIndex", index)
         if old_index == index or index == -1:
             # fresh measurements
-            self.load_data_table(self.selected_date)
+            self.load_data_table(self.selected_date, new_results_only)
 
     @QtCore.pyqtSlot(int)
     def update_date_selection(self, idx):
@@ -226,17 +291,47 @@ class signale_handler(QtQuick.QQuickView):
         except Exception:
             logger.error('Failed to set date', exc_info=True)
 
-    def load_data_table(self, date):
-        try:
-            data = query_for_measurement_results.get_results_for_date(
+    def _query_results(self, query, after=None):
+        # Retrieves the results with keyset pagination on (start_time, id).
+        date, project, set_up, sample, name, keywords, starred = query
+        data = []
+        while True:
+            page = query_for_measurement_results.get_results_for_date(
                     date,
-                    project=self._data_filter.project,
-                    set_up=self._data_filter.set_up,
-                    sample=self._data_filter.sample,
-                    name=self._data_filter.name,
-                    keywords=self._data_filter.keywords,
-                    starred=self._data_filter.starred,
+                    project=project,
+                    set_up=set_up,
+                    sample=sample,
+                    name=name,
+                    keywords=keywords,
+                    starred=starred,
+                    limit=self.page_size,
+                    after=after,
                     )
+            data += page
+            if len(page) < self.page_size:
+                return data
+            after = query_for_measurement_results.page_key(page[-1])
+
+    def load_data_table(self, date, new_results_only=False):
+        '''
+        Loads the measurements of date in the table.
+        With new_results_only only the measurements started after the last
+        loaded measurement are retrieved, if the date and filter did not change.
+        '''
+        try:
+            query = (date,
+                     self._data_filter.project,
+                     self._data_filter.set_up,
+                     self._data_filter.sample,
+                     self._data_filter.name,
+                     self._data_filter.keywords,
+                     self._data_filter.starred)
+            if new_results_only and query == self._loaded_query and len(self.loaded_results) > 0:
+                after = query_for_measurement_results.page_key(self.loaded_results[-1])
+                data = self.loaded_results + self._query_results(query, after)
+            else:
+                data = self._query_results(query)
+            self._loaded_query = query
             if data == self.loaded_results:
                 # no changes
                 return
@@ -258,7 +353,7 @@ class signale_handler(QtQuick.QQuickView):
                     sample=self._data_filter.sample)
 
             if update and self.max_measurement_id is not None:
-                self.update_date_model()
+                self.update_date_model(new_results_only=True)
 
                 if self.live_plotting_enabled:
                     # NOTE: name, keywords and starred are ignored for live plotting.
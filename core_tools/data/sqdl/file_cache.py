@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'core_tools', 'sqdl')
+
+
+class FileCache:
+    '''
+    Local cache of files downloaded from sQDL.
+
+    Files are stored as <cache_dir>/<uid>/<sha256>/<file name>.
+    <cache_dir>/<uid>/index.json has the checksum and ETag of the cached
+    files of the dataset. Cached files are used without contacting the
+    server. Files are first downloaded to <cache_dir>/<uid>/<file name>.part.
+    An interrupted download is resumed with an HTTP Range request.
+
+    Args:
+        cache_dir: directory for the cache. Default ~/.cache/core_tools/sqdl.
+        session: requests session to use for the downloads.
+        max_connections: maximum number of parallel downloads.
+        retries: number of times to resume a download after a connection error.
+    '''
+    # data received in an incomplete chunk is lost when the connection drops.
+    chunk_size = 1 << 16
+
+    def __init__(self,
+                 cache_dir: str | None = None,
+                 session: requests.Session | None = None,
+                 max_connections: int = 8,
+                 retries: int = 3):
+        self.cache_dir = cache_dir if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.max_connections = max_connections
+        self.retries = retries
+        if session is None:
+            session = requests.Session()
+        # keep a connection per worker.
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_connections,
+                                                pool_maxsize=max_connections)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self.session = session
+        self._lock = threading.Lock()
+        self._file_locks = {}
+
+    def get_cached(self, uid: str, suffix: str = '') -> str | None:
+        '''
+        Returns the path of the cached file of the dataset with a name ending
+        on suffix or None if there is no such file in the cache.
+        '''
+        for file_name, entry in self._read_index(uid).items():
+            if file_name.endswith(suffix):
+                path = self._file_path(uid, entry['checksum'], file_name)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def get_file(self,
+                 uid: str,
+                 resolve: Callable[[str], tuple[str, str]],
+                 suffix: str = '',
+                 offline: bool = False,
+                 refresh: bool = False) -> str:
+        '''
+        Returns the path of the file of the dataset. The file is downloaded if
+        it is not in the cache.
+
+        Args:
+            uid: uid of the dataset.
+            resolve: function returning (file name, url) of the file of the dataset.
+                Only called when the file is not in the cache.
+            suffix: end of the file name.
+            offline: if True only return files from the cache.
+            refresh: if True check with the server that the cached file is up to date.
+        '''
+        uid = str(uid)
+        if not refresh or offline:
+            path = self.get_cached(uid, suffix)
+            if path is not None:
+                return path
+        if offline:
+            raise Exception(f"File '*{suffix}' of uid '{uid}' not in cache (offline)")
+        file_name, url = resolve(uid)
+        return self.download(uid, file_name, url)
+
+    def get_files(self,
+                  uids: list[str],
+                  resolve: Callable[[str], tuple[str, str]],
+                  suffix: str = '',
+                  offline: bool = False,
+                  refresh: bool = False,
+                  print_progress: bool = False) -> list[str]:
+        '''
+        Returns the paths of the files of the datasets. Missing files are
+        downloaded in parallel. See get_file.
+        '''
+        def get_file(uid):
+            return self.get_file(uid, resolve, suffix, offline=offline, refresh=refresh)
+
+        with ThreadPoolExecutor(self.max_connections) as executor:
+            results = executor.map(get_file, uids)
+            if print_progress:
+                results = tqdm(results, total=len(uids))
+            return list(results)
+
+    def download(self, uid: str, file_name: str, url: str) -> str:
+        '''
+        Downloads the file to the cache and returns its path.
+        If the file is in the cache the server is only asked whether it has changed.
+        '''
+        uid = str(uid)
+        with self._get_file_lock(uid, file_name):
+            for i in range(self.retries + 1):
+                try:
+                    return self._download(uid, file_name, url)
+                except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as ex:
+                    if i == self.retries:
+                        raise
+                    logger.info(f"Download of '{file_name}' interrupted ({ex}). Resuming")
+
+    def _download(self, uid, file_name, url):
+        entry = self._read_index(uid).get(file_name)
+        part_path = os.path.join(self.cache_dir, uid, file_name + '.part')
+        part_info_path = part_path + '.json'
+        headers = {}
+        if entry is not None and os.path.exists(self._file_path(uid, entry['checksum'], file_name)):
+            headers['If-None-Match'] = entry['etag']
+
+        offset = 0
+        part_etag = None
+        if os.path.exists(part_path) and os.path.exists(part_info_path):
+            with open(part_info_path) as fp:
+                part_etag = json.load(fp)['etag']
+            offset = os.path.getsize(part_path)
+            if offset > 0 and part_etag:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = part_etag
+            else:
+                offset = 0
+
+        with self.session.get(url, headers=headers, stream=True) as resp:
+            if resp.status_code == 304:
+                return self._file_path(uid, entry['checksum'], file_name)
+            if resp.status_code == 416 and offset > 0:
+                # range not satisfiable: partial file is complete.
+                logger.debug(f"Partial download of '{file_name}' is complete")
+            else:
+                resp.raise_for_status()
+                etag = resp.headers.get('ETag')
+                if resp.status_code == 206:
+                    mode = 'ab'
+                    total_size = int(resp.headers['Content-Range'].split('/')[-1])
+                    logger.debug(f"Resuming download of '{file_name}' at {offset} bytes")
+                else:
+                    mode = 'wb'
+                    offset = 0
+                    part_etag = etag
+                    total_size = resp.headers.get('Content-Length')
+                    if total_size is not None:
+                        total_size = int(total_size)
+                    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+                    with open(part_info_path, 'w') as fp:
+                        json.dump({'etag': etag}, fp)
+                with open(part_path, mode) as fp:
+                    for data in resp.iter_content(self.chunk_size):
+                        fp.write(data)
+                if total_size is not None and os.path.getsize(part_path) != total_size:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f'Incomplete download {os.path.getsize(part_path)} of {total_size} bytes')
+
+        checksum = _sha256(part_path)
+        path = self._file_path(uid, checksum, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(part_path, path)
+        os.remove(part_info_path)
+        self._update_index(uid, file_name, {'checksum': checksum, 'etag': part_etag})
+        return path
+
+    def _file_path(self, uid, checksum, file_name):
+        return os.path.join(self.cache_dir, uid, checksum, file_name)
+
+    def _get_file_lock(self, uid, file_name):
+        with self._lock:
+            return self._file_locks.setdefault((uid, file_name), threading.Lock())
+
+    def _read_index(self, uid):
+        try:
+            with open(os.path.join(self.cache_dir, uid, 'index.json')) as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {}
+
+    def _update_index(self, uid, file_name, entry):
+        with self._lock:
+            index = self._read_index(uid)
+            index[file_name] = entry
+            path = os.path.join(self.cache_dir, uid, 'index.json')
+            with open(path + '.tmp', 'w') as fp:
+                json.dump(index, fp)
+            os.replace(path + '.tmp', path)
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        while data := fp.read(FileCache.chunk_size):
+            h.update(data)
+    return h.hexdigest()
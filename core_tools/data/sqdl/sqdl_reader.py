@@ -1,4 +1,3 @@
-from functools import partial
 import io
 import os
 import shutil
@@ -6,12 +5,11 @@ import requests
 import xarray as xr
 from datetime import datetime
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
 
-from tqdm import tqdm
 from sqdl_client.client import QDLClient
 from core_tools.data.ds.data_set import data_set
 from core_tools.data.ds.xarray2ds import xarray2ds
+from core_tools.data.sqdl.file_cache import FileCache
 
 _DATASET_READER = None
 
@@ -29,18 +27,43 @@ class DatasetInfo:
 
 
 class DatasetReader:
-    def __init__(self, scope_name: str | None = None):
-        client = QDLClient()
-        self.client = client
-        client.login()
+    def __init__(self,
+                 scope_name: str | None = None,
+                 cache_dir: str | None = None,
+                 max_connections: int = 8,
+                 offline: bool = False):
+        '''
+        Reads datasets from sQDL.
+
+        Args:
+            scope_name: name of the sQDL scope.
+            cache_dir: directory to cache the downloaded files. Default ~/.cache/core_tools/sqdl.
+            max_connections: maximum number of parallel downloads.
+            offline: if True only load datasets from the cache. Does not login.
+        '''
+        self.client = None
+        self.scope = None
+        self.offline = offline
         self.s3_session = requests.Session()
+        self.file_cache = FileCache(cache_dir, self.s3_session, max_connections)
+        if not offline:
+            self._login()
         if scope_name:
             self.set_scope(scope_name)
-        else:
-            self.scope = None
+
+    def _login(self):
+        client = QDLClient()
+        self.client = client
+        client.login()
+
+    def set_offline(self, offline: bool):
+        self.offline = offline
+        if not offline and self.client is None:
+            self._login()
 
     def logout(self):
-        self.client.logout()
+        if self.client is not None:
+            self.client.logout()
 
     def set_scope(self, scope_name: str):
         sqdl_api = self.client.api
@@ -50,11 +73,40 @@ class DatasetReader:
         sqdl_api = self.client.api
         return [scope.name for scope in sqdl_api.scope.list()]
 
-    def load_ds_by_uuid(self, uuid) -> data_set:
+    def load_ds_by_uuid(self, uuid, refresh: bool = False) -> data_set:
         uid_str = str(int(uuid))
-        return xarray2ds(self.load_hdf5_by_uid(uid_str))
-
-    def load_hdf5_by_uid(self, uid: str) -> xr.Dataset:
+        return xarray2ds(self.load_hdf5_by_uid(uid_str, refresh))
+
+    def load_ds_by_uuids(self, uuids, refresh: bool = False, print_progress: bool = False) -> list[data_set]:
+        uids = [str(int(uuid)) for uuid in uuids]
+        paths = self.get_hdf5_files(uids, refresh, print_progress)
+        return [xarray2ds(xr.load_dataset(path)) for path in paths]
+
+    def load_hdf5_by_uid(self, uid: str, refresh: bool = False) -> xr.Dataset:
+        return xr.load_dataset(self.get_hdf5_file(uid, refresh))
+
+    def get_hdf5_file(self, uid: str, refresh: bool = False) -> str:
+        '''
+        Returns the path of the HDF5 file of the dataset in the cache.
+        The file is downloaded if it is not in the cache.
+
+        Args:
+            uid: uid of the dataset.
+            refresh: if True check whether the file has changed on the server.
+        '''
+        return self.file_cache.get_file(uid, self._get_hdf5_url, suffix='.hdf5',
+                                        offline=self.offline, refresh=refresh)
+
+    def get_hdf5_files(self, uids: list[str], refresh: bool = False, print_progress: bool = False) -> list[str]:
+        '''
+        Returns the paths of the HDF5 files of the datasets in the cache.
+        Missing files are downloaded in parallel.
+        '''
+        return self.file_cache.get_files([str(uid) for uid in uids], self._get_hdf5_url, suffix='.hdf5',
+                                         offline=self.offline, refresh=refresh,
+                                         print_progress=print_progress)
+
+    def _get_hdf5_url(self, uid: str) -> tuple[str, str]:
         if self.scope is None:
             raise Exception("sQDL connection must be configured with init_sqdl(scope_name)")
         sqdl_ds = self.scope.retrieve_dataset_from_uid(uid)
@@ -66,8 +118,7 @@ class DatasetReader:
             raise Exception(f"HDF5 file for uid '{uid}' not found")
         if not file.has_data:
             raise Exception(f"HDF5 file for uid '{file.name}' is not uploaded")
-        url = file.presigned_url
-        return self.load_hdf5_from_url(url)
+        return file.name, file.presigned_url
 
     def load_hdf5_from_url(self, url) -> xr.Dataset:
         resp = self.s3_session.request("GET", url)
@@ -75,17 +126,13 @@ class DatasetReader:
             return xr.load_dataset(fp)
 
     def download_hdf5_by_uid(self, uid: str, download_dir: str):
-        sqdl_ds = self.scope.retrieve_dataset_from_uid(uid)
-        sqdl_files = sqdl_ds.files
-        for file in sqdl_files:
-            if file.name.endswith('.hdf5'):
-                break
-        else:
-            raise Exception(f"HDF5 file for uid '{uid}' not found")
-        if not file.has_data:
-            raise Exception(f"HDF5 file for uid '{file.name}' is not uploaded")
-        url = file.presigned_url
-        return self.download_hdf5_from_url(url, download_dir, file.name)
+        path = self.get_hdf5_file(str(uid))
+        shutil.copyfile(path, os.path.join(download_dir, os.path.basename(path)))
+
+    def download_hdf5_by_uids(self, uids: list[str], download_dir: str, print_progress: bool = False):
+        paths = self.get_hdf5_files(uids, print_progress=print_progress)
+        for path in paths:
+            shutil.copyfile(path, os.path.join(download_dir, os.path.basename(path)))
 
     def download_hdf5_from_url(self, url: str, download_dir: str, file_name: str):
         resp = self.s3_session.request("GET", url)
@@ -148,8 +195,36 @@ def _get_dataset_reader():
     return _DATASET_READER
 
 
-def init_sqdl(scope_name: str):
-    _get_dataset_reader().set_scope(scope_name)
+def init_sqdl(scope_name: str | None = None,
+              cache_dir: str | None = None,
+              max_connections: int | None = None,
+              offline: bool = False):
+    """Initializes the sQDL connection.
+
+    Args:
+        scope_name: name of the sQDL scope.
+        cache_dir: directory to cache the downloaded files. Default ~/.cache/core_tools/sqdl.
+        max_connections: maximum number of parallel downloads. Default 8.
+        offline: if True only load datasets from the cache.
+
+    When sQDL is already initialized, the file cache is only replaced
+    if cache_dir or max_connections is specified.
+    """
+    global _DATASET_READER
+    if _DATASET_READER is None:
+        _DATASET_READER = DatasetReader(cache_dir=cache_dir,
+                                        max_connections=max_connections if max_connections is not None else 8,
+                                        offline=offline)
+    else:
+        if cache_dir is not None or max_connections is not None:
+            file_cache = _DATASET_READER.file_cache
+            _DATASET_READER.file_cache = FileCache(
+                cache_dir if cache_dir is not None else file_cache.cache_dir,
+                _DATASET_READER.s3_session,
+                max_connections if max_connections is not None else file_cache.max_connections)
+        _DATASET_READER.set_offline(offline)
+    if scope_name:
+        _DATASET_READER.set_scope(scope_name)
 
 
 def sqdl_logout():
@@ -194,23 +269,27 @@ def list_scopes():
     return _DATASET_READER.list_scopes()
 
 
-def load_by_uuid(uuid: str | int):
+def load_by_uuid(uuid: str | int, refresh: bool = False):
+    """Loads the dataset from the cache or sQDL.
+
+    Args:
+        uuid: uuid of the dataset.
+        refresh: if True check whether the dataset has changed on the server.
+    """
     reader = _get_dataset_reader()
-    if reader.scope is None:
-        raise Exception("sQDL connection must be configured with init_sqdl(scope_name)")
-    return reader.load_ds_by_uuid(uuid)
+    return reader.load_ds_by_uuid(uuid, refresh)
 
 
-def load_uuids_parallel(uuids: list[int | str], print_progress=True):
-    iterator = tqdm(uuids) if print_progress else uuids
-    with ThreadPoolExecutor() as executor:
-        return list(executor.map(load_by_uuid, iterator))
+def load_uuids_parallel(uuids: list[int | str], print_progress=True, refresh: bool = False):
+    """Loads the datasets from the cache or sQDL.
+    Datasets not in the cache are downloaded in parallel.
+    """
+    reader = _get_dataset_reader()
+    return reader.load_ds_by_uuids(uuids, refresh, print_progress)
 
 
 def download_hdf5(uuid: str | int, download_dir: str):
     reader = _get_dataset_reader()
-    if reader.scope is None:
-        raise Exception("sQDL connection must be configured with init_sqdl(scope_name)")
     reader.download_hdf5_by_uid(uuid, download_dir)
 
 
@@ -219,12 +298,4 @@ def download_hdf5_parallel(
         download_dir: str,
         print_progress=True):
     reader = _get_dataset_reader()
-    if reader.scope is None:
-        raise Exception("sQDL connection must be configured with init_sqdl(scope_name)")
-    iterator = tqdm(uuids) if print_progress else uuids
-    with ThreadPoolExecutor() as executor:
-        return list(
-            executor.map(
-                partial(reader.download_hdf5_by_uid, download_dir=download_dir),
-                iterator)
-            )
+    reader.download_hdf5_by_uids([str(int(uuid)) for uuid in uuids], download_dir, print_progress)
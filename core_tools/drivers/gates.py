@@ -45,6 +45,12 @@ class gates(qc.Instrument):
         self._virtual_gates = list()
         self._virt_gate_convertors = list()
         self._all_gate_names = list()
+        # last known real gate voltages. Used to compute virtual gate voltages
+        # and to notify the listeners without reading the hardware.
+        self._real_voltages = dict()
+        # last virtual gate voltages reported after a change of a virtual gate matrix.
+        self._virtual_voltages = dict()
+        self._value_listeners = list()
 
         # add gates:
         for gate_name, dac_location in self.hardware.dac_gate_map.items():
@@ -62,6 +68,7 @@ class gates(qc.Instrument):
             self._virt_gate_convertors.append(virt_gate_convertor)
             self._all_gate_names += virt_gate_convertor.virtual_gates
             self._virtual_gates += virt_gate_convertor.virtual_gates
+            virt_gate_set.add_change_listener(self._update_virtual_voltages)
             for v_gate_name in virt_gate_convertor.virtual_gates:
                 self.add_parameter(v_gate_name,
                                    set_cmd=partial(self._set_voltage_virt, v_gate_name, virt_gate_convertor),
@@ -71,6 +78,9 @@ class gates(qc.Instrument):
         self._projection_cache_matrices = []
         self._projection_cache_projection = None
 
+        for gate_name in self._real_gates:
+            self._real_voltages[gate_name] = self._get_voltage(gate_name)
+
     def get_idn(self):
         return dict(vendor='CoreTools',
                     model='gates',
@@ -105,6 +115,7 @@ class gates(qc.Instrument):
             dac_voltage = voltage
             logger.info(f'set {gate_name} {voltage:.1f} mV')
         self._dac_params[gate_name](dac_voltage)
+        self._update_real_voltages({gate_name: voltage})
 
     def _get_voltage(self, gate_name):
         '''
@@ -196,15 +207,101 @@ class gates(qc.Instrument):
             v_real = self._get_voltage(name)
             v[name] = v_real
             self.parameters[name].cache.set(v_real)
+        self._update_real_voltages(v)
+
+        for vg_name, vg_voltage in self._get_virtual_voltages(v).items():
+            v[vg_name] = vg_voltage
+            self.parameters[vg_name].cache.set(vg_voltage)
+
+        return v
+
+    def get_cached_voltages(self):
+        '''
+        Returns the last known voltages of all real and virtual gates.
+        The virtual gate voltages are computed from the cached real gate
+        voltages. The hardware is not accessed.
+        '''
+        v = dict(self._real_voltages)
+        v.update(self._get_virtual_voltages(v))
+        return v
+
+    def refresh(self):
+        '''
+        Reads the voltages of all real gates from the dacs, updates the
+        cached values of the gate parameters and notifies the listeners
+        of the changed values.
+        Use this to pick up changes made directly on the dacs or on the
+        virtual gate matrices.
+
+        Returns:
+            dict[str, float]: voltages of all real and virtual gates.
+        '''
+        v = {}
+        for name in self._real_gates:
+            dac_voltage = self._dac_params[name].get()
+            v[name] = dac_voltage * self.dc_gain.get(name, 1.0)
+            self.parameters[name].cache.set(v[name])
+        v_virtual = self._get_virtual_voltages(v)
+        for vg_name, vg_voltage in v_virtual.items():
+            self.parameters[vg_name].cache.set(vg_voltage)
+        self._update_real_voltages(v)
+        self._update_virtual_voltages()
+        v.update(v_virtual)
+        return v
 
+    def add_value_listener(self, callback):
+        '''
+        Adds a callback that is called after gate voltages have changed.
+
+        Args:
+            callback (Callable[[list[str]], None]):
+                called with the names of the changed gates. It can be
+                called from any thread that sets a gate.
+        '''
+        if callback not in self._value_listeners:
+            self._value_listeners.append(callback)
+
+    def remove_value_listener(self, callback):
+        try:
+            self._value_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _update_real_voltages(self, voltages):
+        changed = []
+        for name, voltage in voltages.items():
+            if self._real_voltages.get(name) != voltage:
+                self._real_voltages[name] = voltage
+                changed.append(name)
+        self._notify(changed)
+
+    def _update_virtual_voltages(self):
+        # A change of a virtual gate matrix changes the virtual gate voltages,
+        # but not the real gate voltages.
+        changed = []
+        for name, voltage in self._get_virtual_voltages(self._real_voltages).items():
+            if self._virtual_voltages.get(name) != voltage:
+                self._virtual_voltages[name] = voltage
+                changed.append(name)
+        self._notify(changed)
+
+    def _notify(self, changed):
+        if changed:
+            for callback in list(self._value_listeners):
+                try:
+                    callback(changed)
+                except Exception:
+                    logger.error(f'Error in gate value listener {callback}', exc_info=True)
+
+    def _get_virtual_voltages(self, real_voltages):
+        v = dict(real_voltages)
         for virt_gate_convertor in self._virt_gate_convertors:
-            real_voltages = [v[name] for name in virt_gate_convertor.real_gates]
-            virtual_voltages =  np.matmul(virt_gate_convertor.r2v_matrix, real_voltages)
+            # Note: a virtual gate matrix can use the virtual gates of a previous matrix.
+            voltages = [v[name] for name in virt_gate_convertor.real_gates]
+            virtual_voltages = np.matmul(virt_gate_convertor.r2v_matrix, voltages)
             for vg_name, vg_voltage in zip(virt_gate_convertor.virtual_gates, virtual_voltages):
                 v[vg_name] = vg_voltage
-                self.parameters[vg_name].cache.set(vg_voltage)
-
-        return v
+        return {name: v[name] for name in self._virtual_gates}
 
     def get_virtual_gate_projection(self):
         '''
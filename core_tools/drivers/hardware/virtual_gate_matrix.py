@@ -1,3 +1,5 @@
+import weakref
+
 import numpy as np
 
 class VirtualGateMatrixView:
@@ -57,6 +59,7 @@ class VirtualGateMatrix:
         # object shared with outside world reflecting the 'normalized' r2v matrix.
         self._norm_r2v_matrix = np.zeros(self._r2v_matrix.shape)
         self._calc_normalized()
+        self._change_listeners = []
 
     @property
     def name(self):
@@ -101,6 +104,7 @@ class VirtualGateMatrix:
         self._v2r_matrix[:] = np.linalg.inv(self._r2v_matrix)
         self._calc_normalized()
         self._persistent_object.save()
+        self._notify_change()
 
     @property
     def gates(self):
@@ -126,6 +130,7 @@ class VirtualGateMatrix:
 
         self._calc_normalized()
         self._persistent_object.save()
+        self._notify_change()
 
     def normalize(self):
         if self._normalization:
@@ -140,6 +145,21 @@ class VirtualGateMatrix:
             self._r2v_matrix[:] = np.linalg.inv(self._v2r_matrix)
             self._persistent_object.save()
 
+    def add_change_listener(self, callback):
+        '''
+        Adds a bound method that is called without arguments after the matrix has been changed.
+        Only a weak reference to the method is kept.
+        '''
+        self._change_listeners.append(weakref.WeakMethod(callback))
+
+    def _notify_change(self):
+        for ref in list(self._change_listeners):
+            callback = ref()
+            if callback is None:
+                self._change_listeners.remove(ref)
+            else:
+                callback()
+
     def _calc_normalized(self):
         no_norm = self._r2v_matrix
 
@@ -4,6 +4,8 @@ import time
 import threading
 from queue import PriorityQueue
 
+from core_tools.utility.status_bus import status_bus
+
 
 @dataclass(order=True)
 class ExperimentJob:
@@ -46,17 +48,21 @@ class queue_mgr():
                     if n_jobs != 0:
                         job_object = self.q.get()
                         print(f'{n_jobs} items queued. Starting next job')
+                        name = getattr(job_object.job, 'name', type(job_object.job).__name__)
+                        status_bus.publish('job_queue', 'started', name=name, n_queued=n_jobs-1)
                         try:
                             job_object.job.run()
                         except Exception as e:
                             print(f'{type(e).__name__} {e} in job. Continuing with next job.')
                             print(e)
+                            status_bus.publish('job_queue', 'error', name=name, message=f'{type(e).__name__} {e}')
                         finally:
                             self.q.task_done()
                             try:
                                 del self.job_refs[id(job_object)]
                             except KeyError:
                                 pass
+                            status_bus.publish('job_queue', 'stopped', name=name, n_queued=self.q.qsize())
                     else:
                         # 200ms sleep.
                         time.sleep(0.2)
@@ -2,6 +2,8 @@ from core_tools.data.SQL.connect import (
         SQL_conn_info_local,
         SQL_conn_info_remote,
         )
+from core_tools.data.SQL.dataset_cache import dataset_cache
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
 from core_tools.data.SQL.queries.dataset_gui_queries import query_for_samples
 
 from .config import get_configuration
@@ -44,10 +46,18 @@ def _config_local_db(readonly):
                         user, passwd, dbname,
                         readonly)
 
+def _config_dataset_cache():
+    cfg = get_configuration()
+    location = cfg.get('dataset_cache.location')
+    if location is not None:
+        dataset_cache.configure(location, cfg.get('dataset_cache.max_size_gb', 10.0))
+
 def _connect():
     global _connected
+    _config_dataset_cache()
     try:
-        # Querying automatically tries to connect to both connections.
+        # Connects to the databases and creates the tables.
+        SQL_database_manager()
         query_for_samples.get_projects()
         _connected = True
     except:
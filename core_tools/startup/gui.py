@@ -1,6 +1,3 @@
-import qcodes as qc
-from core_tools.GUI.qt_util import qt_init
-
 from .config import get_configuration
 
 
@@ -13,12 +10,14 @@ _script_runner = None
 
 
 def start_parameter_viewer(keysight_rf=None):
+    from core_tools.GUI.qt_util import qt_init
     from core_tools.GUI.param_viewer.param_viewer_GUI_main import param_viewer
 
     global _pv_qt
     gates = _get_gates()
     cfg = get_configuration()
     qt_init(style=cfg.get('gui.style'))
+    _config_gate_value_publisher(cfg)
     _pv_qt = param_viewer(
             gates,
             max_diff=cfg.get('max_diff'),
@@ -29,12 +28,14 @@ def start_parameter_viewer(keysight_rf=None):
 
 
 def start_parameter_viewer_qml():
+    from core_tools.GUI.qt_util import qt_init
     from core_tools.GUI.parameter_viewer_qml.param_viewer import param_viewer
 
     global _pv_qml
     gates = _get_gates()
     cfg = get_configuration()
     qt_init()
+    _config_gate_value_publisher(cfg)
     allow_mouse_wheel_updates = cfg.get('parameter_viewer_qml.allow_mouse_wheel_updates', True)
     _pv_qml = param_viewer(gates, allow_mouse_wheel_updates)
     _set_window_qml(_pv_qml, cfg, 'parameter_viewer_qml')
@@ -42,6 +43,7 @@ def start_parameter_viewer_qml():
 
 
 def start_virtual_matrix_gui(pulse):
+    from core_tools.GUI.qt_util import qt_init
     from core_tools.GUI.virt_gate_matrix.virt_gate_matrix_main import virt_gate_matrix_GUI
 
     global _vmg_qt
@@ -55,6 +57,7 @@ def start_virtual_matrix_gui(pulse):
 
 
 def start_virtual_matrix_gui_qml():
+    from core_tools.GUI.qt_util import qt_init
     from core_tools.GUI.virt_gate_matrix_qml.gui_controller import virt_gate_matrix_GUI
 
     global _vmg_qml
@@ -66,6 +69,7 @@ def start_virtual_matrix_gui_qml():
 
 
 def start_script_runner():
+    from core_tools.GUI.qt_util import qt_init
     from core_tools.GUI.script_runner.script_runner_main import ScriptRunner
 
     global _script_runner
@@ -77,6 +81,7 @@ def start_script_runner():
 
 
 def _get_station():
+    import qcodes as qc
     return qc.Station.default
 
 
@@ -87,6 +92,14 @@ def _get_gates():
         raise AttributeError('gates not added to station')
 
 
+def _config_gate_value_publisher(cfg):
+    from core_tools.GUI.gate_value_publisher import gate_value_publisher
+
+    gate_value_publisher.fallback_interval = cfg.get(
+            'parameter_viewer.fallback_poll_interval',
+            gate_value_publisher.fallback_interval)
+
+
 def _set_window(window, cfg, cfg_key):
     try:
         location = cfg[f'{cfg_key}.location']
@@ -0,0 +1,210 @@
+import html
+import time
+
+import numpy as np
+
+# Histogram bins: 4 bins per decade from 1 us to 100 s.
+HISTOGRAM_EDGES = 10.0 ** np.arange(-6, 2.01, 0.25)
+_SPARK_CHARS = ' ▁▂▃▄▅▆▇█'
+
+
+class ScanProfiler:
+    '''
+    Records a timeline of the actions of a Scan.
+
+    Every event is stored as (point, action, kind, t_start, t_end) with
+    times from time.perf_counter(). Kinds used by the Runner:
+        'set', 'readback', 'delay', 'get', 'store', 'flush', 'call',
+        'upload', 'play', 'finish'.
+    '''
+    def __init__(self):
+        self.events = []
+        self.t_start = None
+        self.t_stop = None
+        self.n_points = 0
+
+    def start(self):
+        self.t_start = time.perf_counter()
+
+    def stop(self, n_points):
+        self.t_stop = time.perf_counter()
+        self.n_points = n_points
+
+    def finish(self):
+        '''
+        Records the closing of the dataset after the scan loop.
+        '''
+        t_end = time.perf_counter()
+        self.add(self.n_points, 'dataset', 'finish', self.t_stop, t_end)
+        self.t_stop = t_end
+
+    def add(self, point, action, kind, t_start, t_end):
+        self.events.append((point, action, kind, t_start, t_end))
+
+    def timeline(self):
+        '''
+        Returns the timeline as dict with numpy arrays 'point', 'action', 'kind', 'start' and 'duration'.
+        Start times are relative to the start of the scan.
+        '''
+        if len(self.events) == 0:
+            return {'point': np.zeros(0, dtype=int), 'action': np.zeros(0, dtype=object),
+                    'kind': np.zeros(0, dtype=object), 'start': np.zeros(0), 'duration': np.zeros(0)}
+        point, action, kind, t_start, t_end = zip(*self.events)
+        t_start = np.array(t_start)
+        return {
+            'point': np.array(point),
+            'action': np.array(action, dtype=object),
+            'kind': np.array(kind, dtype=object),
+            'start': t_start - self.t_start,
+            'duration': np.array(t_end) - t_start,
+            }
+
+    def report(self):
+        '''
+        Aggregates the timeline per action and kind.
+        '''
+        durations = {}
+        for _, action, kind, t_start, t_end in self.events:
+            key = (action, kind)
+            try:
+                durations[key].append(t_end - t_start)
+            except KeyError:
+                durations[key] = [t_end - t_start]
+
+        entries = []
+        for (action, kind), values in durations.items():
+            values = np.array(values)
+            hist, _ = np.histogram(np.clip(values, HISTOGRAM_EDGES[0], HISTOGRAM_EDGES[-1]),
+                                   bins=HISTOGRAM_EDGES)
+            entries.append(ActionProfile(
+                action=action,
+                kind=kind,
+                n=len(values),
+                total=float(values.sum()),
+                mean=float(values.mean()),
+                min=float(values.min()),
+                p50=float(np.percentile(values, 50)),
+                p95=float(np.percentile(values, 95)),
+                max=float(values.max()),
+                histogram=hist.tolist(),
+                ))
+        duration = (self.t_stop or time.perf_counter()) - self.t_start
+        return ProfileReport(duration, self.n_points, entries)
+
+
+class ActionProfile:
+    def __init__(self, action, kind, n, total, mean, min, p50, p95, max, histogram):
+        self.action = action
+        self.kind = kind
+        self.n = n
+        self.total = total
+        self.mean = mean
+        self.min = min
+        self.p50 = p50
+        self.p95 = p95
+        self.max = max
+        self.histogram = histogram
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def sparkline(self):
+        '''
+        Histogram of the durations as string with one character per bin.
+        Only the bins between the first and last non-empty bin are shown.
+        '''
+        hist = np.array(self.histogram)
+        non_zero = np.nonzero(hist)[0]
+        if len(non_zero) == 0:
+            return ''
+        hist = hist[non_zero[0]:non_zero[-1]+1]
+        levels = np.ceil(hist / hist.max() * (len(_SPARK_CHARS)-1)).astype(int)
+        return ''.join(_SPARK_CHARS[level] for level in levels)
+
+
+class ProfileReport:
+    '''
+    Time per action of a Scan.
+
+    Args:
+        duration (float): total duration of the scan in seconds.
+        n_points (int): number of points of the scan.
+        entries (list[ActionProfile]): statistics per action and kind.
+    '''
+    def __init__(self, duration, n_points, entries):
+        self.duration = duration
+        self.n_points = n_points
+        self.entries = sorted(entries, key=lambda entry: -entry.total)
+
+    @property
+    def unaccounted(self):
+        '''
+        Time not spent in any recorded action, i.e. overhead of the scan loop.
+        '''
+        # events do not overlap.
+        return self.duration - sum(entry.total for entry in self.entries)
+
+    def get(self, action, kind=None):
+        '''
+        Returns the total time of the action in seconds.
+        If kind is None the time of all kinds is summed.
+        '''
+        return sum(entry.total for entry in self.entries
+                   if entry.action == action and (kind is None or entry.kind == kind))
+
+    def to_dict(self):
+        return {
+            'duration': self.duration,
+            'n_points': self.n_points,
+            'histogram_edges': HISTOGRAM_EDGES.tolist(),
+            'actions': [entry.to_dict() for entry in self.entries],
+            }
+
+    @staticmethod
+    def from_dict(data):
+        entries = [ActionProfile(**entry) for entry in data['actions']]
+        return ProfileReport(data['duration'], data['n_points'], entries)
+
+    def _rows(self):
+        for entry in self.entries:
+            yield (entry, entry.total/self.duration*100 if self.duration else 0.0)
+
+    def to_text(self):
+        lines = []
+        n_points = max(self.n_points, 1)
+        lines.append(f'Scan: {self.duration:.3f} s, {self.n_points} points '
+                     f'({self.duration/n_points*1000:.3f} ms/pt)')
+        lines.append(f"{'action':30} {'kind':9} {'n':>7} {'total [s]':>10} {'%':>6} "
+                     f"{'mean [ms]':>10} {'p95 [ms]':>10} {'max [ms]':>10}  histogram")
+        for entry, percentage in self._rows():
+            lines.append(f'{entry.action[:30]:30} {entry.kind:9} {entry.n:7d} {entry.total:10.3f} '
+                         f'{percentage:6.1f} {entry.mean*1000:10.3f} {entry.p95*1000:10.3f} '
+                         f'{entry.max*1000:10.3f}  {entry.sparkline()}')
+        unaccounted = self.unaccounted
+        lines.append(f"{'(loop overhead)':30} {'':9} {'':7} {unaccounted:10.3f} "
+                     f'{unaccounted/self.duration*100 if self.duration else 0.0:6.1f}')
+        return '\n'.join(lines)
+
+    def to_html(self):
+        n_points = max(self.n_points, 1)
+        rows = []
+        for entry, percentage in self._rows():
+            rows.append(
+                '<tr>'
+                f'<td>{html.escape(entry.action)}</td><td>{entry.kind}</td><td>{entry.n}</td>'
+                f'<td>{entry.total:.3f}</td>'
+                f'<td><div style="background:#4a90d9;width:{percentage:.1f}%">&nbsp;</div>{percentage:.1f}%</td>'
+                f'<td>{entry.mean*1000:.3f}</td><td>{entry.p95*1000:.3f}</td><td>{entry.max*1000:.3f}</td>'
+                f'<td style="font-family:monospace">{entry.sparkline()}</td>'
+                '</tr>')
+        header = ''.join(f'<th>{name}</th>' for name in
+                         ['action', 'kind', 'n', 'total [s]', '%', 'mean [ms]', 'p95 [ms]', 'max [ms]', 'histogram'])
+        return (f'<p>Scan: {self.duration:.3f} s, {self.n_points} points '
+                f'({self.duration/n_points*1000:.3f} ms/pt), loop overhead {self.unaccounted:.3f} s</p>'
+                f'<table><tr>{header}</tr>{"".join(rows)}</table>')
+
+    def _repr_html_(self):
+        return self.to_html()
+
+    def __str__(self):
+        return self.to_text()
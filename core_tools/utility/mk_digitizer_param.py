@@ -121,54 +121,59 @@ class _digitzer_post_selection_param(MultiParameter):
             self.n_corr_points = n_corr_points
             self.wanted_reference_value = wanted_reference_value
 
+        def _select_reference_points(self, data_orignal):
+            '''
+            Selects for every cycle the correction point with the reference level closest
+            to the wanted reference value. All cycles are processed at once.
+            On a tie the first point is selected. Points with a NaN reference level are
+            not selected. The result is NaN when all reference levels of a cycle are NaN.
+
+            Returns:
+                data_out (np.ndarray) : selected data corrected for the reference offset.
+                location (np.ndarray) : index of the selected correction point per cycle.
+            '''
+            n_cycles = self.shapes[0][0]
+            cycles = np.arange(n_cycles)
+
+            # if time steps present
+            if data_orignal.ndim == 2:
+                data_orignal_reshaped = data_orignal.reshape(n_cycles, self.n_corr_points, 2, self.shapes[0][1])
+                SD_level = np.average(data_orignal_reshaped[:, :, 1, :], axis=2)
+            else:
+                data_orignal_reshaped = data_orignal.reshape(n_cycles, self.n_corr_points, 2)
+                SD_level = data_orignal_reshaped[:, :, 1]
+
+            distance = np.abs(SD_level - self.wanted_reference_value)
+            distance[np.isnan(distance)] = np.inf
+            location = np.argmin(distance, axis=1)
+            _extra_offset = self.wanted_reference_value - SD_level[cycles, location]
+
+            selected = data_orignal_reshaped[cycles, location, 0]
+            if data_orignal.ndim == 2:
+                _extra_offset = _extra_offset[:, np.newaxis]
+
+            return selected + _extra_offset, location
+
         def get_raw(self):
             data_all = self.digitzer_measurement_param.get()
+            # 0 -> n
+            data_orignal = np.asarray(data_all[0])
+            data_corrected, location = self._select_reference_points(data_orignal)
 
             my_data = []
 
             for n in range(len(self.shapes)):
-
-                SD_level = np.empty((self.n_corr_points,))
-                # 0 -> n
-                data_orignal = data_all[0]
-                data_out = np.empty(self.shapes[0])
-                n_cycles = self.shapes[0][0]
-                
-                for i in range(n_cycles):
-                    # if time steps present
-                    if data_orignal.ndim == 2:
-                        data_orignal_reshaped = data_orignal.reshape(n_cycles, self.n_corr_points, 2, self.shapes[0][1] )
-                        SD_level = np.average(data_orignal_reshaped[i,:, 1, :], axis=1)
-                        SD_level_ref = np.copy(SD_level)
-                        SD_level -= self.wanted_reference_value
-                        SD_level = np.abs(SD_level)
-                        location = np.where(SD_level == np.min(SD_level))
-
-                        _extra_offset = self.wanted_reference_value - SD_level_ref[location[0]]
-
-                        data_out[i] = data_orignal_reshaped[i, location[0], 0, :] + _extra_offset
-                    else:
-                        data_orignal_reshaped = data_orignal.reshape(n_cycles, self.n_corr_points, 2)
-                        SD_level = data_orignal_reshaped[i,:, 1]
-                        SD_level_ref = np.copy(data_orignal_reshaped[i,:, 1])
-
-                        SD_level -= self.wanted_reference_value
-                        SD_level = np.abs(SD_level)
-                        location = np.where(SD_level == np.min(SD_level))
-                        
-                        _extra_offset = self.wanted_reference_value - SD_level_ref[location[0]]
-
-                        if n == 0:
-                            data_out[i] = data_orignal_reshaped[i, location[0], 0] + _extra_offset
-                        if n == 1:
-                            data_out[i] = location[0]
-                            # data_out[i] = data_orignal_reshaped[i, location[0], 0]
+                if data_orignal.ndim == 2 or n == 0:
+                    data_out = data_corrected.copy()
+                elif n == 1:
+                    data_out = location.astype(float)
+                else:
+                    data_out = np.empty(self.shapes[0])
                 my_data.append(data_out)
 
             return my_data
-     
-  
-        
+
+
 
 def post_process_SD_correction_data(digitizer_param, n_corr_points, wanted_reference_value, ):
     '''
@@ -93,6 +93,10 @@ class MappedMultiParameter(MultiParameter):
             'ch3_Phase':('ch3', 'angle_deg', 'degrees')
             }
         my_param2 = MappedMultiParameter(dig.measure, ch_map2)
+
+    Note:
+        Outputs with the same channel and function are evaluated only once.
+        'angle_deg' is derived from 'angle' when both are requested for the same channel.
     '''
     def __init__(self, name, parameter, channel_map):
         self.parameter = parameter
@@ -109,6 +113,9 @@ class MappedMultiParameter(MultiParameter):
                 'angle_deg': partial(np.angle, deg=True)}
 
         self.input_channels = {name:i for i,name in enumerate(parameter.names)}
+        # evaluation plan: list of (input channel number, function key) per output.
+        # The function key is the string name for the predefined conversions.
+        self._plan = []
 
         units = []
         names = []
@@ -130,6 +137,12 @@ class MappedMultiParameter(MultiParameter):
             setpoint_units.append(parameter.setpoint_units[nr])
             if isinstance(f, str):
                 self.channel_map[k] = (ch, str2func[f], *u)
+            self._plan.append((nr, f))
+        self._str2func = str2func
+        # evaluate per input channel with 'angle' before 'angle_deg' to reuse the result.
+        self._eval_order = sorted(
+            set(self._plan),
+            key=lambda item: (item[0], item[1] == 'angle_deg'))
 
         super().__init__(
             name=name, names=names,
@@ -141,11 +154,23 @@ class MappedMultiParameter(MultiParameter):
 
     def get_raw(self):
         data = self.parameter()
-        res = []
-        for ch, func, *unit in self.channel_map.values():
-            ch_data = data[self.input_channels[ch]]
-            res.append(func(ch_data))
+        results = {}
+        for nr, f in self._eval_order:
+            if f == 'angle_deg' and (nr, 'angle') in results:
+                results[(nr, f)] = np.degrees(results[(nr, 'angle')])
+            else:
+                func = self._str2func[f] if isinstance(f, str) else f
+                results[(nr, f)] = func(data[nr])
 
+        res = []
+        returned = set()
+        for item in self._plan:
+            value = results[item]
+            if item in returned:
+                # outputs are separate arrays. Do not return the same array twice.
+                value = np.array(value, copy=True)
+            returned.add(item)
+            res.append(value)
         return res
 
     def snapshot_base(self, update=True, params_to_skip_update=None):
@@ -0,0 +1,151 @@
+import copy
+import dataclasses
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'core_tools', 'plots')
+
+
+@dataclasses.dataclass
+class rendered_plot:
+	uuid : str
+	# path of the image per format
+	files : dict
+	# size of the images in inch
+	figure_size : tuple
+	cached : bool
+
+
+class batch_renderer:
+	'''
+	Renders plots of many datasets to image files.
+
+	The images are stored in cache_dir with a key of the dataset uuid and the
+	plot settings. Plots in the cache are not rendered again. The other plots
+	are rendered in worker processes on off-screen Agg figures. A figure is
+	cleared and reused for the next plot with the same layout.
+
+	Args:
+		cache_dir (str): directory for the images. Default ~/.cache/core_tools/plots.
+		formats (tuple[str]): image formats to render.
+		font_size (float): font size in points.
+		dpi (int): resolution of png images and rasterized data in svg images.
+		n_workers (int): number of worker processes. Default the number of CPUs.
+			If 0 the plots are rendered in this process.
+
+	Example:
+		>>> renderer = batch_renderer(formats=('png',))
+		>>> results = renderer.render([(ds.exp_uuid, plotter) for ds, plotter in plots])
+		>>> results[0].files['png']
+	'''
+	def __init__(self, cache_dir=None, formats=('svg', 'png'), font_size=6, dpi=300, n_workers=None):
+		self.cache_dir = cache_dir if cache_dir is not None else DEFAULT_CACHE_DIR
+		self.formats = tuple(formats)
+		self.font_size = font_size
+		self.dpi = dpi
+		self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+
+	def cache_key(self, uuid, plotter):
+		'''
+		Returns the key of the images of the plots in the cache.
+		The data of the plots is part of the key when uuid is None.
+		'''
+		h = hashlib.sha256()
+		h.update(repr((str(uuid), mpl.__version__, self.font_size, self.dpi)).encode())
+		_digest(h, plotter.plot_layout, uuid is None)
+		for single_plot in plotter.local_data.flat:
+			h.update(type(single_plot).__name__.encode())
+			_digest(h, vars(single_plot), uuid is None)
+		return h.hexdigest()
+
+	def render(self, plots):
+		'''
+		Returns the rendered images of the plots.
+
+		Args:
+			plots (list[tuple[str, plotter_1D or plotter_2D]]): uuid of the dataset and the plots.
+		Returns:
+			list[rendered_plot]: images in the same order as plots.
+		'''
+		results = []
+		jobs = []
+		for uuid, plotter in plots:
+			key = self.cache_key(uuid, plotter)
+			files = {fmt: os.path.join(self.cache_dir, f'{key}.{fmt}') for fmt in self.formats}
+			cached = all(os.path.exists(path) for path in files.values())
+			results.append(rendered_plot(uuid, files, plotter.figure_size(), cached))
+			if not cached:
+				jobs.append((_strip(plotter), files, self.font_size, self.dpi))
+
+		logger.info(f'Rendering {len(jobs)} of {len(results)} plots')
+		if jobs:
+			os.makedirs(self.cache_dir, exist_ok=True)
+			if self.n_workers == 0 or len(jobs) == 1:
+				_render_plots(jobs)
+			else:
+				n_workers = min(self.n_workers, len(jobs))
+				# a few chunks per worker to balance the load with little overhead.
+				chunk_size = -(-len(jobs) // (4*n_workers))
+				chunks = [jobs[i:i+chunk_size] for i in range(0, len(jobs), chunk_size)]
+				with ProcessPoolExecutor(n_workers) as executor:
+					list(executor.map(_render_plots, chunks))
+		return results
+
+
+def _strip(plotter):
+	# copy without the figure and axes of a previous render. They are not needed and costly to pickle.
+	plotter = copy.copy(plotter)
+	plotter.__dict__.pop('fig', None)
+	plotter.__dict__.pop('ax', None)
+	return plotter
+
+
+def _render_plots(jobs):
+	# figures per layout. They are not registered in pyplot and are freed on return.
+	figures = {}
+	for plotter, files, font_size, dpi in jobs:
+		layout = plotter.plot_layout
+		fig_key = (layout.n_plots_x, layout.n_plots_y)
+		fig = figures.get(fig_key)
+		if fig is None:
+			fig = Figure()
+			FigureCanvasAgg(fig)
+			figures[fig_key] = fig
+		plotter.render(font_size=font_size, dpi=dpi, fig=fig)
+		fig.tight_layout()
+		for fmt, path in files.items():
+			# write to a temporary file to never leave an incomplete image in the cache.
+			tmp_path = f'{path}.{os.getpid()}.tmp'
+			plotter._write(tmp_path, fmt)
+			os.replace(tmp_path, path)
+
+
+def _digest(h, value, include_data):
+	if isinstance(value, np.ndarray):
+		h.update(repr((value.shape, value.dtype.str)).encode())
+		if include_data:
+			h.update(np.ascontiguousarray(value).tobytes())
+	elif dataclasses.is_dataclass(value):
+		h.update(type(value).__name__.encode())
+		for field in dataclasses.fields(value):
+			h.update(field.name.encode())
+			_digest(h, getattr(value, field.name), include_data)
+	elif isinstance(value, dict):
+		for k, v in sorted(value.items()):
+			h.update(repr(k).encode())
+			_digest(h, v, include_data)
+	elif isinstance(value, (list, tuple)):
+		h.update(f'{type(value).__name__}{len(value)}'.encode())
+		for v in value:
+			_digest(h, v, include_data)
+	else:
+		h.update(repr(value).encode())
@@ -1,18 +1,38 @@
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 
+# conversion of the layout size in mm to inch.
+MM_TO_INCH = 0.0393
+
 class _data_plotter:
 	def __getitem__(self, idx):
 		if isinstance(idx, int):
-			return self.local_data.flat[idx] 
+			return self.local_data.flat[idx]
 		else:
 			#inverting indexes since matplotlib uses unverted indexes..
 			return self.local_data[idx[::-1]]
 
-	def render(self, scaler=1, font_size = 6, dpi = 150):
+	def figure_size(self, scaler=1):
+		'''
+		size of the figure in inch. Saved images have this size.
+		'''
+		layout = self.plot_layout
+		return (layout.size[0]*MM_TO_INCH*scaler, layout.size[1]*MM_TO_INCH*scaler)
+
+	def render(self, scaler=1, font_size = 6, dpi = 150, fig=None):
+		'''
+		Renders the plots on a new pyplot figure or on fig.
+		fig is cleared before rendering, so it can be reused for the next plot.
+		'''
 		self.__set_nature_settings(scaler, font_size)
 		layout = self.plot_layout
-		fig = plt.figure(figsize=(layout.size[0]*0.0393*scaler, layout.size[1]*0.0393*scaler), dpi=dpi)
+		if fig is None:
+			fig = plt.figure(figsize=self.figure_size(scaler), dpi=dpi)
+		else:
+			fig.clear()
+			fig.set_size_inches(self.figure_size(scaler))
+			fig.set_dpi(dpi)
+		self.fig = fig
 		if layout.n_plots_y == 1 and layout.n_plots_x == 1:
 			gs  = fig.add_gridspec(layout.n_plots_y,layout.n_plots_x)
 			self.ax = [[gs.subplots()]]
@@ -34,13 +54,29 @@ class _data_plotter:
 		self.render(1)
 		plt.show()
 
-	def save(self, location, font_size=6):
-		self.render(font_size=font_size, dpi=500)
-		plt.tight_layout()
-		plt.savefig(location,transparent=True, format="svg")
+	def save(self, location, font_size=6, format="svg", dpi=500, fig=None):
+		'''
+		Saves the plots to location.
+
+		Args:
+			location (str or file): file to write.
+			font_size (float): font size in points.
+			format (str): image format, e.g. 'svg' or 'png'.
+			dpi (int): resolution of the rasterized data.
+			fig (matplotlib.figure.Figure): figure to reuse. See render.
+		'''
+		self.render(font_size=font_size, dpi=dpi, fig=fig)
+		self.fig.tight_layout()
+		self._write(location, format)
+
+	def _write(self, location, format):
+		# fixed metadata and ids to get the same file for the same plots.
+		metadata = {'Date': None} if format == 'svg' else None
+		with mpl.rc_context({'svg.hashsalt': 'core_tools'}):
+			self.fig.savefig(location, transparent=True, format=format, metadata=metadata)
 
 	def __set_nature_settings(self, scaler=1, font_size=6):
 		mpl.rcParams['font.family'] = 'Helvetica'
 		plt.rcParams['font.size'] = font_size*scaler
 		plt.rcParams['axes.linewidth'] = 1*scaler
-		plt.rcParams['svg.fonttype'] = 'none'
\ No newline at end of file
+		plt.rcParams['svg.fonttype'] = 'none'
@@ -1,12 +1,7 @@
-import matplotlib
-import qcodes
 import tempfile
 import logging
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import OrderedDict
-from matplotlib.widgets import Button
-from PyQt5 import QtGui, QtWidgets
 
 logger = logging.getLogger(__name__)
 
@@ -51,28 +46,45 @@ def set_ppt_slide_background(slide, color, verbose=0):
     fore_color.RGB = ppt_color
 
 
-def _ppt_determine_image_position(ppt, figsize, fname, verbose=0):
+def _ppt_determine_image_position(ppt, figsize, fname, verbose=0, image_size=None):
+    """ Returns left, top, width and height of the image on the slide.
+
+    Args:
+        ppt (object): PowerPoint COM object for the presentation.
+        figsize (None or list): size (width,height) of the image on the slide.
+        fname (str): image file. Only read when figsize and image_size are None.
+        image_size (None or list): size (width,height) of the image in any unit.
+    """
+    slidewh = [ppt.PageSetup.SlideWidth, ppt.PageSetup.SlideHeight]
+    if figsize is None and image_size is None:
+        try:
+            import cv2
+            shape = cv2.imread(fname).shape
+            image_size = shape[1], shape[0]
+        except:
+            image_size = None
+    return _image_position(slidewh, figsize, image_size, verbose)
+
+
+def _image_position(slidewh, figsize=None, image_size=None, verbose=0):
+    """ Returns left, top, width and height in points of an image on a slide of size slidewh.
+
+    The image gets the aspect ratio of image_size if figsize is None.
+    """
     top = 120
 
     if figsize is not None:
-        left = (ppt.PageSetup.SlideWidth - figsize[0]) / 2
+        left = (slidewh[0] - figsize[0]) / 2
         width = figsize[0]
         height = figsize[1]
     else:
-        slidewh = [ppt.PageSetup.SlideWidth, ppt.PageSetup.SlideHeight]
         width = 16 * ((slidewh[0] * .75) // 16)
         height = 16 * (((slidewh[1] - 120) * .9) // 16)
         height = min(height, 350)
         left = (slidewh[0] - width) / 2
 
-        try:
-            import cv2
-            shape = cv2.imread(fname).shape
-            imwh = shape[1], shape[0]
-        except:
-            imwh = None
-        if imwh is not None:
-            imratio = imwh[0] / imwh[1]
+        if image_size is not None:
+            imratio = image_size[0] / image_size[1]
             slideratio = slidewh[0] / slidewh[1]
             if verbose > 1:
                 print(f' image aspect ratio {imratio:.2f}, slide aspect ratio {slideratio:.2f}')
@@ -111,6 +123,9 @@ def create_figure_ppt_callback(fig, title=None, notes=None, position=(0.9, 0.925
         >>> create_figure_ppt_callback(10, 'test')
         >>> plt.show()
     """
+    import matplotlib.pyplot as plt
+    from matplotlib.widgets import Button
+
     plt.figure(fig)
     ax = plt.gca()
     ppt_axis = plt.axes(position)
@@ -128,6 +143,43 @@ def create_figure_ppt_callback(fig, title=None, notes=None, position=(0.9, 0.925
     ppt_button.on_clicked(figure_ppt_callback)
 
 
+def create_pptx(filename, images, image_sizes, titles=None, notes=None):
+    """ Write a PowerPoint file with a slide per image using python-pptx.
+
+    The images are not read to determine their size. The slides get the same
+    layout as the slides of @ref addPPTslide.
+
+    Args:
+        filename (str): pptx file to write.
+        images (list[str]): png or jpg files.
+        image_sizes (list[tuple]): size (width,height) of the images in any unit,
+            e.g. the size in inch of the rendered figures.
+        titles (None or list[str]): titles of the slides.
+        notes (None or list[str]): notes added to the slides.
+
+    Example:
+        >>> results = batch_renderer(formats=('png',)).render(plots)
+        >>> create_pptx('report.pptx', [r.files['png'] for r in results],
+                        [r.figure_size for r in results])
+    """
+    from pptx import Presentation
+    from pptx.util import Pt
+
+    # 'Title Only' layout of the default template
+    layout_title_only = 5
+
+    prs = Presentation()
+    slidewh = [prs.slide_width.pt, prs.slide_height.pt]
+    for i, (image, image_size) in enumerate(zip(images, image_sizes)):
+        slide = prs.slides.add_slide(prs.slide_layouts[layout_title_only])
+        slide.shapes.title.text = titles[i] if titles is not None else 'QCoDeS measurement'
+        left, top, width, height = _image_position(slidewh, image_size=image_size)
+        slide.shapes.add_picture(image, Pt(left), Pt(top), Pt(width), Pt(height))
+        if notes is not None and notes[i]:
+            slide.notes_slide.notes_text_frame.text = notes[i]
+    prs.save(filename)
+
+
 try:
     import win32com
     import win32com.client
@@ -238,12 +290,20 @@ try:
             slide.shapes.title.textframe.textrange.text = 'QCoDeS measurement'
 
         if fig is not None:
+            # import here to avoid loading matplotlib, Qt and qcodes when not needed.
+            import matplotlib
+            import matplotlib.pyplot as plt
+            import qcodes
+            from PyQt5 import QtGui, QtWidgets
+
             fname = tempfile.mktemp(prefix='qcodesimageitem', suffix='.png')
-            if isinstance(fig, matplotlib.figure.Figure):
-                fig.savefig(fname)
-            elif isinstance(fig, int):
+            # size of the saved image, if known.
+            image_size = None
+            if isinstance(fig, int):
                 fig = plt.figure(fig)
+            if isinstance(fig, matplotlib.figure.Figure):
                 fig.savefig(fname)
+                image_size = fig.get_size_inches()
             elif isinstance(fig, QtWidgets.QWidget):
                 try:
                     figtemp = QtGui.QPixmap.grabWidget(fig)
@@ -258,7 +318,7 @@ try:
                     raise TypeError(f'figure is of an unknown type {type(fig)}')
             top = 120
 
-            left, top, width, height = _ppt_determine_image_position(ppt, figsize, fname)
+            left, top, width, height = _ppt_determine_image_position(ppt, figsize, fname, image_size=image_size)
 
             if verbose >= 2:
                 print(f'fname {fname}')
@@ -274,14 +334,16 @@ try:
 
         if notes is None:
             logger.warn('Please set notes for the powerpoint slide.')
-        if isinstance(notes, qcodes.Station):
-            station = notes
-            gates = getattr(station, 'gates', None)
-            notes = reshape_metadata_station(station)
-            if extranotes is not None:
-                notes = '\n' + extranotes + '\n' + notes
-            if gates is not None:
-                notes = 'gates: ' + str(gates.allvalues()) + '\n\n' + notes
+        if notes is not None and not isinstance(notes, str):
+            import qcodes
+            if isinstance(notes, qcodes.Station):
+                station = notes
+                gates = getattr(station, 'gates', None)
+                notes = reshape_metadata_station(station)
+                if extranotes is not None:
+                    notes = '\n' + extranotes + '\n' + notes
+                if gates is not None:
+                    notes = 'gates: ' + str(gates.allvalues()) + '\n\n' + notes
 
         if notes is not None:
             if notes == '':
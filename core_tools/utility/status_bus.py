@@ -0,0 +1,137 @@
+'''
+In-process bus for the status of measurements and video mode.
+
+Producers publish state transitions with `status_bus.publish(source, state, **info)`.
+The states are 'started', 'paused', 'stopped', 'progress' and 'error'.
+Used sources are:
+    'video_mode': liveplotting. info: mode ('1D', '2D').
+    'scan': Scan. info: name, n_pts, n (progress), message (error).
+    'job_queue': queue_mgr jobs. info: name, n_queued, message (error).
+
+Publishing never blocks on a subscriber. A subscriber is woken up once
+and collects the new events with `poll()` in its own thread. 'progress'
+events are coalesced: a subscriber only gets the last progress of a
+source. Other events are kept in order, up to `max_events` per subscriber.
+Qt widgets should use `core_tools.GUI.status_subscriber`, which delivers
+the events in the GUI thread with a queued signal.
+'''
+import itertools
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+
+@dataclass
+class status_event:
+    source: str
+    state: str
+    info: dict = field(default_factory=dict)
+    time: float = 0.0
+    # sequence number of the event on the bus
+    seq: int = 0
+
+
+class status_subscription:
+    '''
+    Subscription on the status bus. Created by `status_bus.subscribe`.
+    '''
+    max_events = 1000
+
+    def __init__(self, bus, wakeup, sources):
+        self._bus = bus
+        self._wakeup = wakeup
+        self.sources = frozenset(sources) if sources is not None else None
+        self._events = deque(maxlen=self.max_events)
+        self._pending = False
+        self._last_seq = {}
+
+    def _notify(self, event):
+        # called in the thread of the producer.
+        if event.state != 'progress':
+            self._events.append(event)
+        if not self._pending:
+            self._pending = True
+            self._wakeup()
+
+    def poll(self) -> list[status_event]:
+        '''
+        Returns the events published since the last poll in order of publication.
+        '''
+        # clear the flag before reading: events published from now on wake up again.
+        self._pending = False
+        # read the progress before the queue. A queued event with a lower sequence
+        # number than the progress has been queued before the progress was read.
+        progress = [event for event in self._bus.get_status()
+                    if event.state == 'progress' and self._accepts(event.source)]
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+
+        last_seq = self._last_seq
+        for event in progress:
+            # progress is delivered once.
+            if event.seq > last_seq.get(event.source, -1):
+                last_seq[event.source] = event.seq
+                events.append(event)
+        events.sort(key=lambda event: event.seq)
+        return events
+
+    def _accepts(self, source):
+        return self.sources is None or source in self.sources
+
+
+class _status_bus:
+    def __init__(self):
+        self._states = {}
+        self._subscriptions = ()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def publish(self, source: str, state: str, **info):
+        '''
+        Publishes the state of source.
+
+        Args:
+            source: name of the producer, e.g. 'scan'.
+            state: 'started', 'paused', 'stopped', 'progress' or 'error'.
+            info: additional information for the subscribers.
+        '''
+        event = status_event(source, state, info, time.time(), next(self._seq))
+        self._states[source] = event
+        for subscription in self._subscriptions:
+            if subscription.sources is None or source in subscription.sources:
+                subscription._notify(event)
+
+    def get_status(self, source: str | None = None) -> status_event | list[status_event] | None:
+        '''
+        Returns the last event of source, or a list with the last event of all sources.
+        '''
+        if source is not None:
+            return self._states.get(source)
+        return list(self._states.values())
+
+    def subscribe(self,
+                  wakeup: Callable[[], None],
+                  sources: list[str] | None = None) -> status_subscription:
+        '''
+        Subscribes to the events of sources, or all sources if None.
+
+        Args:
+            wakeup: function called in the thread of the producer when new
+                events are available. It must return immediately.
+                It is called again after the next poll of the subscription.
+            sources: names of the sources to subscribe to.
+        '''
+        subscription = status_subscription(self, wakeup, sources)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: status_subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+
+status_bus = _status_bus()
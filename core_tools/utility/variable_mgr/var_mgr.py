@@ -3,7 +3,7 @@ from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
 
 
 from core_tools.utility.variable_mgr.var_mgr_sql import var_sql_queries
-from core_tools.utility.variable_mgr.qml.gui_controller import GUI_controller
+from contextlib import contextmanager
 import psycopg2
 
 class variable_descriptor:
@@ -20,10 +20,14 @@ class variable_descriptor:
         return obj.vars[self.name]
 
     def __set__(self, obj, value):
-        all_vals, last_id = var_sql_queries.update_val(variable_mgr().conn_local, self.name, value)
+        if obj._batch is not None:
+            obj._batch[self.name] = value
+            obj.vars[self.name] = value
+            return
+        var_sql_queries.update_val(variable_mgr().conn_local, self.name, value)
 
+        obj.vars[self.name] = value
         obj.update_GUI()
-        obj.vars = dict(all_vals)
 
     @property
     def value(self):
@@ -54,6 +58,7 @@ class variable_mgr():
             self.conn_local = SQL_database_manager().conn_local
 
             self.__GUI = None
+            self._batch = None
             self.data = dict()
             self.vars = dict()
             self.__load_variables()
@@ -80,7 +85,47 @@ class variable_mgr():
             self.add_variable(item['category'], item['name'], item['unit'], item['step'], skip_init=True)
         self.vars = var_sql_queries.get_all_values(self.conn_local)
 
+    def refresh(self):
+        '''
+        Reloads the values of all variables from the database,
+        e.g. after an update by another process.
+        '''
+        self.vars = var_sql_queries.get_all_values(self.conn_local)
+        self.update_GUI()
+
+    @contextmanager
+    def batch(self):
+        '''
+        Context manager to update multiple variables with a single
+        database transaction and a single GUI update.
+        The new values are stored when the context exits without exception.
+        On an exception all values are restored and the transaction is rolled back.
+
+        Example:
+            with var_mgr.batch():
+                var_mgr.SD1_P_on = 12.1
+                var_mgr.SD1_P_off = 8.4
+        '''
+        if self._batch is not None:
+            # nested batch: values are stored by outer batch
+            yield
+            return
+        self._batch = {}
+        old_values = dict(self.vars)
+        try:
+            yield
+            var_sql_queries.update_values(self.conn_local, self._batch)
+        except BaseException:
+            self.vars = old_values
+            if not self.conn_local.closed:
+                self.conn_local.rollback()
+            raise
+        finally:
+            self._batch = None
+        self.update_GUI()
+
     def show(self):
+        from core_tools.utility.variable_mgr.qml.gui_controller import GUI_controller
         self.__GUI = GUI_controller(self.data)
 
     def update_GUI(self):
@@ -98,15 +143,25 @@ class variable_mgr():
             self.data[category][name] = my_desc
             setattr(self, name, my_desc)
             if skip_init == False:
-                self.vars = var_sql_queries.get_all_values(self.conn_local)
+                self.vars[name] = value
                 if self.__GUI is not None:
                     self.__GUI.set_data()
         else:
             print(f'trying to add variable {name} that is already there')
 
-    def get_history(self, variable_name):
+    def get_history(self, variable_name, start=None, stop=None, bucket=None):
+        '''
+        Returns time and values of the variable.
+
+        Args:
+            variable_name (str): name of the variable
+            start (datetime): if not None only return values set at or after start
+            stop (datetime): if not None only return values set before stop
+            bucket (float or timedelta): if not None return the average value per time bucket of this size (seconds).
+        '''
         if hasattr(self, variable_name):
-            return var_sql_queries.get_history(variable_mgr().conn_local, variable_name)
+            return var_sql_queries.get_history(variable_mgr().conn_local, variable_name,
+                                               start=start, stop=stop, bucket=bucket)
         else:
             print(f'trying to fetch history of a variable {variable_name} that does not exist.')
 
@@ -156,7 +211,7 @@ if __name__ == '__main__':
         os.mkdir('C:/users/V2/Desktop/calibration_data')
     except:
         pass
-    for var in list(t.vars.keys())[2:]:
+    for var in list(t.vars.keys()):
         x,y = t.get_history(var)
         plt.title(var)
         plt.figure(figsize=(8, 6), dpi=80)
@@ -1,5 +1,5 @@
 from core_tools.data.SQL.connect import sample_info
-from core_tools.data.SQL.SQL_common_commands import insert_row_in_table, update_table, select_elements_in_table, execute_statement, alter_table, execute_query
+from core_tools.data.SQL.SQL_common_commands import insert_row_in_table, select_elements_in_table, execute_statement, execute_query
 from psycopg2.extras import RealDictCursor
 from psycopg2 import sql
 
@@ -20,25 +20,72 @@ class var_sql_queries:
         statement += "category text NOT NULL );"
         execute_statement(conn, statement)
 
-        statement = "CREATE TABLE if not EXISTS {} (id SERIAL, insert_time TIMESTAMP );".format(
-            var_sql_queries.gen_table_content_name())
+        history_table = var_sql_queries.gen_table_history_name()
+        res = execute_query(conn, "SELECT to_regclass(%s);", placeholders=[history_table.lower()])
+        history_exists = res[0][0] is not None
+
+        statement = "CREATE TABLE if not EXISTS {} (".format(history_table)
+        statement += "id BIGSERIAL PRIMARY KEY,"
+        statement += "name text NOT NULL,"
+        statement += "insert_time TIMESTAMP NOT NULL,"
+        statement += "value FLOAT8 );"
+        execute_statement(conn, statement)
+        statement = "CREATE INDEX IF NOT EXISTS {0}_name_time ON {0} (name, insert_time);".format(history_table)
         execute_statement(conn, statement)
 
+        if not history_exists:
+            var_sql_queries.migrate_content_table(conn)
+        var_sql_queries.init_missing_values(conn)
+
         conn.commit()
 
+    @staticmethod
+    def init_missing_values(conn, value=0):
+        '''
+        Stores value for the variables without history, e.g. variables
+        that were never set in the old table.
+        '''
+        statement = ("INSERT INTO {1} (name, insert_time, value) "
+                     "SELECT o.name, %s, %s FROM {0} o "
+                     "WHERE NOT EXISTS (SELECT 1 FROM {1} h WHERE h.name = o.name);").format(
+                             var_sql_queries.gen_table_overview_name(),
+                             var_sql_queries.gen_table_history_name())
+        execute_statement(conn, statement, [datetime.datetime.now(), value])
+
+    @staticmethod
+    def migrate_content_table(conn):
+        '''
+        Copies the history of the old table with a column per variable to the history table.
+        Only the changes of the values are copied.
+        '''
+        content_table = var_sql_queries.gen_table_content_name()
+        res = execute_query(conn, "SELECT to_regclass(%s);", placeholders=[content_table.lower()])
+        if res[0][0] is None:
+            return
+        res = execute_query(conn,
+                            "SELECT column_name FROM information_schema.columns WHERE table_name = %s;",
+                            placeholders=[content_table.lower()])
+        names = [row[0] for row in res if row[0] not in ('id', 'insert_time')]
+        for name in names:
+            statement = sql.SQL(
+                    "INSERT INTO {history} (name, insert_time, value) "
+                    "SELECT %s, insert_time, value FROM ("
+                    "SELECT id, insert_time, {column} AS value, "
+                    "lag({column}) OVER (ORDER BY id) AS previous FROM {content}) AS t "
+                    "WHERE value IS NOT NULL AND (previous IS NULL OR value <> previous) "
+                    "ORDER BY id;").format(
+                            history=sql.SQL(var_sql_queries.gen_table_history_name()),
+                            content=sql.SQL(content_table),
+                            column=sql.Identifier(name))
+            execute_statement(conn, statement, [name])
+
     @staticmethod
     def add_variable(conn, name, unit, category, step, value=0):
-        # this will be the line where we set the value
-        vals, last_update_id = var_sql_queries.update_val(conn, name=None, value=None)
         res = select_elements_in_table(conn, var_sql_queries.gen_table_overview_name(), ('name', ), where=('name', name))
 
         if len(res) == 0:
             insert_row_in_table(conn,  var_sql_queries.gen_table_overview_name(),  ('name', 'unit', 'category', 'step'), (name, unit, category, step))
-            alter_table(conn, var_sql_queries.gen_table_content_name(), (name, ), ('FLOAT8',))
-
-            update_table(conn, var_sql_queries.gen_table_content_name(), (name,), (value,), condition=('id', last_update_id))
-            conn.commit()
-
+            var_sql_queries.update_values(conn, {name: value})
         else:
             print('Variable {} already present, skipping.'.format(name))
 
@@ -46,85 +93,116 @@ class var_sql_queries:
         return select_elements_in_table(conn, var_sql_queries.gen_table_overview_name(), ('*', ), dict_cursor=RealDictCursor)
 
     def get_all_values(conn):
-        res = select_elements_in_table(conn, var_sql_queries.gen_table_content_name(), ('*',),
-            order_by=('id','DESC'), limit=100, dict_cursor=RealDictCursor)
+        '''
+        Returns the last value of all variables.
 
-        if len(res) == 0:
-            return {}
-        return res[0]
+        Returns:
+            dict(variable_name, value)
+        '''
+        return var_sql_queries.get_values_at(conn, None)
 
-    def get_history(conn, variable_name):
+    def get_history(conn, variable_name, start=None, stop=None, bucket=None):
         '''
-        get the full history of a certain variable
+        get the history of a certain variable
 
         Args:
             variable_name (str) : name of the variable to fetch
+            start (datetime) : if not None only return values set at or after start
+            stop (datetime) : if not None only return values set before stop
+            bucket (float or timedelta) : if not None return the average value per time bucket of this size (seconds).
 
         Returns:
             time, values : returns the time and associated values of the requested parameter
         '''
-        data = []
-        for name in [sql.Identifier('insert_time'),sql.Identifier(variable_name)]:
-            query = sql.SQL("select {0} from {1} ").format( sql.SQL(', ').join([name]),
-                                    sql.SQL(var_sql_queries.gen_table_content_name()))
-            query += sql.SQL("WHERE {0} IS NOT NULL ").format(sql.Identifier(variable_name))
-            query += sql.SQL("ORDER BY {0} {1} ").format(sql.Identifier('id'), sql.SQL('ASC'))
+        if isinstance(bucket, datetime.timedelta):
+            bucket = bucket.total_seconds()
 
-            data += [np.array(execute_query(conn, query))]
+        if bucket is None:
+            query = "SELECT insert_time, value FROM {} "
+        else:
+            query = ("SELECT to_timestamp(floor(extract(epoch FROM insert_time) / %s) * %s) AT TIME ZONE 'UTC' AS t, "
+                     "avg(value) FROM {} ")
+        query = query.format(var_sql_queries.gen_table_history_name())
+        params = [bucket, bucket] if bucket is not None else []
+
+        query += "WHERE name = %s AND value IS NOT NULL AND value <> 'NaN' "
+        params.append(variable_name)
+        if start is not None:
+            query += "AND insert_time >= %s "
+            params.append(start)
+        if stop is not None:
+            query += "AND insert_time < %s "
+            params.append(stop)
+
+        if bucket is None:
+            query += "ORDER BY insert_time, id;"
+        else:
+            query += "GROUP BY t ORDER BY t;"
 
-        return data[0][~np.isnan(data[1])], data[1][~np.isnan(data[1])]
+        res = execute_query(conn, query, placeholders=params)
+        time = np.empty(len(res), dtype=object)
+        time[:] = [row[0] for row in res]
+        values = np.array([row[1] for row in res], dtype=float)
+        return time, values
 
     def get_values_at(conn, time):
         '''
         Returns values of all variable at specified time.
 
         Args:
-            time (datetime) : time
+            time (datetime) : time. If None the last values are returned.
 
         Returns:
-            dict(variable_name, value)
+            dict(variable_name, value) : value is None if the variable had no value at time.
         '''
-        query = f"SELECT max(insert_time) FROM {var_sql_queries.gen_table_content_name()} "
-        query += f"WHERE insert_time < '{time}'"
-
-        res = execute_query(conn, query)
-        print(res)
-        insert_time = res[0]
-
-        res = select_elements_in_table(conn, var_sql_queries.gen_table_content_name(), ('*',),
-            where=('insert_time', insert_time), order_by=('id','desc'),
-            limit=1, dict_cursor=RealDictCursor)
-        res = dict(res[0])
-        del res['id']
-        return res
-
-    def update_val(conn, name , value):
-        all_vals = var_sql_queries.get_all_values(conn)
-        if name is not None:
-            all_vals[name] = value
-        if all_vals is None:
-            all_vals = dict()
-
-        all_vals.pop('id', None)
-        all_vals['insert_time'] = to_postgres_time(datetime.datetime.now())
+        query = (
+            "SELECT o.name, h.value FROM {0} o "
+            "LEFT JOIN LATERAL (SELECT value FROM {1} WHERE name = o.name {2}"
+            "ORDER BY insert_time DESC LIMIT 1) h ON true;"
+            ).format(var_sql_queries.gen_table_overview_name(),
+                     var_sql_queries.gen_table_history_name(),
+                     "AND insert_time < %s " if time is not None else "")
+        params = [time] if time is not None else []
+        res = execute_query(conn, query, placeholders=params)
+        return dict(res)
+
+    def update_values(conn, values):
+        '''
+        Stores the new values of the variables in the history.
 
-        my_id = insert_row_in_table(conn, var_sql_queries.gen_table_content_name(), tuple(all_vals.keys()), tuple(all_vals.values()), returning=('id', ))[0]
+        Args:
+            values (dict(variable_name, value)) : values to store
+        '''
+        if len(values) == 0:
+            return
+        insert_time = datetime.datetime.now()
+        statement = "INSERT INTO {} (name, insert_time, value) VALUES ".format(
+            var_sql_queries.gen_table_history_name())
+        statement += ", ".join(["(%s, %s, %s)"]*len(values)) + ";"
+        params = []
+        for name, value in values.items():
+            params += [name, insert_time, value]
+        execute_statement(conn, statement, params)
         conn.commit()
 
-        return all_vals, my_id
+    def update_val(conn, name , value):
+        var_sql_queries.update_values(conn, {name: value})
 
     def remove_variable(conn, variable_name):
         statement_1 = sql.SQL("DELETE FROM {} WHERE {} = {} returning name").format(sql.SQL(var_sql_queries.gen_table_overview_name()), sql.Identifier('name'),sql.Literal(variable_name))
-        statement_2 = sql.SQL("ALTER TABLE {} DROP COLUMN IF EXISTS {}").format(sql.SQL(var_sql_queries.gen_table_content_name()), sql.Identifier(variable_name))
+        statement_2 = sql.SQL("DELETE FROM {} WHERE {} = {}").format(sql.SQL(var_sql_queries.gen_table_history_name()), sql.Identifier('name'),sql.Literal(variable_name))
         res = execute_query(conn, statement_1)
         execute_statement(conn, statement_2)
+        conn.commit()
 
         if len(res) == 0:
             print('Nothing to remove. {} is not present in the database?'.format(variable_name))
 
     def change_column_name(conn, old, new):
-        statement = sql.SQL('ALTER TABLE {} RENAME COLUMN {} TO {};').format(sql.SQL(var_sql_queries.gen_table_content_name()), sql.Identifier(old), sql.Identifier(new))
-        execute_statement(conn, statement)
+        for table in [var_sql_queries.gen_table_overview_name(), var_sql_queries.gen_table_history_name()]:
+            statement = sql.SQL('UPDATE {} SET name = {} WHERE name = {};').format(
+                    sql.SQL(table), sql.Literal(new), sql.Literal(old))
+            execute_statement(conn, statement)
         conn.commit()
 
     @staticmethod
@@ -135,6 +213,10 @@ class var_sql_queries:
     def gen_table_content_name():
         return ('_'+sample_info.project+'_'+sample_info.set_up+'_'+sample_info.sample + "__variables_content").replace(" ", "_").replace('-', '_')
 
+    @staticmethod
+    def gen_table_history_name():
+        return ('_'+sample_info.project+'_'+sample_info.set_up+'_'+sample_info.sample + "__variables_history").replace(" ", "_").replace('-', '_')
+
 if __name__ == '__main__':
     from core_tools.data.SQL.connect import set_up_local_storage, set_up_remote_storage
     from core_tools.utility.variable_mgr.var_mgr import variable_mgr
@@ -0,0 +1,119 @@
+'''
+Benchmark of opening a dataset with many parameters.
+
+Builds a synthetic data_set_raw in memory, i.e. without database, and
+times the construction of the data_set and the access of attributes.
+The time per parameter should be constant.
+'''
+import time
+
+import numpy as np
+
+from core_tools.data.SQL.buffer_writer import buffer_reference
+from core_tools.data.ds.data_set_core import data_set
+from core_tools.data.ds.data_set_raw import data_set_raw, m_param_raw
+
+
+def make_param(param_id, nth_set, nth_dim, m_param_id, setpoint, setpoint_local,
+               name, dependency, data):
+    param = m_param_raw(
+        param_id=param_id,
+        nth_set=nth_set,
+        nth_dim=nth_dim,
+        param_id_m_param=m_param_id,
+        setpoint=setpoint,
+        setpoint_local=setpoint_local,
+        name_gobal=name,
+        name=name,
+        label=name,
+        unit='mV',
+        dependency=dependency,
+        shape=data.shape,
+        size=data.size,
+        oid=0,
+        )
+    param.data_buffer = buffer_reference(data)
+    return param
+
+
+def make_ds_raw(n_sets, n_x=20, n_t=50):
+    '''
+    Creates a dataset with multi-parameters swept over setpoint 'x'.
+    Multi-parameter i has n_sets[i] readouts, each with a local setpoint 't'.
+    '''
+    params = []
+    x = np.linspace(0, 1, n_x)
+    t = np.arange(n_t, dtype=float)
+    for i, n in enumerate(n_sets):
+        m_id = 100 + 3*i
+        x_id = m_id + 1
+        t_id = m_id + 2
+        for j in range(n):
+            params.append(make_param(m_id, j, 0, m_id, False, False, f'ch{i}_{j}',
+                                     [x_id, t_id], np.random.rand(n_x, n_t)))
+            params.append(make_param(x_id, j, 0, m_id, True, False, 'x',
+                                     [], np.repeat(x[:, None], n_t, axis=1)))
+            params.append(make_param(t_id, j, 1, m_id, False, True, 't',
+                                     [], np.repeat(t[None, :], n_x, axis=0)))
+    return data_set_raw(exp_id=1, exp_uuid=1, exp_name='benchmark',
+                        set_up='setup', project='project', sample='sample',
+                        measurement_parameters_raw=params,
+                        UNIX_start_time=0.0, UNIX_stop_time=0.0)
+
+
+def attribute_names(ds):
+    result = []
+    for m_params in ds:
+        for name, m_param in m_params:
+            result.append(name)
+            for deps in m_param.get_raw_content():
+                result += [f'{name}.{dep_name}' for dep_name, _ in deps]
+            attrs = [key for key in vars(m_param) if not key.startswith('_')]
+            result.append(f'{name}:' + ','.join(sorted(attrs)))
+    return result
+
+
+EXPECTED_NAMES = [
+    'm1', 'm1.x', 'm1.y',
+    'm1:name,param_name,x,x1,y,y1,z',
+    'm2_1', 'm2_1.x1', 'm2_1.x2', 'm2_1.y1', 'm2_1.y2',
+    'm2_1:name,param_name,x,x1,x2,y,y1,y2,z',
+    'm2_2', 'm2_2.x1', 'm2_2.x2', 'm2_2.y1', 'm2_2.y2',
+    'm2_2:name,param_name,x,x1,x2,y,y1,y2,z',
+    ]
+
+
+def check_attribute_names():
+    ds_raw = make_ds_raw([1, 2])
+    ds = data_set(ds_raw)
+    names = attribute_names(ds)
+    assert names == EXPECTED_NAMES, names
+    m1 = ds.m1
+    assert m1.x is ds.m1.x
+    assert np.array_equal(m1.y(), ds_raw.measurement_parameters_raw[2].data_buffer.data[0])
+    assert m1.average('x').shape == (50,)
+    assert m1[0].shape == (50,)
+    assert m1[:, 2:5].shape == (20, 3)
+    print('attribute names ok')
+
+
+def benchmark(n_params, n_sets=1):
+    ds_raw = make_ds_raw([n_sets]*n_params)
+    t0 = time.perf_counter()
+    ds = data_set(ds_raw)
+    t1 = time.perf_counter()
+    for m_params in ds:
+        for _, m_param in m_params:
+            m_param.x
+    t2 = time.perf_counter()
+    n = len(ds_raw.measurement_parameters_raw)
+    print(f'{n:6} m_param_raw: open {(t1-t0)*1000:8.2f} ms ({(t1-t0)/n*1e6:5.1f} us/param), '
+          f'access {(t2-t1)*1000:8.2f} ms ({(t2-t1)/n*1e6:5.1f} us/param)')
+
+
+if __name__ == '__main__':
+    check_attribute_names()
+    for n in [3, 33, 333]:
+        benchmark(n)
+    for n in [10, 100, 1000]:
+        benchmark(1, n)
@@ -0,0 +1,136 @@
+'''
+Benchmark of slicing and averaging of a large 3D dataset in PostgreSQL.
+
+A 256x512x1024 float64 array (1 GB) is written to a large object in the
+local database. Chained slices and averages are applied to the parameter
+of a dataset that reads this large object. The view only reads the
+selected part and averages per chunk. The number of bytes read, the
+duration and the peak RSS are compared with the touched fraction of the
+data and with the result of the eager numpy computation.
+
+Every operation runs in a new process to measure the peak RSS.
+'''
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import core_tools as ct
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
+from core_tools.data.SQL.buffer_writer import buffer_reader, buffer_reference
+from core_tools.data.ds.data_set_core import data_set
+from core_tools.data.ds.data_set_raw import data_set_raw, m_param_raw
+
+SHAPE = (256, 512, 1024)
+MAX_RSS_MB = 200
+
+
+def slab(i):
+    # deterministic data of z[i]
+    rng = np.random.default_rng(i)
+    j, k = np.meshgrid(np.arange(SHAPE[1]), np.arange(SHAPE[2]), indexing='ij')
+    return np.sin(0.01*i + 0.1*j) * np.cos(0.001*k) + rng.normal(scale=0.1, size=SHAPE[1:])
+
+
+def write_data(conn):
+    lobject = conn.lobject(0, 'w')
+    oid = lobject.oid
+    for i in range(SHAPE[0]):
+        lobject.write(slab(i).tobytes())
+    lobject.close()
+    conn.commit()
+    return oid
+
+
+# Eager computations equivalent to np.average(z, axis=0)[5:10], etc.
+# Computed per slab to keep the memory usage low.
+def expected_avg0_slice():
+    return (sum(slab(i)[5:10] for i in range(SHAPE[0])) / SHAPE[0])
+
+
+def expected_slice_avg2():
+    return np.stack([np.average(slab(i), axis=1) for i in range(100, 120)])
+
+
+def expected_index_avg0():
+    return np.average(np.stack([slab(i)[200] for i in range(SHAPE[0])]), axis=0)
+
+
+# operation, touched fraction of the data, eager computation
+OPERATIONS = {
+    'average(0)[5:10]': (lambda m: m.average(0)[5:10], 5/512, expected_avg0_slice),
+    '[100:120].average(2)': (lambda m: m[100:120].average(2), 20/256, expected_slice_avg2),
+    '[:, 200].average(0)': (lambda m: m[:, 200].average(0), 1/512, expected_index_avg0),
+    }
+
+
+def make_dataset(conn, oid):
+    data_buffer = buffer_reader(conn, oid, SHAPE)
+    params = []
+    for i, name in enumerate(['i', 'j', 'k']):
+        param = m_param_raw(
+            param_id=i+2, nth_set=0, nth_dim=i, param_id_m_param=i+2,
+            setpoint=True, setpoint_local=False, name_gobal=name, name=name,
+            label=name, unit='mV', dependency=[], shape=[SHAPE[i]], size=SHAPE[i], oid=0)
+        # setpoints are small. Keep them in memory.
+        param.data_buffer = buffer_reference(np.arange(SHAPE[i], dtype=float))
+        params.append(param)
+    z = m_param_raw(
+        param_id=1, nth_set=0, nth_dim=0, param_id_m_param=1,
+        setpoint=False, setpoint_local=False, name_gobal='z', name='z',
+        label='z', unit='mV', dependency=[2, 3, 4], shape=list(SHAPE), size=int(np.prod(SHAPE)), oid=oid)
+    z.data_buffer = data_buffer
+    ds_raw = data_set_raw(exp_id=1, exp_uuid=1, exp_name='benchmark',
+                          set_up='setup', project='project', sample='sample',
+                          measurement_parameters_raw=[z] + params,
+                          UNIX_start_time=0.0, UNIX_stop_time=0.0,
+                          snapshot={}, metadata={})
+    return data_set(ds_raw), data_buffer
+
+
+def run(name, oid, result_file):
+    ct.configure('./setup_config/ct_config_measurement.yaml')
+    conn = SQL_database_manager().conn_local
+    rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    operation, fraction, _ = OPERATIONS[name]
+
+    t0 = time.perf_counter()
+    ds, data_buffer = make_dataset(conn, oid)
+    result = operation(ds.m1)()
+    duration = time.perf_counter() - t0
+
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    np.save(result_file, result)
+    total_bytes = int(np.prod(SHAPE)) * 8
+    rss = (rss_peak - rss_start) / 1024
+    print(f'{name:22} {duration:5.2f} s, read {data_buffer.bytes_read/2**20:7.1f} MB '
+          f'({data_buffer.bytes_read/total_bytes*100:5.2f}%, touched {fraction*100:5.2f}%), '
+          f'peak RSS +{rss:4.0f} MB')
+    assert data_buffer.bytes_read <= fraction * total_bytes * 1.01 + 8 * 2**20
+    assert rss < MAX_RSS_MB
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1], int(sys.argv[2]), sys.argv[3])
+    else:
+        ct.configure('./setup_config/ct_config_measurement.yaml')
+        conn = SQL_database_manager().conn_local
+        oid = write_data(conn)
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for name, (_, _, eager) in OPERATIONS.items():
+                    result_file = os.path.join(tmp_dir, 'result.npy')
+                    subprocess.run([sys.executable, __file__, name, str(oid), result_file], check=True)
+                    result = np.load(result_file)
+                    expected = eager()
+                    assert result.shape == expected.shape
+                    assert np.allclose(result, expected, rtol=1e-12, atol=1e-12)
+            print('results match eager computation')
+        finally:
+            conn.lobject(oid).unlink()
+            conn.commit()
@@ -0,0 +1,35 @@
+'''
+Benchmark of the reference point selection of the digitizer post-selection.
+
+Times the original loop over the cycles and the vectorized selection for
+10000 cycles, with and without time traces.
+'''
+import time
+
+import numpy as np
+
+from test_digitizer_post_selection import make_param, loop_selection
+
+
+def benchmark(n_cycles, n_corr_points, n_t=None, n_rep=3):
+    source, param = make_param(n_cycles, n_corr_points, n_t)
+    data_all = source.get()
+
+    t0 = time.perf_counter()
+    expected = loop_selection(param, data_all)
+    t1 = time.perf_counter()
+    for _ in range(n_rep):
+        result = param.get_raw()
+    t2 = time.perf_counter()
+    np.testing.assert_array_equal(result[0], expected[0])
+
+    t_loop = t1 - t0
+    t_vectorized = (t2 - t1)/n_rep
+    print(f'{n_cycles} cycles, {n_corr_points} points, n_t={n_t}: '
+          f'loop {t_loop*1000:8.1f} ms, vectorized {t_vectorized*1000:6.2f} ms '
+          f'({t_loop/t_vectorized:.0f}x)')
+
+
+if __name__ == '__main__':
+    benchmark(10_000, 5)
+    benchmark(10_000, 5, n_t=20)
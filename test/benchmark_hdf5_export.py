@@ -0,0 +1,111 @@
+'''
+Benchmark of the HDF5 export with different compressions.
+
+Saves a 2048x2048 float64 dataset with save_xr_hdf5 and prints the
+throughput and the file size for every compression. 'zstd' and 'lz4' are
+only tested when hdf5plugin is installed. Every file is loaded again and
+compared with the dataset.
+
+The core-tools dataset is also saved with save_hdf5, which writes the data
+in blocks, with gzip compression in 1 thread and in a thread per CPU.
+'''
+import os
+import tempfile
+import time
+
+import numpy as np
+import xarray as xr
+
+from core_tools.data.SQL.buffer_writer import buffer_reference
+from core_tools.data.ds import ds_hdf5
+from core_tools.data.ds.data_set_core import data_set
+from core_tools.data.ds.data_set_raw import data_set_raw, m_param_raw
+from core_tools.data.ds.ds2xarray import ds2xarray
+
+COMPRESSIONS = [
+    (None, None),
+    ('gzip', 9),
+    ('gzip', 1),
+    ('lzf', None),
+    ('zstd', 3),
+    ('lz4', None),
+    ]
+
+
+def make_dataset(n=2048):
+    rng = np.random.default_rng(1)
+    x = np.linspace(-100, 100, n)
+    y = np.linspace(-50, 50, n)
+    # smooth signal with noise of the digitizer: ~12 significant bits
+    signal = np.sin(x[:, None]/20) * np.cos(y[None, :]/10)
+    data = np.round(signal + rng.normal(scale=0.05, size=(n, n)), 3)
+    return xr.Dataset(
+        {'SD1': (('x', 'y'), data, {'units': 'mV'})},
+        coords={'x': ('x', x, {'units': 'mV'}), 'y': ('y', y, {'units': 'mV'})},
+        attrs={'title': 'benchmark'})
+
+
+def benchmark(xds, path, compression, level):
+    fname = os.path.join(path, f'ds_{compression}_{level}.hdf5')
+    t0 = time.perf_counter()
+    ds_hdf5.save_xr_hdf5(xds, fname, compression=compression, level=level)
+    t1 = time.perf_counter()
+    loaded = ds_hdf5.load_xr_hdf5(fname)
+    t2 = time.perf_counter()
+    xr.testing.assert_identical(loaded, xds)
+
+    n_bytes = xds.nbytes
+    size = os.path.getsize(fname)
+    print(f'{str(compression):5} level {str(level):4}: write {n_bytes/(t1-t0)*1e-6:6.1f} MB/s, '
+          f'read {n_bytes/(t2-t1)*1e-6:6.1f} MB/s, size {size/n_bytes*100:5.1f} %')
+
+
+def make_ct_dataset(xds):
+    params = []
+    for i, name in enumerate(['x', 'y']):
+        n = len(xds[name])
+        param = m_param_raw(
+            param_id=i+2, nth_set=0, nth_dim=i, param_id_m_param=1,
+            setpoint=True, setpoint_local=False, name_gobal=name, name=name,
+            label=name, unit='mV', dependency=[], shape=[n], size=n, oid=0)
+        param.data_buffer = buffer_reference(xds[name].values)
+        params.append(param)
+    data = xds['SD1'].values
+    param = m_param_raw(
+        param_id=1, nth_set=0, nth_dim=-1, param_id_m_param=1,
+        setpoint=False, setpoint_local=False, name_gobal='SD1', name='SD1',
+        label='SD1', unit='mV', dependency=[2, 3], shape=list(data.shape), size=data.size, oid=0)
+    param.data_buffer = buffer_reference(data)
+    ds_raw = data_set_raw(exp_id=1, exp_uuid=1, exp_name='benchmark',
+                          set_up='setup', project='project', sample='sample',
+                          measurement_parameters_raw=[param] + params,
+                          UNIX_start_time=0.0, UNIX_stop_time=0.0,
+                          snapshot={}, metadata={})
+    return data_set(ds_raw)
+
+
+def benchmark_streamed(ds, path, n_threads):
+    fname = os.path.join(path, f'ds_streamed_{n_threads}.hdf5')
+    t0 = time.perf_counter()
+    ds_hdf5.save_hdf5(ds, fname, compression='gzip', n_threads=n_threads)
+    t1 = time.perf_counter()
+    loaded = ds_hdf5.load_xr_hdf5(fname)
+    xds = ds2xarray(ds)
+    xr.testing.assert_equal(loaded, xds)
+
+    n_bytes = xds.nbytes
+    print(f'gzip  level 9   : streamed, {n_threads} threads: write {n_bytes/(t1-t0)*1e-6:6.1f} MB/s')
+
+
+if __name__ == '__main__':
+    xds = make_dataset()
+    print(f'dataset {xds.nbytes*1e-6:.1f} MB')
+    with tempfile.TemporaryDirectory() as path:
+        for compression, level in COMPRESSIONS:
+            if compression in ['zstd', 'lz4'] and ds_hdf5.hdf5plugin is None:
+                print(f'{compression:5} skipped: hdf5plugin not installed')
+                continue
+            benchmark(xds, path, compression, level)
+        ds = make_ct_dataset(xds)
+        for n_threads in sorted({1, os.cpu_count() or 1}):
+            benchmark_streamed(ds, path, n_threads)
@@ -0,0 +1,55 @@
+'''
+Checks that `import core_tools` does not load the GUI stack and
+reports the import time.
+
+Every module is imported in a new Python process with `-X importtime`.
+'''
+import json
+import subprocess
+import sys
+
+GUI_MODULES = ('PyQt5', 'pyqtgraph', 'matplotlib')
+
+MODULES = [
+    'core_tools',
+    'core_tools.data.ds.reader',
+    'core_tools.data.ds.data_set',
+    'core_tools.utility.powerpoint',
+    'core_tools.utility.variable_mgr.var_mgr',
+    ]
+
+
+def import_module(module):
+    '''
+    Imports module in a new process.
+
+    Returns:
+        (total import time in seconds, list of loaded top level packages)
+    '''
+    script = (
+        f'import sys, json; import {module}; '
+        'print(json.dumps(sorted({name.split(".")[0] for name in sys.modules})))'
+        )
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                         capture_output=True, text=True, check=True)
+    # cumulative import time of the requested module
+    total_us = 0
+    for line in res.stderr.splitlines():
+        if line.startswith('import time:'):
+            fields = line.split('|')
+            if fields[2].strip() == module:
+                total_us = int(fields[1])
+    return total_us * 1e-6, json.loads(res.stdout.splitlines()[-1])
+
+
+def check_import(module, forbidden=GUI_MODULES):
+    duration, packages = import_module(module)
+    loaded = [name for name in forbidden if name in packages]
+    print(f'{module:45} {duration*1000:7.1f} ms')
+    assert not loaded, f'import {module} loads {loaded}'
+    return duration
+
+
+if __name__ == '__main__':
+    for module in MODULES:
+        check_import(module)
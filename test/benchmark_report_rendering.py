@@ -0,0 +1,128 @@
+'''
+Benchmark of the rendering of a report with plots of 200 datasets.
+
+Every dataset is rendered to svg and png and the png images are put on the
+slides of a pptx file.
+The per-call path renders every plot on a new pyplot figure with
+plotter.save and reads the png file to get the image size.
+The batch path renders with batch_renderer in worker processes on reused off-screen
+figures and uses the known figure size. A second run with the same inputs
+must only use the cache and give the same files. A run without cache in
+this process must give the same images as the worker processes.
+'''
+import os
+import tempfile
+import time
+import zipfile
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from core_tools.utility.plotting.batch_render import batch_renderer
+from core_tools.utility.plotting.plot_1D import plotter_1D
+from core_tools.utility.plotting.plot_2D import plotter_2D
+from core_tools.utility.plotting.plot_settings import plot_layout
+from core_tools.utility.powerpoint import create_pptx
+
+N_DATASETS = 200
+DPI = 150
+
+
+def make_plotter(i):
+    rng = np.random.default_rng(i)
+    if i % 2 == 0:
+        x = np.linspace(0, 100, 200)
+        if i % 4 == 0:
+            p = plotter_1D()
+            p[0].set_labels('time (ns)', 'probability (%)')
+            p[0].add_data(x, np.sin(x/(5+i%7)) + rng.normal(scale=0.1, size=x.size), label='up')
+        else:
+            p = plotter_1D(plot_layout(n_plots_x=2, n_plots_y=1, share_y=True))
+            for j in range(2):
+                p[j].set_labels('time (ns)', 'probability (%)')
+                p[j].add_data(x, np.cos(x/(3+j)) + rng.normal(scale=0.1, size=x.size))
+    else:
+        x = np.linspace(-10, 10, 100)
+        y = np.linspace(-5, 5, 80)
+        z = np.sin(x[None, :]*0.5 + i) * np.cos(y[:, None]) + rng.normal(scale=0.05, size=(80, 100))
+        p = plotter_2D()
+        p[0].set_labels('vP1 (mV)', 'vP2 (mV)', 'current (nA)')
+        p[0].add_data(z, x, y)
+    return p
+
+
+def make_report():
+    return [(f'uuid-{i}', make_plotter(i)) for i in range(N_DATASETS)]
+
+
+def per_call(report, out_dir):
+    images = []
+    image_sizes = []
+    for uuid, plotter in report:
+        plotter.save(os.path.join(out_dir, f'{uuid}.svg'), dpi=DPI)
+        png = os.path.join(out_dir, f'{uuid}.png')
+        plt.savefig(png, transparent=True, format='png')
+        plt.close('all')
+        # probe the image size from the file.
+        shape = plt.imread(png).shape
+        images.append(png)
+        image_sizes.append((shape[1], shape[0]))
+    create_pptx(os.path.join(out_dir, 'report.pptx'), images, image_sizes,
+                titles=[uuid for uuid, _ in report])
+
+
+def batched(report, cache_dir, pptx_file, n_workers=None):
+    renderer = batch_renderer(cache_dir, formats=('svg', 'png'), dpi=DPI, n_workers=n_workers)
+    results = renderer.render(report)
+    create_pptx(pptx_file, [r.files['png'] for r in results], [r.figure_size for r in results],
+                titles=[r.uuid for r in results])
+    return results
+
+
+def read_files(results):
+    return [{fmt: open(path, 'rb').read() for fmt, path in r.files.items()} for r in results]
+
+
+def pptx_content(filename):
+    # the zip entries contain the time of writing. Compare the content.
+    with zipfile.ZipFile(filename) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name != 'docProps/core.xml'}
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = make_report()
+
+        out_dir = os.path.join(tmp_dir, 'per_call')
+        os.makedirs(out_dir)
+        t0 = time.perf_counter()
+        per_call(report, out_dir)
+        t_per_call = time.perf_counter() - t0
+
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        t0 = time.perf_counter()
+        results = batched(report, cache_dir, os.path.join(tmp_dir, 'report1.pptx'))
+        t_batch = time.perf_counter() - t0
+        files = read_files(results)
+        assert not any(r.cached for r in results)
+
+        # same inputs: all from cache
+        report = make_report()
+        t0 = time.perf_counter()
+        results2 = batched(report, cache_dir, os.path.join(tmp_dir, 'report2.pptx'))
+        t_cached = time.perf_counter() - t0
+        assert all(r.cached for r in results2)
+        assert read_files(results2) == files
+        assert pptx_content(os.path.join(tmp_dir, 'report1.pptx')) == pptx_content(os.path.join(tmp_dir, 'report2.pptx'))
+
+        # rendering is deterministic: same images without cache and workers.
+        results3 = batched(report, os.path.join(tmp_dir, 'cache3'), os.path.join(tmp_dir, 'report3.pptx'),
+                           n_workers=0)
+        assert read_files(results3) == files
+
+        print(f'{N_DATASETS} datasets on {os.cpu_count()} CPUs')
+        print(f'per call: {t_per_call:6.2f} s')
+        print(f'batch:    {t_batch:6.2f} s, speedup {t_per_call/t_batch:5.1f}')
+        print(f'cached:   {t_cached:6.2f} s, speedup {t_per_call/t_cached:5.1f}')
@@ -0,0 +1,193 @@
+'''
+Benchmark of the conversion of a large dataset between the database
+buffers and xarray.
+
+A 4096x4096 float64 dataset is written to large objects with buffer_writer,
+read with buffer_reader, converted with ds2xarray and converted back with
+xarray2ds. The large objects are kept in memory, i.e. without database.
+
+The transfer of the data in blocks is compared with the previous transfer
+in one piece. Every path runs in a new process to measure the peak RSS.
+'''
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from core_tools.data.SQL.buffer_writer import buffer_reader, buffer_reference, buffer_writer
+from core_tools.data.ds.data_set_core import data_set
+from core_tools.data.ds.data_set_raw import data_set_raw, m_param_raw
+from core_tools.data.ds.ds2xarray import ds2xarray
+from core_tools.data.ds.xarray2ds import xarray2ds
+
+
+class memory_lobject:
+    def __init__(self, store, oid):
+        self.store = store
+        self.oid = oid
+        self.pos = 0
+
+    def write(self, data):
+        blob = self.store[self.oid]
+        blob[self.pos:self.pos+len(data)] = data
+        self.pos += len(data)
+
+    def read(self, size=-1):
+        blob = self.store[self.oid]
+        end = len(blob) if size < 0 else self.pos + size
+        data = bytes(blob[self.pos:end])
+        self.pos += len(data)
+        return data
+
+    def seek(self, pos, whence=0):
+        if whence == 2:
+            pos += len(self.store[self.oid])
+        self.pos = pos
+        return pos
+
+    def close(self):
+        pass
+
+
+class memory_connection:
+    '''
+    Stand-in for the psycopg2 connection. Only supports large objects.
+    '''
+    def __init__(self):
+        self.store = {}
+
+    def lobject(self, oid=0, mode='rb'):
+        if oid == 0:
+            oid = len(self.store) + 1
+            self.store[oid] = bytearray()
+        return memory_lobject(self.store, oid)
+
+
+class legacy_buffer_writer(buffer_writer):
+    def sync(self):
+        if self.cursor - self.cursor_db != 0:
+            self.lobject.write((self.buffer[self.cursor_db:self.cursor]).tobytes())
+            self.cursor_db += self.cursor - self.cursor_db
+
+
+class legacy_buffer_reader(buffer_reference):
+    def __init__(self, SQL_conn, oid, shape):
+        self.conn = SQL_conn
+        self.buffer = np.full(shape, np.nan).ravel()
+        self.shape = tuple(shape)
+        self.buffer_lambda = buffer_reference.reshaper(shape)
+        self.oid = oid
+        self.cursor = 0
+        self.sync()
+
+    def sync(self):
+        self.lobject = self.conn.lobject(self.oid, 'rb')
+        self.lobject.seek(self.cursor*8)
+        binary_data = self.lobject.read()
+        data = np.frombuffer(binary_data)
+
+        self.buffer[self.cursor:self.cursor+data.size] = data
+        self.cursor = self.cursor+data.size
+
+
+def make_param(param_id, nth_dim, setpoint, name, dependency, data_buffer, shape):
+    param = m_param_raw(
+        param_id=param_id,
+        nth_set=0,
+        nth_dim=nth_dim,
+        param_id_m_param=1,
+        setpoint=setpoint,
+        setpoint_local=False,
+        name_gobal=name,
+        name=name,
+        label=name,
+        unit='mV',
+        dependency=dependency,
+        shape=shape,
+        size=int(np.prod(shape)),
+        oid=data_buffer.oid,
+        )
+    param.data_buffer = data_buffer
+    return param
+
+
+def create_data(n):
+    rng = np.random.default_rng(1)
+    z = rng.random((n, n))
+    x = np.linspace(-1, 1, n)
+    y = np.repeat(np.linspace(0, 100, n)[None, :], n, axis=0)
+    return {'z': z, 'x': x, 'y': y}
+
+
+def write(conn, data, writer_class):
+    oids = {}
+    for name, values in data.items():
+        writer = writer_class(conn, np.empty(values.shape))
+        writer.write(values.ravel())
+        writer.sync()
+        oids[name] = writer.oid
+    return oids
+
+
+def read(conn, oids, data, reader_class):
+    buffers = {name: reader_class(conn, oid, data[name].shape) for name, oid in oids.items()}
+    params = [
+        make_param(1, 0, False, 'z', [2, 3], buffers['z'], data['z'].shape),
+        make_param(2, 0, True, 'x', [], buffers['x'], data['x'].shape),
+        make_param(3, 1, True, 'y', [], buffers['y'], data['y'].shape),
+        ]
+    ds_raw = data_set_raw(exp_id=1, exp_uuid=1, exp_name='benchmark',
+                          set_up='setup', project='project', sample='sample',
+                          measurement_parameters_raw=params,
+                          UNIX_start_time=0.0, UNIX_stop_time=0.0,
+                          snapshot={'station': {}}, metadata={})
+    return data_set(ds_raw)
+
+
+def bit_identical(a, b):
+    return a.shape == b.shape and np.array_equal(a.view(np.uint64), b.view(np.uint64))
+
+
+def run(path, n):
+    if path == 'legacy':
+        writer_class, reader_class = legacy_buffer_writer, legacy_buffer_reader
+    else:
+        writer_class, reader_class = buffer_writer, buffer_reader
+    # warm-up: the first conversion imports optional xarray modules.
+    small = create_data(16)
+    conn = memory_connection()
+    xarray2ds(ds2xarray(read(conn, write(conn, small, writer_class), small, reader_class)))
+
+    data = create_data(n)
+    conn = memory_connection()
+    rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    t0 = time.perf_counter()
+    oids = write(conn, data, writer_class)
+    t1 = time.perf_counter()
+    ds = read(conn, oids, data, reader_class)
+    xds = ds2xarray(ds)
+    ds_new = xarray2ds(xds)
+    t2 = time.perf_counter()
+
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert bit_identical(xds['z'].values, data['z'])
+    assert bit_identical(xds['x'].values, data['x'])
+    assert bit_identical(xds['y'].values, data['y'][0])
+    assert bit_identical(ds_new.m1(), data['z'])
+    assert ds_new.snapshot == ds.snapshot
+    # data sizes in MB. ru_maxrss is in kB on linux.
+    data_size = sum(values.nbytes for values in data.values()) / 2**20
+    print(f'{path:7} write {t1-t0:5.2f} s, read+convert {t2-t1:5.2f} s, '
+          f'peak RSS +{(rss_peak-rss_start)/1024:6.0f} MB (data {data_size:.0f} MB)')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1], int(sys.argv[2]))
+    else:
+        n = 4096
+        for path in ['legacy', 'blocks']:
+            subprocess.run([sys.executable, __file__, path, str(n)], check=True)
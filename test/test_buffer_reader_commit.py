@@ -0,0 +1,65 @@
+'''
+Checks that a lazy buffer_reader still reads its data after a commit.
+
+A large object is not valid anymore after a commit on its connection.
+The data of a dataset is only read on first access, which may come after
+a commit by the database synchronization, the GUI or the creation of
+another dataset.
+'''
+import numpy as np
+
+import core_tools as ct
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
+from core_tools.data.SQL.buffer_writer import buffer_reader
+
+SHAPE = (20, 50)
+
+
+def write_data(conn, data):
+    lobject = conn.lobject(0, 'w')
+    oid = lobject.oid
+    lobject.write(data.tobytes())
+    lobject.close()
+    conn.commit()
+    return oid
+
+
+def check_data_after_commit(conn, oid, data):
+    reader = buffer_reader(conn, oid, SHAPE)
+    conn.commit()
+    assert np.array_equal(reader.data, data)
+
+
+def check_view_after_commit(conn, oid, data):
+    reader = buffer_reader(conn, oid, SHAPE)
+    conn.commit()
+    assert np.array_equal(reader.view().index((slice(5, 8),)).data, data[5:8])
+    conn.commit()
+    assert np.allclose(reader.view().average(0).data, np.average(data, axis=0))
+    # empty selections are not read
+    assert reader.view().average(0).index((slice(5, 5),)).data.shape == (0,)
+    assert reader.view().index((slice(2, 2),)).average(1).data.shape == (0,)
+
+
+def check_sync_after_commit(conn, oid, data):
+    reader = buffer_reader(conn, oid, SHAPE)
+    assert np.array_equal(reader.data, data)
+    conn.commit()
+    reader.sync()
+    conn.commit()
+    assert np.array_equal(reader.data, data)
+
+
+if __name__ == '__main__':
+    ct.configure('./setup_config/ct_config_measurement.yaml')
+    conn = SQL_database_manager().conn_local
+    data = np.random.default_rng(1).normal(size=SHAPE)
+    oid = write_data(conn, data)
+    try:
+        check_data_after_commit(conn, oid, data)
+        check_view_after_commit(conn, oid, data)
+        check_sync_after_commit(conn, oid, data)
+        print('ok')
+    finally:
+        conn.lobject(oid).unlink()
+        conn.commit()
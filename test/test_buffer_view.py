@@ -0,0 +1,52 @@
+'''
+Checks the lazy views of buffer_view against numpy on data in memory.
+
+Every view is created with index and average in different orders and
+compared with the same operations on the numpy array. Empty selections
+must give empty arrays, also when they are averaged.
+'''
+import numpy as np
+
+from core_tools.data.SQL.buffer_writer import buffer_reference
+
+SHAPE = (6, 10)
+
+
+def make_buffer():
+    data = np.random.default_rng(1).normal(size=SHAPE)
+    return buffer_reference(data), data
+
+
+def check_views():
+    buffer, data = make_buffer()
+    cases = [
+        (buffer.view().index((slice(1, 4),)), data[1:4]),
+        (buffer.view().index((2, slice(3, 9, 2))), data[2, 3:9:2]),
+        (buffer.view().average(0), np.average(data, axis=0)),
+        (buffer.view().average(1).index((slice(2, 5),)), np.average(data, axis=1)[2:5]),
+        (buffer.view().index((slice(None), slice(4, 8))).average(0), np.average(data[:, 4:8], axis=0)),
+        ]
+    for view, expected in cases:
+        assert view.shape == expected.shape
+        np.testing.assert_allclose(view.data, expected)
+    print('views equal to numpy')
+
+
+def check_empty_selection():
+    buffer, data = make_buffer()
+    cases = [
+        (buffer.view().index((slice(5, 5),)), data[5:5]),
+        (buffer.view().average(0).index((slice(5, 5),)), np.zeros(0)),
+        (buffer.view().index((slice(2, 2),)).average(1), np.zeros(0)),
+        (buffer.view().index((slice(None), slice(3, 3))).average(0), np.zeros(0)),
+        ]
+    for view, expected in cases:
+        result = view.data
+        assert result.shape == expected.shape, (result.shape, expected.shape)
+    print('empty selections give empty arrays')
+
+
+if __name__ == '__main__':
+    check_views()
+    check_empty_selection()
+    print('ok')
@@ -0,0 +1,78 @@
+'''
+Round trip of bulk_export with a local PostgreSQL database.
+
+A synthetic 2D measurement is created with a Scan and exported to HDF5
+by the export workers. The exported file must be identical to the
+dataset loaded from the database. An export that is up to date is
+skipped, unless forced.
+'''
+import gzip
+import os
+import tempfile
+
+import numpy as np
+import xarray as xr
+from qcodes import ManualParameter, Parameter
+
+import core_tools as ct
+from core_tools.data.ds.bulk_export import export_datasets, INDEX_FILE
+from core_tools.data.ds.data_set import load_by_uuid
+from core_tools.data.ds.ds2xarray import ds2xarray
+from core_tools.data.ds import ds_hdf5
+from core_tools.sweeps.scans import Scan, sweep
+
+
+def create_measurement():
+    x = ManualParameter('x', unit='mV', initial_value=0.0)
+    y = ManualParameter('y', unit='mV', initial_value=0.0)
+    m = Parameter('m', unit='mV', get_cmd=lambda: np.sin(x()/10) * np.cos(y()/20))
+    ds = Scan(
+        sweep(x, -100, 100, 21),
+        sweep(y, -50, 50, 31),
+        m,
+        name='test_bulk_export',
+        silent=True,
+        ).run()
+    return ds.exp_uuid
+
+
+def check_round_trip(uuid, path):
+    summary = export_datasets(path, uuids=[uuid], compression='gzip', n_workers=2)
+    print(summary)
+    assert summary.n_exported == 1 and len(summary.failed) == 0
+    fname = os.path.join(path, ds_hdf5._get_fname(uuid))
+    assert summary.n_bytes == os.path.getsize(fname)
+    assert os.path.exists(os.path.join(path, INDEX_FILE))
+
+    loaded = ds_hdf5.load_xr_hdf5(fname)
+    expected = ds2xarray(load_by_uuid(uuid))
+    # the gzip header contains the time of compression.
+    snapshot = gzip.decompress(expected.attrs.pop('snapshot-gzip').tobytes())
+    assert gzip.decompress(loaded.attrs.pop('snapshot-gzip').tobytes()) == snapshot
+    xr.testing.assert_identical(loaded, expected)
+    print('exported file identical to dataset')
+
+
+def check_skip_up_to_date(uuid, path):
+    summary = export_datasets(path, uuids=[uuid], n_workers=1)
+    assert summary.n_exported == 0 and summary.n_skipped == 1
+    summary = export_datasets(path, uuids=[uuid], force=True, n_workers=1)
+    assert summary.n_exported == 1 and summary.n_skipped == 0
+    print('up to date dataset skipped')
+
+
+def check_csv(uuid, path):
+    summary = export_datasets(path, format='csv', uuids=[uuid], metadata=True, n_workers=1)
+    assert summary.n_exported == 1 and len(summary.failed) == 0
+    assert os.path.exists(os.path.join(path, f'ds_{uuid}.csv'))
+    print('exported csv')
+
+
+if __name__ == '__main__':
+    ct.configure('./setup_config/ct_config_measurement.yaml')
+    uuid = create_measurement()
+    with tempfile.TemporaryDirectory() as path:
+        check_round_trip(uuid, path)
+        check_skip_up_to_date(uuid, path)
+    with tempfile.TemporaryDirectory() as path:
+        check_csv(uuid, path)
@@ -0,0 +1,107 @@
+'''
+Checks the on-disk dataset cache without database.
+
+The data buffers of synthetic datasets are stored in a temporary cache
+directory and loaded again. The least recently used datasets must be
+removed when the cache is full. Multiple processes storing the same and
+different datasets at the same time must leave complete entries only.
+'''
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+
+import numpy as np
+
+from core_tools.data.ds.data_set_raw import m_param_raw
+from core_tools.data.SQL.dataset_cache import cached_buffer, dataset_cache
+
+SHAPE = (100, 50)
+# size of a cache entry with 2 parameters
+ENTRY_SIZE = 2 * 8 * int(np.prod(SHAPE))
+
+
+def make_params(uuid):
+    m_params = []
+    for i in range(2):
+        m_param = m_param_raw(
+            param_id=i+1, nth_set=0, nth_dim=0, param_id_m_param=i+1,
+            setpoint=False, setpoint_local=False, name_gobal=f'm{i}', name=f'm{i}',
+            label=f'm{i}', unit='mV', dependency=[], shape=list(SHAPE),
+            size=int(np.prod(SHAPE)), oid=100*uuid+i)
+        data = np.full(int(np.prod(SHAPE)), uuid + 0.1*i)
+        m_param.data_buffer = cached_buffer(data, SHAPE, data.size)
+        m_params.append(m_param)
+    return m_params
+
+
+def check_loaded(uuid):
+    m_params = make_params(uuid)
+    if not dataset_cache.load(uuid, m_params):
+        return False
+    for i, m_param in enumerate(m_params):
+        np.testing.assert_array_equal(m_param.data_buffer.data, np.full(SHAPE, uuid + 0.1*i))
+        assert m_param.data_buffer.cursor == int(np.prod(SHAPE))
+    return True
+
+
+def check_store_load(location):
+    dataset_cache.configure(location, 1.0)
+    dataset_cache.store(1, make_params(1))
+    assert check_loaded(1)
+    assert not check_loaded(2)
+    # outdated entry: the description of the parameters changed
+    m_params = make_params(1)
+    m_params[0].oid = 0
+    assert not dataset_cache.load(1, m_params)
+    assert not check_loaded(1)
+    dataset_cache.clear()
+    print('store and load')
+
+
+def check_lru_eviction(location):
+    # space for 3 entries
+    dataset_cache.configure(location, 3.5 * ENTRY_SIZE * 1e-9)
+    for uuid in [1, 2, 3]:
+        dataset_cache.store(uuid, make_params(uuid))
+        # the modification time is the time of last use.
+        os.utime(os.path.join(location, str(uuid), 'params.json'), (uuid, uuid))
+    assert check_loaded(1)
+    dataset_cache.store(4, make_params(4))
+    assert sorted(dataset_cache._scan()) == ['1', '3', '4']
+    assert not check_loaded(2)
+    dataset_cache.clear()
+    print('least recently used datasets evicted')
+
+
+def store(location, max_size, uuids):
+    # Executed in worker process.
+    dataset_cache.configure(location, max_size)
+    for uuid in uuids:
+        dataset_cache.store(uuid, make_params(uuid))
+
+
+def check_concurrent_store(location, n_workers=4):
+    max_size = 6.5 * ENTRY_SIZE * 1e-9
+    dataset_cache.configure(location, max_size)
+    # every worker stores uuid 1 and 4 others
+    jobs = [[1] + list(range(10+4*i, 14+4*i)) for i in range(n_workers)]
+    with ProcessPoolExecutor(n_workers) as executor:
+        list(executor.map(store, [location]*n_workers, [max_size]*n_workers, jobs))
+
+    names = os.listdir(location)
+    assert not any(name.endswith('.tmp') for name in names), names
+    entries = dataset_cache._scan()
+    assert len(entries) == 6, entries
+    assert sum(entries.values()) <= dataset_cache.max_size
+    for name in entries:
+        assert check_loaded(int(name)), name
+    dataset_cache.clear()
+    print(f'concurrent store by {n_workers} processes')
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as location:
+        check_store_load(location)
+        check_lru_eviction(location)
+        check_concurrent_store(location)
+    print('ok')
@@ -0,0 +1,166 @@
+'''
+Compares the vectorized reference point selection of the digitizer
+post-selection with the original loop over the cycles.
+
+The data is random, with and without time traces. The original loop fails
+when reference levels are tied or NaN. For those cycles the new selection
+must take the first tied point and skip the NaN points.
+'''
+import numpy as np
+from qcodes import MultiParameter
+
+from core_tools.utility.mk_digitizer_param import _digitzer_post_selection_param
+
+
+class sim_digitizer_param(MultiParameter):
+    '''
+    Digitizer measurement parameter returning the data set by the test.
+    '''
+    def __init__(self, n_cycles, n_corr_points, n_t=None, n_channels=2):
+        n = n_cycles*n_corr_points*2
+        if n_t is None:
+            shape = (n,)
+            setpoints = (np.arange(n),)
+            setpoint_names = ('n_cycles',)
+        else:
+            shape = (n, n_t)
+            setpoints = (np.arange(n), np.arange(n_t))
+            setpoint_names = ('n_cycles', 'time')
+        names = tuple(f'ch{i+1}' for i in range(n_channels))
+        super().__init__('sim_dig', names=names, shapes=(shape,)*n_channels,
+                         labels=names, units=('mV',)*n_channels,
+                         setpoints=(setpoints,)*n_channels,
+                         setpoint_names=(setpoint_names,)*n_channels)
+        self.dig = None
+        self.data = None
+
+    def get_raw(self):
+        return [self.data]*len(self.names)
+
+
+def loop_selection(param, data_all):
+    '''
+    Original implementation of _digitzer_post_selection_param.get_raw.
+    '''
+    my_data = []
+
+    for n in range(len(param.shapes)):
+
+        SD_level = np.empty((param.n_corr_points,))
+        # 0 -> n
+        # copy: the original subtracted the reference value in place from the
+        # data of the digitizer in every pass, which corrupted the location output.
+        data_orignal = np.array(data_all[0])
+        data_out = np.empty(param.shapes[0])
+        n_cycles = param.shapes[0][0]
+
+        for i in range(n_cycles):
+            # if time steps present
+            if data_orignal.ndim == 2:
+                data_orignal_reshaped = data_orignal.reshape(n_cycles, param.n_corr_points, 2, param.shapes[0][1] )
+                SD_level = np.average(data_orignal_reshaped[i,:, 1, :], axis=1)
+                SD_level_ref = np.copy(SD_level)
+                SD_level -= param.wanted_reference_value
+                SD_level = np.abs(SD_level)
+                location = np.where(SD_level == np.min(SD_level))
+
+                _extra_offset = param.wanted_reference_value - SD_level_ref[location[0]]
+
+                data_out[i] = data_orignal_reshaped[i, location[0], 0, :] + _extra_offset
+            else:
+                data_orignal_reshaped = data_orignal.reshape(n_cycles, param.n_corr_points, 2)
+                SD_level = data_orignal_reshaped[i,:, 1]
+                SD_level_ref = np.copy(data_orignal_reshaped[i,:, 1])
+
+                SD_level -= param.wanted_reference_value
+                SD_level = np.abs(SD_level)
+                location = np.where(SD_level == np.min(SD_level))
+
+                _extra_offset = param.wanted_reference_value - SD_level_ref[location[0]]
+
+                # item(): numpy >= 2.0 does not assign arrays of size 1 to a scalar.
+                # It fails like the original when more than 1 point is selected.
+                if n == 0:
+                    data_out[i] = (data_orignal_reshaped[i, location[0], 0] + _extra_offset).item()
+                if n == 1:
+                    data_out[i] = location[0].item()
+        my_data.append(data_out)
+
+    return my_data
+
+
+def make_param(n_cycles, n_corr_points, n_t=None, seed=0):
+    rng = np.random.default_rng(seed)
+    source = sim_digitizer_param(n_cycles, n_corr_points, n_t)
+    shape = source.shapes[0]
+    source.data = rng.normal(size=shape)
+    param = _digitzer_post_selection_param(source, n_corr_points, 0.2)
+    return source, param
+
+
+def reshaped(source, param):
+    n_cycles = param.shapes[0][0]
+    return source.data.reshape(n_cycles, param.n_corr_points, 2, -1)
+
+
+def check_equal_random(n_t):
+    source, param = make_param(200, 5, n_t)
+    expected = loop_selection(param, source.get())
+    result = param.get()
+    # the original loop leaves the unused outputs uninitialized.
+    n_checked = len(result) if n_t is not None else 2
+    for i in range(n_checked):
+        np.testing.assert_array_equal(result[i], expected[i])
+    print(f'random data n_t={n_t}: equal')
+
+
+def check_ties(n_t):
+    source, param = make_param(50, 4, n_t, seed=1)
+    data = reshaped(source, param)
+    # quantized levels: points 1 and 3 of every cycle have the same reference level.
+    data[:, 3, 1] = data[:, 1, 1]
+    data[:, [0, 2], 1] = 10.0
+    try:
+        loop_selection(param, source.get())
+        raise Exception('original loop did not fail on ties')
+    except ValueError:
+        pass
+    result = param.get()
+    ref_level = np.average(data[:, 1, 1], axis=-1)
+    expected = data[:, 1, 0] + (param.wanted_reference_value - ref_level)[:, np.newaxis]
+    np.testing.assert_array_equal(result[0], expected.reshape(result[0].shape))
+    if n_t is None:
+        np.testing.assert_array_equal(result[1], np.full(50, 1.0))
+    print(f'ties n_t={n_t}: first point selected')
+
+
+def check_nan(n_t):
+    source, param = make_param(50, 4, n_t, seed=2)
+    data = reshaped(source, param)
+    # closest point NaN in cycles 0..9, all points NaN in cycle 10
+    data[:, 2, 1] = param.wanted_reference_value
+    data[:10, 2, 1, 0] = np.nan
+    data[10, :, 1, 0] = np.nan
+
+    # the original loop, with the NaN points removed, gives the expected result
+    result = param.get()
+    for i in range(param.shapes[0][0]):
+        if i == 10:
+            assert np.all(np.isnan(result[0][i]))
+            continue
+        valid = ~np.isnan(np.average(data[i, :, 1], axis=-1))
+        cycle_source, cycle_param = make_param(1, int(np.sum(valid)), n_t)
+        cycle_source.data = data[i, valid].reshape(cycle_source.shapes[0])
+        expected = loop_selection(cycle_param, cycle_source.get())
+        np.testing.assert_array_equal(result[0][i], expected[0][0])
+        if n_t is None:
+            assert np.flatnonzero(valid)[int(expected[1][0])] == result[1][i]
+    print(f'NaN n_t={n_t}: NaN points skipped')
+
+
+if __name__ == '__main__':
+    for n_t in [None, 10]:
+        check_equal_random(n_t)
+        check_ties(n_t)
+        check_nan(n_t)
+    print('ok')
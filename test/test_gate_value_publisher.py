@@ -0,0 +1,155 @@
+'''
+Checks that the parameter viewers do not poll the dacs.
+
+Two parameter viewers are opened on a gates object with counting dacs.
+Without sets the dacs may only be read at the fallback rate.
+A set on one gate must reach both viewers within one frame.
+
+Run with QT_QPA_PLATFORM=offscreen QT_QUICK_BACKEND=software to test without display.
+'''
+import time
+
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+
+from core_tools.drivers.gates import gates
+from core_tools.drivers.hardware.hardware import hardware
+from core_tools.drivers.hardware.virtual_gate_matrix import VirtualGateMatrix
+from core_tools.drivers.hardware.virtual_gate_matrix_data import VirtualGateMatrixData
+from core_tools.drivers.virtual_dac import virtual_dac
+from core_tools.GUI.gate_value_publisher import gate_value_publisher
+from core_tools.GUI.param_viewer.param_viewer_GUI_main import param_viewer
+from core_tools.GUI.parameter_viewer_qml.param_viewer import param_viewer as param_viewer_qml
+
+
+class counting_dac(virtual_dac):
+    n_get = 0
+
+    def _get_dac(self, number):
+        counting_dac.n_get += 1
+        return super()._get_dac(number)
+
+
+def create_gates():
+    dacs = [counting_dac('dac_a', 'virtual'), counting_dac('dac_b', 'virtual')]
+    hw = hardware()
+    hw.dac_gate_map = {
+        'B0': (0, 1), 'P1': (0, 2), 'B1': (0, 3), 'P2': (0, 4), 'B2': (0, 5),
+        'SD1_P': (1, 1), 'SD1_B1': (1, 2), 'SD1_B2': (1, 3),
+        }
+    # virtual gate matrix without database
+    real_gates = ['B0', 'P1', 'B1', 'P2', 'B2', 'SD1_P']
+    matrix = np.eye(len(real_gates)) + 0.1*np.eye(len(real_gates), k=1)
+    data = VirtualGateMatrixData('test', real_gates, ['v'+name for name in real_gates], matrix)
+    data.saver = lambda data: None
+    hw.virtual_gates.virtual_gate_names.append('test')
+    hw.virtual_gates.test = VirtualGateMatrix(data)
+    return gates('gates', hw, dacs)
+
+
+def run_event_loop(app, duration):
+    t_end = time.perf_counter() + duration
+    while time.perf_counter() < t_end:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+        time.sleep(0.001)
+
+
+def check_no_polling(app, gates_obj, duration=3.0):
+    n_real = len(gates_obj.gates)
+    counting_dac.n_get = 0
+    run_event_loop(app, duration)
+    n_refresh = counting_dac.n_get / n_real
+    polling_rate = 2 * 2 * duration  # 2 viewers, 2 tabs, 2 Hz
+    print(f'dac reads in {duration:.1f} s: {counting_dac.n_get} '
+          f'({n_refresh:.0f} refreshes, polling would give {polling_rate:.0f})')
+    assert n_refresh <= duration / gate_value_publisher.fallback_interval + 1
+
+
+def check_set_published(app, gates_obj):
+    received = []
+    publisher = gate_value_publisher.get(gates_obj)
+
+    def on_change(values):
+        received.append((time.perf_counter(), values))
+
+    publisher.subscribe(on_change)
+    t_set = time.perf_counter()
+    gates_obj.P1(12.5)
+    run_event_loop(app, 0.2)
+    publisher.unsubscribe(on_change)
+
+    assert len(received) == 1, len(received)
+    t_received, values = received[0]
+    latency = t_received - t_set
+    print(f'set P1 published after {latency*1000:.1f} ms')
+    assert latency < 2 * gate_value_publisher.frame_interval / 1000
+    assert values['P1'] == 12.5
+    assert values['vP1'] == gates_obj.vP1()
+
+
+def check_viewers_updated(pv, pv_qml):
+    gate = next(param for param in pv.real_gates if param.name == 'P1')
+    assert gate.gui_input_param.value() == 12.5
+    row = pv_qml.real_gate_model.gates.index('P1')
+    assert pv_qml.real_gate_model.current_vals[row] == 12.5
+
+
+def check_refresh(gates_obj):
+    # change on the dac without gates
+    dac_param = gates_obj._dac_params['P2']
+    dac_param.set(-20.0)
+    v = gates_obj.refresh()
+    assert gates_obj.P2.cache.get(get_if_invalid=False) == v['P2'] == -20.0
+    assert gates_obj.vP2.cache.get(get_if_invalid=False) == v['vP2']
+    print('refresh updates the parameter cache')
+
+
+def check_matrix_change_published(app, gates_obj):
+    gates_obj.B1(10.0)
+    run_event_loop(app, 0.2)
+    received = []
+    publisher = gate_value_publisher.get(gates_obj)
+    publisher.subscribe(received.append)
+    matrix = gates_obj.hardware.virtual_gates.test
+    v_P1 = gates_obj.P1.cache.get(get_if_invalid=False)
+
+    # change of the matrix, e.g. by the virtual gate matrix GUI.
+    matrix.set_element(1, 2, 0.3, v2r=False)
+    run_event_loop(app, 0.2)
+    assert len(received) == 1, len(received)
+    assert np.isclose(received[-1]['vP1'], v_P1 + 0.3*10.0)
+
+    # change of the matrix data without notification is picked up by refresh.
+    matrix.virtual_gate_matrix[1, 2] = 0.0
+    publisher.refresh()
+    run_event_loop(app, 0.2)
+    publisher.unsubscribe(received.append)
+    assert len(received) == 2, len(received)
+    assert np.isclose(received[-1]['vP1'], v_P1)
+    print('virtual gate matrix change published')
+
+
+def check_qml_viewer_closed(app, gates_obj, pv_qml):
+    publisher = gate_value_publisher.get(gates_obj)
+    n_subscribers = publisher._n_subscribers
+    pv_qml.win.close()
+    app.processEvents()
+    assert publisher._n_subscribers == n_subscribers - 2
+    print('QML viewer unsubscribed on close')
+
+
+if __name__ == '__main__':
+    app = QtWidgets.QApplication([])
+    gate_value_publisher.fallback_interval = 1.0
+
+    gates_obj = create_gates()
+    pv = param_viewer(gates_obj)
+    pv_qml = param_viewer_qml(gates_obj)
+
+    check_no_polling(app, gates_obj)
+    check_set_published(app, gates_obj)
+    check_viewers_updated(pv, pv_qml)
+    check_refresh(gates_obj)
+    check_matrix_change_published(app, gates_obj)
+    check_qml_viewer_closed(app, gates_obj, pv_qml)
+    print('ok')
@@ -0,0 +1,90 @@
+'''
+Checks that save_hdf5 writes the same file as save_xr_hdf5(ds2xarray(ds)).
+
+save_hdf5 writes the data variables in blocks and compresses 'gzip' chunks
+in threads. The block size is reduced to get multiple blocks and edge chunks.
+'''
+import gzip
+import os
+import tempfile
+
+import numpy as np
+import xarray as xr
+
+from core_tools.data.SQL.buffer_writer import buffer_reference
+from core_tools.data.ds import ds_hdf5
+from core_tools.data.ds.data_set_core import data_set
+from core_tools.data.ds.data_set_raw import data_set_raw, m_param_raw
+from core_tools.data.ds.ds2xarray import ds2xarray
+
+
+def make_dataset(shape, n_measured=2):
+    rng = np.random.default_rng(len(shape))
+    params = []
+    setpoint_ids = [100+i for i in range(len(shape))]
+    for i, n in enumerate(shape):
+        param = m_param_raw(
+            param_id=setpoint_ids[i], nth_set=0, nth_dim=i, param_id_m_param=1,
+            setpoint=True, setpoint_local=False, name_gobal=f'x{i}', name=f'x{i}',
+            label=f'x{i}', unit='mV', dependency=[], shape=[n], size=n, oid=0)
+        param.data_buffer = buffer_reference(np.linspace(-1, 1, n))
+        params.append(param)
+    measured = []
+    for i in range(n_measured):
+        data = rng.normal(size=shape)
+        # partially written measurement
+        data.flat[data.size*2//3:] = np.nan
+        param = m_param_raw(
+            param_id=1, nth_set=i, nth_dim=-1, param_id_m_param=1,
+            setpoint=False, setpoint_local=False, name_gobal='m', name='m',
+            label='signal', unit='mV', dependency=setpoint_ids, shape=list(shape),
+            size=int(np.prod(shape)), oid=0)
+        param.data_buffer = buffer_reference(data)
+        measured.append(param)
+    ds_raw = data_set_raw(exp_id=1, exp_uuid=1, exp_name='streaming',
+                          set_up='setup', project='project', sample='sample',
+                          measurement_parameters_raw=measured + params,
+                          UNIX_start_time=0.0, UNIX_stop_time=0.0,
+                          snapshot={'station': {}}, metadata={})
+    return data_set(ds_raw)
+
+
+def check_streamed_file(path, shape, compression, level=None, n_threads=None):
+    ds = make_dataset(shape)
+    fname_xr = os.path.join(path, 'xr.hdf5')
+    fname = os.path.join(path, 'streamed.hdf5')
+    ds_hdf5.save_xr_hdf5(ds2xarray(ds), fname_xr, compression, level)
+    ds_hdf5.save_hdf5(ds, fname, compression, level, n_threads)
+
+    expected = ds_hdf5.load_xr_hdf5(fname_xr)
+    loaded = ds_hdf5.load_xr_hdf5(fname)
+    # the gzip header contains the time of compression.
+    snapshot = gzip.decompress(expected.attrs.pop('snapshot-gzip').tobytes())
+    assert gzip.decompress(loaded.attrs.pop('snapshot-gzip').tobytes()) == snapshot
+    xr.testing.assert_identical(loaded, expected)
+    for name in expected.variables:
+        encoding = {key: expected[name].encoding.get(key)
+                    for key in ['compression', 'compression_opts', 'chunksizes', 'dtype']}
+        assert {key: loaded[name].encoding.get(key) for key in encoding} == encoding, name
+
+
+def check_streaming():
+    # blocks of 3000 values, chunks of 500 values
+    read_block_size, chunk_size = ds_hdf5.READ_BLOCK_SIZE, ds_hdf5.CHUNK_SIZE
+    ds_hdf5.READ_BLOCK_SIZE, ds_hdf5.CHUNK_SIZE = 3000 * 8, 500 * 8
+    try:
+        with tempfile.TemporaryDirectory() as path:
+            for shape in [(10_003,), (101, 37), (13, 17, 23)]:
+                for compression, level, n_threads in [
+                        (None, None, None),
+                        ('gzip', None, 1),
+                        ('gzip', 4, 3),
+                        ('lzf', None, None),
+                        ]:
+                    check_streamed_file(path, shape, compression, level, n_threads)
+    finally:
+        ds_hdf5.READ_BLOCK_SIZE, ds_hdf5.CHUNK_SIZE = read_block_size, chunk_size
+
+
+if __name__ == '__main__':
+    check_streaming()
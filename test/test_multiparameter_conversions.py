@@ -0,0 +1,78 @@
+'''
+Checks the results of nested ConvertingMultiParameter and MappedMultiParameter.
+
+Every layer must be read with get(), which updates its cache. Outputs of
+MappedMultiParameter with the same channel and function must be separate
+arrays.
+'''
+import numpy as np
+from qcodes import MultiParameter
+
+from core_tools.utility.multiparameter_conversions import (
+    ConvertingMultiParameter,
+    MappedMultiParameter,
+    )
+
+
+class sim_digitizer(MultiParameter):
+    '''
+    Returns I/Q data for 2 channels.
+    '''
+    def __init__(self):
+        super().__init__('dig', names=('ch1', 'ch2'), shapes=((10,), (10,)),
+                         labels=('ch1', 'ch2'), units=('mV', 'mV'),
+                         setpoints=((np.arange(10),),)*2,
+                         setpoint_names=(('t',),)*2,
+                         setpoint_labels=(('time',),)*2,
+                         setpoint_units=(('ns',),)*2)
+        self.data = [
+            np.arange(10) + 1j*np.arange(10, 20),
+            np.arange(20, 30) - 1j*np.arange(10),
+            ]
+
+    def get_raw(self):
+        return [d.copy() for d in self.data]
+
+
+def check_nested_get():
+    dig = sim_digitizer()
+    mapped = MappedMultiParameter('mapped', dig, {
+        'ch1_I': ('ch1', 'I'),
+        'ch2_abs': ('ch2', 'abs'),
+        })
+    scaled = ConvertingMultiParameter('scaled', mapped, lambda x: 2*x)
+    result = scaled()
+    np.testing.assert_array_equal(result[0], 2*np.arange(10))
+    np.testing.assert_array_equal(result[1], 2*np.abs(dig.data[1]))
+    # the intermediate layer is read with get()
+    np.testing.assert_array_equal(mapped.cache.get(get_if_invalid=False)[1], np.abs(dig.data[1]))
+    print('nested parameters read with get()')
+
+
+def check_duplicate_outputs():
+    dig = sim_digitizer()
+    mapped = MappedMultiParameter('mapped', dig, {
+        'phase1': ('ch1', 'angle'),
+        'phase2': ('ch1', 'angle'),
+        'phase_deg': ('ch1', 'angle_deg', 'degrees'),
+        'amp': ('ch1', np.abs),
+        'amp_copy': ('ch1', np.abs),
+        })
+    result = mapped()
+    expected = np.angle(dig.data[0])
+    np.testing.assert_array_equal(result[0], expected)
+    np.testing.assert_array_equal(result[1], expected)
+    np.testing.assert_allclose(result[2], np.angle(dig.data[0], deg=True))
+    assert result[0] is not result[1]
+    assert result[3] is not result[4]
+    result[0] += 1.0
+    result[3][:] = 0.0
+    np.testing.assert_array_equal(result[1], expected)
+    np.testing.assert_array_equal(result[4], np.abs(dig.data[0]))
+    print('duplicate outputs are separate arrays')
+
+
+if __name__ == '__main__':
+    check_nested_get()
+    check_duplicate_outputs()
+    print('ok')
@@ -0,0 +1,162 @@
+'''
+Checks the schedule cache of Hvi2ScheduleLoader with multiple loaders.
+
+The compiled schedules and the FPGA images are simulated. A schedule held
+by a loader may not be closed by the eviction of the cache, a change of
+the FPGA images or the close of another loader. A loader must get its
+schedule from the cache again after close_all() or a change of the FPGA
+images.
+'''
+from core_tools.HVI2 import hvi2_schedule_loader
+from core_tools.HVI2.hvi2_schedule_loader import Hvi2ScheduleLoader
+
+
+class sim_pulse_lib:
+    awg_devices = {}
+    marker_channels = {}
+
+
+class sim_script:
+    name = 'SingleShot'
+
+    def __init__(self, configuration):
+        self.configuration = configuration
+
+
+class sim_schedule:
+    '''
+    Simulated Hvi2Schedule.
+    '''
+    n_compiled = 0
+
+    def __init__(self, hardware, script, configuration_hash=None):
+        self.script = script
+        self.configuration_hash = configuration_hash
+        self.closed = False
+        self._is_loaded = False
+        sim_schedule.n_compiled += 1
+
+    def is_loaded(self):
+        return self._is_loaded
+
+    def load(self):
+        assert not self.closed, 'closed schedule loaded'
+        self._is_loaded = True
+
+    def unload(self):
+        self._is_loaded = False
+
+    def close(self):
+        self.unload()
+        self.closed = True
+
+
+fpga_images = ['image 1']
+
+
+def setup():
+    hvi2_schedule_loader.Hvi2Schedule = sim_schedule
+    hvi2_schedule_loader.get_fpga_image_fingerprint = lambda hardware: fpga_images[0]
+    Hvi2ScheduleLoader.script_classes = {sim_script}
+    Hvi2ScheduleLoader.max_cached_schedules = 2
+    Hvi2ScheduleLoader.close_all()
+
+
+def make_loader(delay):
+    loader = Hvi2ScheduleLoader(sim_pulse_lib(), 'SingleShot')
+    loader.set_configuration({'acquisition_delay_ns': delay}, 1)
+    loader.load()
+    return loader
+
+
+def check_eviction():
+    setup()
+    loaders = [make_loader(delay) for delay in range(4)]
+    for loader in loaders:
+        loader.unload()
+    # all schedules are held by a loader
+    assert len(Hvi2ScheduleLoader.schedule_cache) == 4
+    assert not any(loader._schedule.closed for loader in loaders)
+    # release by reconfiguration. The least recently used are evicted.
+    first = loaders[0]._schedule
+    loaders[0].set_configuration({'acquisition_delay_ns': 10}, 1)
+    loaders[0].load()
+    loaders[0].unload()
+    assert first.closed
+    assert len(Hvi2ScheduleLoader.schedule_cache) == 4
+    loaders[1].close()
+    loaders[2].close()
+    assert len(Hvi2ScheduleLoader.schedule_cache) == 2
+    print('held schedules are not evicted')
+
+
+def check_shared_schedule():
+    setup()
+    loader1 = make_loader(1)
+    loader2 = make_loader(1)
+    assert loader1._schedule is loader2._schedule
+    schedule = loader1._schedule
+    loader1.close()
+    assert not schedule.closed
+    loader2.load()
+    loader2.close()
+    assert schedule.closed
+    assert len(Hvi2ScheduleLoader.schedule_cache) == 0
+    print('shared schedule closed by last loader')
+
+
+def check_fpga_change():
+    setup()
+    loader1 = make_loader(1)
+    loader2 = make_loader(2)
+    loader2.unload()
+    old1 = loader1._schedule
+    old2 = loader2._schedule
+    n_compiled = sim_schedule.n_compiled
+
+    fpga_images[0] = 'image 2'
+    loader3 = make_loader(3)
+    assert len(Hvi2ScheduleLoader.schedule_cache) == 1
+    # held schedules stay open until released
+    assert not old1.closed and not old2.closed
+
+    loader2.load()
+    assert loader2._schedule is not old2
+    assert old2.closed
+    assert sim_schedule.n_compiled == n_compiled + 2
+    loader1.close()
+    assert old1.closed
+    loader3.close()
+    print('schedules recompiled after FPGA change')
+
+
+def check_close_all():
+    setup()
+    loader = make_loader(1)
+    old = loader._schedule
+    # held schedule removed from the cache by FPGA change
+    loader2 = make_loader(2)
+    old2 = loader2._schedule
+    fpga_images[0] = 'image 3'
+    loader3 = make_loader(3)
+    assert not old2.closed
+
+    Hvi2ScheduleLoader.close_all()
+    assert old.closed and old2.closed and loader3._schedule is None
+    assert len(Hvi2ScheduleLoader._schedule_users) == 0
+    loader.load()
+    assert loader._schedule is not old
+    assert Hvi2ScheduleLoader.schedule_cache[old.configuration_hash] is loader._schedule
+    assert Hvi2ScheduleLoader._schedule_users == {loader._schedule: 1}
+    loader2.close()
+    loader.close()
+    assert len(Hvi2ScheduleLoader._schedule_users) == 0
+    print('schedule retrieved from cache after close_all')
+
+
+if __name__ == '__main__':
+    check_eviction()
+    check_shared_schedule()
+    check_fpga_change()
+    check_close_all()
+    print('ok')
@@ -0,0 +1,86 @@
+'''
+Checks the events recorded by schedule_trace.
+
+The order of the events of Hvi2ScheduleLoader is checked with simulated
+schedules, as in test_schedule_loader_cache. The summary is checked with
+phases of known duration.
+'''
+import time
+
+from core_tools.HVI2.schedule_trace import ScheduleTrace, schedule_trace
+from core_tools.HVI2.hvi2_schedule_loader import Hvi2ScheduleLoader, configuration_hash
+from test_schedule_loader_cache import setup, make_loader
+
+
+def check_event_order():
+    setup()
+    schedule_trace.clear()
+    received = []
+    schedule_trace.add_listener(received.append)
+    try:
+        loader = make_loader(1)
+        loader.unload()
+        loader.set_configuration({'acquisition_delay_ns': 2}, 1)
+        loader.load()
+        loader.set_configuration({'acquisition_delay_ns': 1}, 1)
+        loader.load()
+        loader.close()
+    finally:
+        schedule_trace.remove_listener(received.append)
+
+    events = schedule_trace.get_events()
+    assert received == events
+    assert [entry['event'] for entry in events] == [
+        'set_configuration', 'cache_miss',
+        'set_configuration', 'cache_miss',
+        'set_configuration', 'cache_hit',
+        ]
+    hashes = [entry['configuration_hash'] for entry in events]
+    assert hashes[1] == hashes[5] == configuration_hash(loader._configuration)
+    assert hashes[1] != hashes[3]
+    times = [entry['time'] for entry in events]
+    assert times == sorted(times)
+    assert all(entry['script_name'] == 'SingleShot' for entry in events)
+    assert len(schedule_trace.get_events('cache_miss')) == 2
+    print('events in order of the schedule lifecycle')
+
+
+def check_summary():
+    trace = ScheduleTrace(max_events=10)
+    for _ in range(3):
+        with trace.phase('compile', 'script', 'hash', n_instructions=10):
+            time.sleep(0.01)
+    trace.event('cache_hit', 'script', 'hash')
+    try:
+        with trace.phase('load', 'script', 'hash'):
+            raise ValueError('load failed')
+    except ValueError:
+        pass
+
+    summary = trace.summary()
+    assert set(summary) == {'compile', 'cache_hit', 'load'}
+    count, total = summary['compile']
+    assert count == 3 and 0.03 <= total < 0.1, summary
+    assert summary['cache_hit'] == (1, 0.0)
+    # failed phase is recorded too
+    assert summary['load'][0] == 1
+    assert trace.get_events('compile')[0]['n_instructions'] == 10
+
+    # only the last max_events are kept
+    for _ in range(20):
+        trace.event('cache_hit', 'script', 'hash')
+    assert len(trace.get_events()) == 10
+    assert trace.summary() == {'cache_hit': (10, 0.0)}
+
+    trace.enabled = False
+    trace.event('cache_miss', 'script', 'hash')
+    with trace.phase('compile', 'script', 'hash'):
+        pass
+    assert trace.summary() == {'cache_hit': (10, 0.0)}
+    print('summary of events')
+
+
+if __name__ == '__main__':
+    check_event_order()
+    check_summary()
+    Hvi2ScheduleLoader.close_all()
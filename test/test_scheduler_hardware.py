@@ -0,0 +1,166 @@
+'''
+Checks that SchedulerHardware only configures AWG channels when needed.
+
+The AWG and its SD1 module are simulated. The wave shape and queue mode
+must be written on the first load, skipped on the next loads and written
+again for a re-created AWG with the same name, after the module has been
+closed, after invalidate_module_state() and after the release of the schedule.
+A switch to another schedule does not release the AWGs to other code, so
+the settings are not written again.
+'''
+import gc
+
+from core_tools.HVI2.scheduler_hardware import SchedulerHardware
+
+AOU_AWG = 6
+CYCLIC = 1
+
+
+class sim_SD_AOU:
+    '''
+    Simulated keysightSD1.SD_AOU.
+    '''
+    def __init__(self):
+        self._open = True
+
+    def isOpen(self):
+        return self._open
+
+    def close(self):
+        self._open = False
+
+
+class sim_awg:
+    '''
+    AWG driver with the methods used by the schedules.
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.awg = sim_SD_AOU()
+        self.writes = []
+
+    def set_channel_wave_shape(self, wave_shape, channel):
+        self.writes.append(('wave_shape', channel, wave_shape))
+
+    def awg_queue_config(self, channel, queue_mode):
+        self.writes.append(('queue_mode', channel, queue_mode))
+
+    def close(self):
+        self.awg.close()
+
+
+def configure(hw, awg, wave_shape=AOU_AWG, queue_mode=CYCLIC):
+    # configuration as done by Hvi2Schedule.configure_modules
+    awg.writes = []
+    for ch in range(1, 5):
+        hw.configure_awg_channel(awg, ch, wave_shape, queue_mode)
+    return len(awg.writes)
+
+
+def check_skip_configured():
+    hw = SchedulerHardware()
+    awg = sim_awg('AWG1')
+    assert configure(hw, awg) == 8
+    assert configure(hw, awg) == 0
+    # other settings must be written
+    assert configure(hw, awg, queue_mode=0) == 8
+    assert configure(hw, awg) == 8
+
+
+def check_recreated_awg():
+    hw = SchedulerHardware()
+    awg = sim_awg('AWG1')
+    assert configure(hw, awg) == 8
+    awg.close()
+    del awg
+    gc.collect()
+    assert len(hw._awg_channel_config) == 0
+    awg = sim_awg('AWG1')
+    assert configure(hw, awg) == 8
+    # old instrument still referenced somewhere.
+    other = sim_awg('AWG1')
+    assert configure(hw, other) == 8
+    assert configure(hw, awg) == 0
+
+
+def check_closed_module():
+    hw = SchedulerHardware()
+    awg = sim_awg('AWG1')
+    assert configure(hw, awg) == 8
+    # module closed and opened again by the driver
+    awg.awg.close()
+    assert configure(hw, awg) == 8
+    awg.awg = sim_SD_AOU()
+    assert configure(hw, awg) == 8
+    assert configure(hw, awg) == 0
+
+
+def check_invalidate():
+    hw = SchedulerHardware()
+    awg = sim_awg('AWG1')
+    assert configure(hw, awg) == 8
+    # settings changed outside the schedules
+    hw.invalidate_module_state()
+    assert configure(hw, awg) == 8
+    hw.close()
+    assert configure(hw, awg) == 8
+
+
+class sim_schedule:
+    '''
+    Simulated Hvi2Schedule with the calls to SchedulerHardware.
+    '''
+    def __init__(self, hw, awg):
+        self.hw = hw
+        self.awg = awg
+        self.loaded = False
+        self.n_writes = None
+
+    def load(self):
+        if self.loaded:
+            return
+        self.hw.release_schedule(invalidate=False)
+        self.n_writes = configure(self.hw, self.awg)
+        self.hw.set_schedule(self)
+        self.loaded = True
+
+    def unload(self):
+        if not self.loaded:
+            return
+        self.loaded = False
+        if self.hw.active_schedule is self:
+            self.hw.release_schedule()
+
+
+def check_release():
+    hw = SchedulerHardware()
+    awg = sim_awg('AWG1')
+    schedule1 = sim_schedule(hw, awg)
+    schedule2 = sim_schedule(hw, awg)
+    schedule1.load()
+    assert schedule1.n_writes == 8
+    # switch of schedule
+    schedule2.load()
+    assert schedule2.n_writes == 0
+    assert not schedule1.loaded
+    schedule1.load()
+    assert schedule1.n_writes == 0
+    # unload, e.g. by pulse_lib. The AWG queues can be flushed before the next load.
+    schedule1.unload()
+    assert hw.active_schedule is None
+    schedule2.load()
+    assert schedule2.n_writes == 8
+    # release by other code, e.g. when the video mode window is closed.
+    hw.release_schedule()
+    assert not schedule2.loaded
+    schedule1.load()
+    assert schedule1.n_writes == 8
+
+
+if __name__ == '__main__':
+    check_skip_configured()
+    check_recreated_awg()
+    check_closed_module()
+    check_invalidate()
+    check_release()
+    print('ok')
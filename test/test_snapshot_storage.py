@@ -0,0 +1,150 @@
+'''
+Test of the content-addressed snapshot storage with a local PostgreSQL database.
+
+Stores the snapshots of 1000 measurements that only differ in a few gate
+voltages. The snapshots are stored as JSON in the measurement table (old
+method) and as chunks (new method). The test compares the storage size and
+time per measurement and checks that every snapshot is loaded unchanged.
+The created measurements are deleted afterwards.
+
+Unreferenced chunks must be removed by remove_unreferenced_chunks and the
+snapshots of existing measurements must still load afterwards.
+'''
+import json
+import time
+
+import numpy as np
+
+import core_tools as ct
+from core_tools.data.SQL.SQL_common_commands import execute_query, execute_statement
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
+from core_tools.data.SQL.queries.dataset_creation_queries import measurement_overview_queries
+from core_tools.data.SQL.queries.dataset_loading_queries import load_ds_queries
+from core_tools.data.SQL.queries.snapshot_queries import snapshot_queries
+
+
+def make_station_snapshot(gate_voltages, n_dacs=20, n_instruments=20):
+    instruments = {}
+    for i in range(n_dacs):
+        instruments[f'dac{i}'] = {
+            '__class__': 'core_tools.drivers.virtual_dac.virtual_dac',
+            'name': f'dac{i}',
+            'parameters': {
+                f'dac{j}': {
+                    '__class__': 'qcodes.parameters.parameter.Parameter',
+                    'name': f'dac{j}', 'label': f'DAC {j}', 'unit': 'mV',
+                    'value': 0.0, 'raw_value': 0.0,
+                    'ts': '2024-01-01 12:00:00', 'inter_delay': 0, 'post_delay': 0,
+                    }
+                for j in range(1, 17)
+                },
+            }
+    for i in range(n_instruments):
+        instruments[f'instrument{i}'] = {
+            'name': f'instrument{i}',
+            'parameters': {f'setting{j}': {'value': j*1.5, 'unit': 'V'} for j in range(50)},
+            }
+    instruments['gates'] = {
+        'name': 'gates',
+        'parameters': {name: {'value': value, 'unit': 'mV'} for name, value in gate_voltages.items()},
+        }
+    snapshot = {'station': {'instruments': instruments, 'parameters': {}, 'components': {}},
+                'measurement': {'vP1': {'value': 0.0}}}
+    # same JSON round trip as create_new_data_set
+    return json.loads(json.dumps(snapshot))
+
+
+def table_size(conn, table_name):
+    return execute_query(conn, "SELECT pg_total_relation_size(%s);", placeholders=[table_name])[0][0]
+
+
+def new_measurements(conn, n):
+    uuids = []
+    for i in range(n):
+        _, uuid = measurement_overview_queries.new_measurement(conn, 'snapshot_test', time.time())
+        uuids.append(uuid)
+    conn.commit()
+    return uuids
+
+
+def check_remove_unreferenced(conn, uuids, snapshots):
+    # snapshot of a deleted measurement with a unique instrument.
+    deleted_uuid = max(uuids) + 10**9
+    snapshot = make_station_snapshot({'P1': 1.0})
+    snapshot['station']['instruments']['deleted'] = {'parameters': {f'x{i}': i for i in range(200)}}
+    snapshot_queries.store(conn, deleted_uuid, snapshot)
+    conn.commit()
+    n_removed = snapshot_queries.remove_unreferenced_chunks(conn)
+    assert n_removed > 0
+    assert snapshot_queries.get_hash(conn, deleted_uuid) is None
+    assert snapshot_queries.remove_unreferenced_chunks(conn) == 0
+    for uuid, snapshot in zip(uuids[::100], snapshots[::100]):
+        assert snapshot_queries.load(conn, uuid) == snapshot
+    conn.commit()
+    print(f'removed {n_removed} unreferenced chunks')
+
+
+def run(n=1000):
+    conn = SQL_database_manager().conn_local
+    snapshot_queries.generate_table(conn)
+    rng = np.random.default_rng(1)
+    gates = {f'P{i}': 0.0 for i in range(40)}
+    snapshots = []
+    for i in range(n):
+        for name in rng.choice(list(gates), 3):
+            gates[name] = float(np.round(rng.uniform(-500, 500), 2))
+        snapshots.append(make_station_snapshot(gates))
+
+    uuids_json = new_measurements(conn, n)
+    uuids_chunks = new_measurements(conn, n)
+    try:
+        size_overview = table_size(conn, measurement_overview_queries.table_name)
+        t0 = time.perf_counter()
+        for uuid, snapshot in zip(uuids_json, snapshots):
+            measurement_overview_queries.update_measurement(conn, uuid, snapshot=snapshot)
+            conn.commit()
+        t1 = time.perf_counter()
+        size_json = table_size(conn, measurement_overview_queries.table_name) - size_overview
+
+        size_chunks = [table_size(conn, snapshot_queries.chunk_table) + table_size(conn, snapshot_queries.ref_table)]
+        t2 = time.perf_counter()
+        for i, (uuid, snapshot) in enumerate(zip(uuids_chunks, snapshots)):
+            snapshot_queries.store(conn, uuid, snapshot)
+            conn.commit()
+            if (i+1) % (n//4) == 0:
+                size_chunks.append(table_size(conn, snapshot_queries.chunk_table)
+                                   + table_size(conn, snapshot_queries.ref_table))
+        t3 = time.perf_counter()
+
+        print(f'JSON:   {(t1-t0)/n*1000:5.2f} ms/measurement, {size_json/2**20:6.1f} MB')
+        print(f'chunks: {(t3-t2)/n*1000:5.2f} ms/measurement, {(size_chunks[-1]-size_chunks[0])/2**20:6.1f} MB')
+        print('chunk storage after every quarter [MB]:',
+              ', '.join(f'{(size-size_chunks[0])/2**20:.2f}' for size in size_chunks[1:]))
+
+        for uuid, snapshot in zip(uuids_chunks, snapshots):
+            ds_raw = load_ds_queries.get_dataset_raw(conn, uuid)
+            assert ds_raw.snapshot is None
+            assert ds_raw.get_snapshot() == snapshot
+        for uuid, snapshot in zip(uuids_json, snapshots[:10]):
+            assert load_ds_queries.get_dataset_raw(conn, uuid).get_snapshot() == snapshot
+        conn.commit()
+        # the snapshot is loaded with the connection of the manager on first access.
+        ds_raw = load_ds_queries.get_dataset_raw(conn, uuids_chunks[0])
+        conn.close()
+        conn = SQL_database_manager().conn_local
+        assert ds_raw.get_snapshot() == snapshots[0]
+        print('snapshots ok')
+        check_remove_unreferenced(conn, uuids_chunks, snapshots)
+    finally:
+        uuids = uuids_json + uuids_chunks
+        execute_statement(conn, f"DELETE FROM {snapshot_queries.ref_table} WHERE uuid = ANY(%s);",
+                          placeholders=[uuids])
+        execute_statement(conn, f"DELETE FROM {measurement_overview_queries.table_name} WHERE uuid = ANY(%s);",
+                          placeholders=[uuids])
+        conn.commit()
+        snapshot_queries.remove_unreferenced_chunks(conn)
+
+
+if __name__ == '__main__':
+    ct.configure('./setup_config/ct_config_measurement.yaml')
+    run()
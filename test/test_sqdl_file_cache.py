@@ -0,0 +1,212 @@
+'''
+Test of the sQDL file cache with a local HTTP server.
+
+The server serves files as /<uid>/<file name>, like the presigned URLs of
+sQDL, with a configurable latency per request. It supports ETag, Range,
+If-Range and If-None-Match and can drop the connection half-way a transfer.
+
+file_cache is loaded from its file, because the package core_tools.data.sqdl
+requires the sQDL client.
+'''
+import hashlib
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+
+def _import_file_cache():
+    core_tools_dir = importlib.util.find_spec('core_tools').submodule_search_locations[0]
+    spec = importlib.util.spec_from_file_location(
+            'file_cache', os.path.join(core_tools_dir, 'data', 'sqdl', 'file_cache.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+FileCache = _import_file_cache().FileCache
+
+
+class FileServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, files, latency=0.0):
+        super().__init__(('127.0.0.1', 0), FileHandler)
+        self.files = files
+        self.latency = latency
+        self.drop_after = None
+        self.requests = []
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}'
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests.append((self.path, self.headers.get('Range')))
+        time.sleep(server.latency)
+        data = server.files.get(self.path)
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range', etag) == etag:
+            start = int(range_header.split('=')[1].split('-')[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data)-1}/{len(data)}')
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if server.drop_after is not None:
+            body = body[:server.drop_after]
+            server.drop_after = None
+            self.close_connection = True
+        self.wfile.write(body)
+        with server._lock:
+            server.bytes_sent += len(body)
+
+
+def make_files(n, size):
+    files = {}
+    for i in range(n):
+        uid = str(1000 + i)
+        files[f'/{uid}/ds_{uid}.hdf5'] = os.urandom(size)
+    return files
+
+
+def start_server(files, latency):
+    server = FileServer(files, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def resolver(server):
+    def resolve(uid):
+        return f'ds_{uid}.hdf5', f'{server.url}/{uid}/ds_{uid}.hdf5'
+    return resolve
+
+
+def check_parallel(n=32, latency=0.1):
+    files = make_files(n, 100_000)
+    server = start_server(files, latency)
+    uids = [path.split('/')[1] for path in files]
+    durations = {}
+    for max_connections in [1, 2, 4, 8]:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = FileCache(cache_dir, max_connections=max_connections)
+            start = time.perf_counter()
+            cache.get_files(uids, resolver(server), suffix='.hdf5')
+            durations[max_connections] = time.perf_counter() - start
+    for max_connections, duration in durations.items():
+        speedup = durations[1] / duration
+        print(f'{max_connections} connections: {duration:5.2f} s, speedup {speedup:4.1f}')
+        assert speedup > 0.8 * max_connections
+    server.shutdown()
+
+
+def check_cached_series(n=16):
+    files = make_files(n, 100_000)
+    server = start_server(files, 0.01)
+    uids = [path.split('/')[1] for path in files]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = FileCache(cache_dir)
+        paths = cache.get_files(uids, resolver(server), suffix='.hdf5')
+        for path, data in zip(paths, files.values()):
+            with open(path, 'rb') as fp:
+                assert fp.read() == data
+        n_requests = len(server.requests)
+
+        def fail(uid):
+            raise Exception('no network access expected')
+
+        # second load in a new session: no requests
+        cache = FileCache(cache_dir)
+        assert cache.get_files(uids, fail, suffix='.hdf5') == paths
+        assert cache.get_files(uids, fail, suffix='.hdf5', offline=True) == paths
+        assert len(server.requests) == n_requests
+
+        # refresh: server only answers 'not modified'
+        bytes_sent = server.bytes_sent
+        assert cache.get_files(uids, resolver(server), suffix='.hdf5', refresh=True) == paths
+        assert server.bytes_sent == bytes_sent
+
+        try:
+            FileCache(cache_dir).get_file('999', fail, suffix='.hdf5', offline=True)
+        except Exception as ex:
+            print(f'offline: {ex}')
+        else:
+            raise AssertionError('expected exception for file not in cache')
+        print(f'second load of {n} datasets: {len(server.requests) - n_requests - n} extra requests')
+    server.shutdown()
+
+
+def check_resume(size=10_000_000):
+    files = make_files(1, size)
+    server = start_server(files, 0.0)
+    uid = next(iter(files)).split('/')[1]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        server.drop_after = size // 2
+        cache = FileCache(cache_dir, retries=0)
+        try:
+            cache.get_file(uid, resolver(server))
+        except Exception as ex:
+            print(f'interrupted: {type(ex).__name__}')
+        else:
+            raise AssertionError('expected interrupted download')
+        bytes_sent = server.bytes_sent
+        assert bytes_sent == size // 2
+
+        path = cache.get_file(uid, resolver(server))
+        with open(path, 'rb') as fp:
+            assert fp.read() == files[f'/{uid}/ds_{uid}.hdf5']
+        print(f'resumed with range {server.requests[-1][1]}, '
+              f'total {server.bytes_sent} bytes for file of {size} bytes')
+        # only the last incomplete chunk is downloaded again.
+        assert server.bytes_sent <= size + FileCache.chunk_size
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # interrupted transfer resumed by retry
+        bytes_sent = server.bytes_sent
+        server.drop_after = size // 3
+        cache = FileCache(cache_dir)
+        path = cache.get_file(uid, resolver(server))
+        with open(path, 'rb') as fp:
+            assert fp.read() == files[f'/{uid}/ds_{uid}.hdf5']
+        assert server.bytes_sent - bytes_sent <= size + FileCache.chunk_size
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    check_parallel()
+    check_cached_series()
+    check_resume()
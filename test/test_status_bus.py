@@ -0,0 +1,157 @@
+'''
+Checks the status bus and the push updates of the script runner.
+
+The status shown by the script runner must follow a state change within
+one iteration of the event loop. No timer may fire while the state does
+not change. A producer publishing 1e5 events per second may not be slowed
+down by a subscriber that blocks the GUI thread.
+
+Run with QT_QPA_PLATFORM=offscreen to test without display.
+'''
+import threading
+import time
+
+from PyQt5 import QtCore, QtWidgets
+
+from core_tools.GUI.script_runner.script_runner_main import ScriptRunner
+from core_tools.GUI.status_subscriber import status_subscriber
+from core_tools.utility.status_bus import status_bus, _status_bus
+
+
+class timer_counter(QtCore.QObject):
+    '''
+    Counts the timer events of all objects.
+    '''
+    def __init__(self):
+        super().__init__()
+        self.n_timer_events = 0
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Timer:
+            self.n_timer_events += 1
+        return False
+
+
+def check_state_tracked(app, runner):
+    label = runner.video_mode_label
+    for state, info, text in [
+            ('started', {'mode': '1D'}, 'VideoMode: 1D running'),
+            ('paused', {'mode': '1D'}, 'VideoMode: PAUSED'),
+            ('started', {'mode': '2D'}, 'VideoMode: 2D running'),
+            ('error', {'message': 'failure'}, 'VideoMode: error'),
+            ('stopped', {}, 'VideoMode: stopped'),
+            ]:
+        status_bus.publish('video_mode', state, **info)
+        app.processEvents()
+        assert label.text() == text, (label.text(), text)
+    # events of other sources are not delivered to the script runner.
+    status_bus.publish('scan', 'started')
+    app.processEvents()
+    assert label.text() == 'VideoMode: stopped'
+    print('script runner follows the state in 1 event loop iteration')
+
+
+def check_no_timers_when_idle(app, duration=2.0):
+    counter = timer_counter()
+    app.installEventFilter(counter)
+    t_end = time.perf_counter() + duration
+    while time.perf_counter() < t_end:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+        time.sleep(0.01)
+    app.removeEventFilter(counter)
+    print(f'timer events in {duration:.1f} s idle: {counter.n_timer_events}')
+    assert counter.n_timer_events == 0
+
+
+def publish_events(n, rate):
+    # publishes n 'progress' events at the given rate. Returns the achieved rate.
+    t_start = time.perf_counter()
+    for i in range(n):
+        status_bus.publish('scan', 'progress', n=i, n_pts=n)
+        if i % 1000 == 0:
+            # keep the rate
+            t_sleep = t_start + i/rate - time.perf_counter()
+            if t_sleep > 0:
+                time.sleep(t_sleep)
+    return n / (time.perf_counter() - t_start)
+
+
+def publish_in_thread(n, rate):
+    result = {}
+
+    def run():
+        status_bus.publish('scan', 'started', n_pts=n)
+        result['rate'] = publish_events(n, rate)
+        status_bus.publish('scan', 'stopped')
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def check_blocking_subscriber(app, n=200_000, rate=1e5):
+    # reference without subscribers
+    thread, result = publish_in_thread(n, float('inf'))
+    thread.join()
+    max_rate = result['rate']
+
+    received = []
+
+    def slow_slot(event):
+        received.append(event)
+        # GUI thread blocked by the subscriber
+        time.sleep(0.5)
+
+    subscriber = status_subscriber(['scan'])
+    subscriber.status_changed.connect(slow_slot)
+
+    thread, result = publish_in_thread(n, rate)
+    while thread.is_alive():
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+    subscriber.close()
+
+    print(f'publish rate: without subscriber {max_rate:.0f}/s, '
+          f'target {rate:.0f}/s with blocking subscriber {result["rate"]:.0f}/s, '
+          f'{len(received)} events delivered')
+    assert max_rate > rate
+    assert result['rate'] > 0.95 * rate
+    # started, coalesced progress and stopped.
+    assert received[0].state == 'started'
+    assert received[-1].state == 'stopped'
+    assert len(received) < 20
+
+
+def check_no_lost_events():
+    bus = _status_bus()
+    subscription = bus.subscribe(lambda: None, ['scan'])
+    get_status = bus.get_status
+
+    def publish_during_poll(source=None):
+        # events published by another thread while the subscriber polls.
+        bus.get_status = get_status
+        bus.publish('scan', 'started', n_pts=10)
+        bus.publish('scan', 'progress', n=1, n_pts=10)
+        return get_status(source)
+
+    bus.get_status = publish_during_poll
+    events = subscription.poll() + subscription.poll()
+    bus.publish('scan', 'progress', n=2, n_pts=10)
+    events += subscription.poll()
+    bus.publish('scan', 'stopped')
+    events += subscription.poll() + subscription.poll()
+    states = [event.state for event in events]
+    assert states == ['started', 'progress', 'progress', 'stopped'], states
+    print('no events lost while polling')
+
+
+if __name__ == '__main__':
+    app = QtWidgets.QApplication([])
+    runner = ScriptRunner()
+    check_no_lost_events()
+    check_state_tracked(app, runner)
+    check_no_timers_when_idle(app)
+    check_blocking_subscriber(app)
+    runner.close()
+    print('ok')
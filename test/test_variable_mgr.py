@@ -0,0 +1,124 @@
+'''
+Test of the variable_mgr history with a local PostgreSQL database.
+
+The tables are created for a new sample and dropped afterwards.
+Checks the migration of the old table with a column per variable, the
+history averaged per time bucket and the rollback of a failed batch.
+'''
+import datetime
+import uuid
+
+import numpy as np
+import psycopg2.extensions
+
+import core_tools as ct
+from core_tools.data.SQL.connect import sample_info
+from core_tools.data.SQL.SQL_common_commands import execute_statement
+from core_tools.data.SQL.SQL_connection_mgr import SQL_database_manager
+from core_tools.utility.variable_mgr.var_mgr import variable_mgr
+from core_tools.utility.variable_mgr.var_mgr_sql import var_sql_queries
+
+T0 = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+def create_old_tables(conn):
+    # tables of the previous version: values in a column per variable.
+    overview = var_sql_queries.gen_table_overview_name()
+    content = var_sql_queries.gen_table_content_name()
+    execute_statement(conn, f"CREATE TABLE {overview} (name text NOT NULL UNIQUE, unit text NOT NULL, "
+                      "step FLOAT8 NOT NULL, category text NOT NULL);")
+    execute_statement(conn, f"CREATE TABLE {content} (id SERIAL, insert_time TIMESTAMP, "
+                      "a FLOAT8, b FLOAT8, never_set FLOAT8);")
+    for name in ['a', 'b', 'never_set']:
+        execute_statement(conn, f"INSERT INTO {overview} VALUES (%s, 'mV', 0.1, 'test');", [name])
+    # every row contains all values. Only the changes must be migrated.
+    rows = [(1.0, 5.0), (2.0, 5.0), (2.0, 5.0), (3.0, 6.0)]
+    for i, (a, b) in enumerate(rows):
+        execute_statement(conn, f"INSERT INTO {content} (insert_time, a, b) VALUES (%s, %s, %s);",
+                          [T0 + datetime.timedelta(seconds=i), a, b])
+    conn.commit()
+
+
+def drop_tables(conn):
+    conn.rollback()
+    for table in [var_sql_queries.gen_table_overview_name(),
+                  var_sql_queries.gen_table_content_name(),
+                  var_sql_queries.gen_table_history_name()]:
+        execute_statement(conn, f"DROP TABLE IF EXISTS {table};")
+    conn.commit()
+
+
+def check_migration(conn):
+    create_old_tables(conn)
+    var_sql_queries.init_table(conn)
+
+    time, values = var_sql_queries.get_history(conn, 'a')
+    assert list(values) == [1.0, 2.0, 3.0]
+    assert list(time) == [T0, T0 + datetime.timedelta(seconds=1), T0 + datetime.timedelta(seconds=3)]
+    _, values = var_sql_queries.get_history(conn, 'b')
+    assert list(values) == [5.0, 6.0]
+    # variable without value in the old table gets the default value
+    assert var_sql_queries.get_all_values(conn) == {'a': 3.0, 'b': 6.0, 'never_set': 0.0}
+    assert var_sql_queries.get_values_at(conn, T0 + datetime.timedelta(seconds=2)) == {
+            'a': 2.0, 'b': 5.0, 'never_set': None}
+    print('old table migrated')
+
+
+def check_bucketed_history(conn):
+    history = var_sql_queries.gen_table_history_name()
+    values = np.arange(12, dtype=float)
+    for i, value in enumerate(values):
+        execute_statement(conn, f"INSERT INTO {history} (name, insert_time, value) VALUES ('c', %s, %s);",
+                          [T0 + datetime.timedelta(seconds=10*i), value])
+    execute_statement(conn, f"INSERT INTO {history} (name, insert_time, value) VALUES ('c', %s, 'NaN');",
+                      [T0 + datetime.timedelta(seconds=5)])
+    conn.commit()
+
+    time, result = var_sql_queries.get_history(conn, 'c', bucket=datetime.timedelta(minutes=1))
+    assert list(time) == [T0, T0 + datetime.timedelta(minutes=1)]
+    assert np.array_equal(result, [np.mean(values[:6]), np.mean(values[6:])])
+
+    time, result = var_sql_queries.get_history(conn, 'c',
+                                               start=T0 + datetime.timedelta(seconds=20),
+                                               stop=T0 + datetime.timedelta(seconds=50))
+    assert np.array_equal(result, values[2:5])
+    print('bucketed history')
+
+
+def check_batch_rollback():
+    mgr = variable_mgr()
+    mgr.refresh()
+    a = mgr.a
+    try:
+        with mgr.batch():
+            mgr.a = a + 1
+            mgr.b = 7.0
+            # query in the transaction of the batch
+            mgr.get_history('a')
+            raise ValueError('abort batch')
+    except ValueError:
+        pass
+    assert mgr.a == a and mgr.b == 6.0
+    status = mgr.conn_local.get_transaction_status()
+    assert status == psycopg2.extensions.TRANSACTION_STATUS_IDLE, status
+    mgr.refresh()
+    assert mgr.a == a and mgr.b == 6.0
+
+    with mgr.batch():
+        mgr.a = a + 1
+        mgr.b = 7.0
+    mgr.refresh()
+    assert mgr.a == a + 1 and mgr.b == 7.0
+    print('batch rolled back on exception')
+
+
+if __name__ == '__main__':
+    ct.configure('./setup_config/ct_config_measurement.yaml')
+    sample_info(sample_info.project, sample_info.set_up, f'test_var_mgr_{uuid.uuid4().hex[:8]}')
+    conn = SQL_database_manager().conn_local
+    try:
+        check_migration(conn)
+        check_bucketed_history(conn)
+        check_batch_rollback()
+    finally:
+        drop_tables(conn)